@@ -1,10 +1,5 @@
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
-import sympy
-
-if len(sys.argv) == 1:
-	print("Use \"contour\" or \"surface\".")
 
 def f1(R, Z, c=1, a=1, b=1, V=1):
 	# Linear dilation-shift
@@ -153,54 +148,10 @@ def f_cartesian(x, y, z, c=1, a=1, b=0.5, V=1):
     Z = z
     return f(R, Z, c, a, b, V)
 
-# Generate data for x and z
-x_values = np.linspace(-lim, lim, 100)
-z_values = np.linspace(-lim, lim, 100)
-x, z = np.meshgrid(x_values, z_values)
-y = np.zeros_like(x)  # Slice through y=0
-
-F_values = f_cartesian(x, 0, z)
-
-# # Plot the function
-# plt.figure(figsize=(8, 6))
-# plt.contourf(x, z, F_values, levels=50, cmap='cividis')
-# plt.colorbar(label='f(x, z)')
-
-# zero_contour = plt.contour(x, z, F_values, levels=[0], colors='cyan', linewidths=1)
-# plt.clabel(zero_contour, fmt='%.2f', colors='white', fontsize=10)
-
-# plt.xlabel('x')
-# plt.ylabel('z')
-# plt.title('Contour Plot of f(x, z) in Cartesian Coordinates')
-# plt.show()
-
-R = np.linspace(0.1, 5, 100)
-Z = np.linspace(-3, 3, 100)
-R, Z = np.meshgrid(R, Z)
-F = f(R, Z)
-
-fig = plt.figure(figsize=(12, 5))
-
-# Contour Plot
-ax1 = fig.add_subplot(1, 2, 1)
-contour = ax1.contourf(x_values, z_values, F_values, levels=50, cmap='plasma')
-plt.colorbar(contour, ax=ax1)
-ax1.set_xlabel("x")
-ax1.set_ylabel("z")
-ax1.set_title("Energy density contour plot")
-
-zero_contour = plt.contour(x, z, F_values, levels=[0], colors='cyan', linewidths=1)
-plt.clabel(zero_contour, fmt='%.2f', colors='white', fontsize=10)
-
-# 3D Surface Plot
-ax2 = fig.add_subplot(1, 2, 2, projection='3d')
-surf = ax2.plot_surface(x, z, F_values, cmap='plasma', edgecolor='none')
-fig.colorbar(surf, ax=ax2, shrink=0.5, aspect=5)
-ax2.set_xlabel("x")
-ax2.set_ylabel("z")
-ax2.set_zlabel("T⁰⁰")
-ax2.set_title("")
-ax2.view_init(elev=20, azim=50) # Adjust elevation and azimuth
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+	# Plots the y=0 slice of f; choose another field with --field
+	# (see python -m sxl.plotting --help).
+	from sxl import plotting
+	plotting.main([
+		__file__, "--field", f.__name__, "--lim", str(lim), "-p", "b=0.5", "-o", "00_grapher.png"
+	] + sys.argv[1:])
@@ -0,0 +1,253 @@
+"""
+Empirical complexity of the clique algorithms in pnp.
+
+The docstrings in pnp predict O(n^4) to O(n^5) for the alpha/beta
+linking of Graph.cliques_of_size; this measures it, next to the other
+clique searches, on the same graphs. For every graph family, size,
+density and algorithm, a trial builds the graph, runs the algorithm
+to completion in a separate process (killed after a timeout) and
+records
+
+	* the wall time,
+	* OperationCounter.operations,
+	* the peak resident memory above what the process started with,
+	* the number of cliques found (or the size of the largest).
+
+Growth exponents are then fitted per algorithm and family, as the
+slope of log(time) and log(operations) against log(n) over the
+trials that finished, and everything is written out as CSV (one row
+per trial), JSON (trials and fits) and a log-log plot. For example,
+
+	python benchmark.py --sizes 10 20 40 80 --densities 0.3 0.5 -k 4 --timeout 60 -o results/k4
+
+The families are Erdos-Renyi G(n, p), G(n, p) with a planted clique
+(of size --planted, k by default) and Moon-Moser graphs, the worst
+case for listing maximal cliques (density does not apply to them).
+With --corpus DIRECTORY the graphs are read from (and cached in) a
+corpus.Corpus instead of being generated for every run.
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import time
+import numpy as np
+from typing import Any
+from multiprocessing import Pipe
+from multiprocessing import Process
+import pnp
+import sat
+import corpus
+
+FAMILIES = corpus.FAMILIES
+
+def _exhaust(iterable) -> int:
+	return sum(1 for _ in iterable)
+
+# Every algorithm takes (graph, k, oc) and returns the number of
+# cliques it found (or, for maximum, the size of the largest, and for
+# sat, 1 if there is a k-clique at all).
+ALGORITHMS = {
+	"link": lambda g, k, oc: _exhaust(g.cliques_of_size(k, oc)),
+	"ordered": lambda g, k, oc: _exhaust(g.ordered_cliques(k, oc)),
+	"indexed": lambda g, k, oc: _exhaust(pnp.CliqueIndex(g).cliques_of_size(k, oc)),
+	"bron-kerbosch": lambda g, k, oc: _exhaust(pnp.BronKerbosch(g).cliques_of_size(k, oc)),
+	"parallel": lambda g, k, oc: _exhaust(pnp.ParallelCliques(g).cliques_of_size(k, oc)),
+	"maximal": lambda g, k, oc: _exhaust(pnp.BronKerbosch(g).maximal_cliques(oc)),
+	"maximum": lambda g, k, oc: len(pnp.BronKerbosch(g).maximum_clique(oc)),
+	"count": lambda g, k, oc: pnp.CliqueCounter(g).count(k, oc),
+	"count-numpy": lambda g, k, oc: pnp.CliqueCounter(g, "numpy").count(k, oc),
+	"sat": lambda g, k, oc: int(sat.clique_to_sat(g, k).solve(oc) is not None)
+}
+
+FIELDS = ["family", "n", "density", "k", "seed", "algorithm", "status", "vertices", "edges", "result", "seconds", "operations", "peak_kib"]
+
+def _peak_kib() -> int:
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _call(connection, function, args: tuple) -> None:
+	baseline = _peak_kib()
+	try:
+		value = function(*args)
+	except Exception as e:
+		connection.send(("error", repr(e), None))
+	else:
+		connection.send(("ok", value, _peak_kib() - baseline))
+	connection.close()
+
+def call(function, args: tuple, timeout: float) -> tuple[str, Any, int]:
+	"""
+	Run function(*args) in a child process and return (status, value,
+	peak_kib): the status is "ok", "timeout" or "error" (with the
+	exception as the value), and peak_kib how far the peak resident
+	memory of the child rose during the call.
+	"""
+
+	receive, send = Pipe(duplex=False)
+	process = Process(target=_call, args=(send, function, args))
+	process.start()
+	send.close()
+	outcome = ("timeout", None, None)
+	if receive.poll(timeout):
+		try:
+			outcome = receive.recv()
+		except EOFError:
+			outcome = ("error", "the process died (exit code {})".format(process.exitcode), None)
+	if process.is_alive():
+		process.terminate()
+	process.join()
+	return outcome
+
+def _measure(edges: list, algorithm: str, k: int) -> tuple[Any, float, int]:
+	graph = pnp.Graph(edges)
+	oc = pnp.OperationCounter()
+	start = time.perf_counter()
+	result = ALGORITHMS[algorithm](graph, k, oc)
+	return result, time.perf_counter() - start, oc.operations
+
+def run_trial(edges: list, algorithm: str, k: int, timeout: float) -> dict:
+	"""
+	Run one algorithm on one graph in a child process. The status is
+	"ok", "timeout" or "error".
+	"""
+
+	status, value, peak = call(_measure, (edges, algorithm, k), timeout)
+	row = {"status": status, "result": None, "seconds": None, "operations": None, "peak_kib": peak}
+	if status == "ok":
+		row["result"], row["seconds"], row["operations"] = value
+	return row
+
+def sweep(sizes: list[int], densities: list[float], families: list[str], algorithms: list[str], k: int, timeout: float=60.0, repeats: int=1, seed: int=0, planted: int=None, graphs: corpus.Corpus=None, log=print) -> list[dict]:
+	"""
+	Run every combination. Once an algorithm times out on a family at
+	some density, it is skipped for the larger sizes. Graphs come from
+	the corpus graphs if one is given.
+	"""
+
+	rows = []
+	for family in families:
+		for density in (densities if family != "moon-moser" else [None]):
+			given_up = set()
+			for n in sorted(sizes):
+				for repeat in range(repeats):
+					trial_seed = seed + repeat
+					if graphs is not None:
+						edges = list(map(tuple, graphs.get(family, n, density, planted or k, trial_seed).tolist()))
+					else:
+						edges = FAMILIES[family](n, density, planted or k, trial_seed)
+					vertices = len({x for edge in edges for x in edge})
+					for algorithm in algorithms:
+						if algorithm in given_up:
+							continue
+						row = {"family": family, "n": n, "density": density, "k": k, "seed": trial_seed, "algorithm": algorithm, "vertices": vertices, "edges": len(edges)}
+						row.update(run_trial(edges, algorithm, k, timeout))
+						rows.append(row)
+						if row["status"] != "ok":
+							given_up.add(algorithm)
+						log("{family:>12} n={n:<5} p={density!s:<5} {algorithm:>14}: {status:<7} {seconds_text} {operations!s:>12} ops".format(seconds_text="{:9.4f} s".format(row["seconds"]) if row["seconds"] is not None else "        - s", **row))
+	return rows
+
+def fit_exponents(rows: list[dict]) -> list[dict]:
+	"""
+	Slopes of log(seconds) and log(operations) against log(n), by
+	least squares, for every algorithm, family and density with at
+	least two sizes that finished.
+	"""
+
+	groups = {}
+	for row in rows:
+		if row["status"] == "ok":
+			groups.setdefault((row["algorithm"], row["family"], row["density"]), []).append(row)
+	fits = []
+	for (algorithm, family, density), group in sorted(groups.items(), key=lambda x: tuple(map(str, x[0]))):
+		fit = {"algorithm": algorithm, "family": family, "density": density, "sizes": len({r["n"] for r in group})}
+		for key in ("seconds", "operations"):
+			points = [(r["n"], r[key]) for r in group if r[key] and r[key] > 0]
+			if len({n for n, _ in points}) >= 2:
+				x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+				fit[key + "_exponent"] = float(np.polyfit(x, y, 1)[0])
+			else:
+				fit[key + "_exponent"] = None
+		fits.append(fit)
+	return fits
+
+def write(rows: list[dict], fits: list[dict], prefix: str, options: dict=None) -> list[str]:
+	"""
+	Write prefix.csv, prefix.json and (with matplotlib) prefix.png;
+	return the paths written.
+	"""
+
+	directory = os.path.dirname(prefix)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	paths = [prefix + ".csv", prefix + ".json"]
+	with open(paths[0], "w", newline="") as f:
+		writer = csv.DictWriter(f, FIELDS)
+		writer.writeheader()
+		writer.writerows(rows)
+	with open(paths[1], "w") as f:
+		json.dump({"options": options or {}, "trials": rows, "fits": fits}, f, indent=1)
+	if plot(rows, fits, prefix + ".png"):
+		paths.append(prefix + ".png")
+	return paths
+
+def plot(rows: list[dict], fits: list[dict], path: str) -> bool:
+	try:
+		import matplotlib
+		matplotlib.use("Agg")
+		import matplotlib.pyplot as plt
+	except ImportError:
+		print("matplotlib is not available, so no plot was made.")
+		return False
+
+	exponents = {(f["algorithm"], f["family"], f["density"]): f for f in fits}
+	figure, axes = plt.subplots(1, 2, figsize=(13, 5.5))
+	for ax, key, label in ((axes[0], "seconds", "wall time (s)"), (axes[1], "operations", "operations")):
+		for group, fit in exponents.items():
+			points = sorted((r["n"], r[key]) for r in rows if r["status"] == "ok" and (r["algorithm"], r["family"], r["density"]) == group and r[key])
+			if not points:
+				continue
+			exponent = fit[key + "_exponent"]
+			name = "{} / {}{}".format(group[0], group[1], " p={}".format(group[2]) if group[2] is not None else "")
+			if exponent is not None:
+				name += " (n^{:.2f})".format(exponent)
+			ax.loglog([p[0] for p in points], [p[1] for p in points], "o-", label=name)
+		ax.set_xlabel("n")
+		ax.set_ylabel(label)
+		ax.grid(True, which="both", alpha=0.3)
+	axes[1].legend(fontsize="x-small")
+	figure.tight_layout()
+	figure.savefig(path, dpi=120)
+	plt.close(figure)
+	return True
+
+def main(argv: list[str]=None) -> tuple[list[dict], list[dict]]:
+	parser = argparse.ArgumentParser(description="Measure how the pnp clique algorithms scale.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[8, 12, 16, 24, 32])
+	parser.add_argument("--densities", type=float, nargs="+", default=[0.3, 0.5])
+	parser.add_argument("--families", nargs="+", default=list(FAMILIES), choices=list(FAMILIES))
+	parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+	parser.add_argument("-k", type=int, default=4, help="clique size")
+	parser.add_argument("--planted", type=int, default=None, help="size of the planted clique (default: k)")
+	parser.add_argument("--timeout", type=float, default=60.0, help="seconds per trial")
+	parser.add_argument("--repeats", type=int, default=1, help="graphs per size (seeds seed, seed + 1, ...)")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--corpus", default=None, help="directory of a graph corpus to read (and cache) graphs in")
+	parser.add_argument("-o", "--output", default="benchmark", help="prefix of the output files")
+	args = parser.parse_args(argv)
+
+	graphs = corpus.Corpus(args.corpus) if args.corpus is not None else None
+	rows = sweep(args.sizes, args.densities, args.families, args.algorithms, args.k, args.timeout, args.repeats, args.seed, args.planted, graphs)
+	fits = fit_exponents(rows)
+	for fit in fits:
+		print("{algorithm:>14} {family:>12} p={density!s:<5} time ~ n^{0}, operations ~ n^{1}".format(
+			"{:.2f}".format(fit["seconds_exponent"]) if fit["seconds_exponent"] is not None else "?",
+			"{:.2f}".format(fit["operations_exponent"]) if fit["operations_exponent"] is not None else "?",
+			**fit))
+	print("Wrote " + ", ".join(write(rows, fits, args.output, vars(args))))
+	return rows, fits
+
+if __name__ == "__main__":
+	main()
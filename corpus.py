@@ -0,0 +1,208 @@
+"""
+A cache of seeded graphs for pnp experiments.
+
+Graphs are generated once, in parallel, by the seeded families in pnp
+and kept in a directory as one edge list per graph
+
+	<directory>/manifest.json
+	<directory>/erdos-renyi_n64_p0.5_s3.npy
+	<directory>/planted_n64_p0.5_k6_s3.npy
+	<directory>/moon-moser_n30.npy
+
+Each .npy file is an (m, 2) int32 array of edges and is opened memory
+mapped, so a benchmark can stream through a corpus much larger than
+memory and never regenerate anything. Every file is written under a
+temporary name and renamed when complete, and the manifest is only
+updated with finished graphs, so an interrupted run can just be
+started again. For example,
+
+	c = corpus.Corpus("graphs")
+	c.generate(corpus.specs(["erdos-renyi", "planted"], [32, 64, 128], [0.3, 0.5], seeds=range(10), k=6), processes=8)
+	for entry, edges in c.select(family="planted", n=64):
+		graph = corpus.graph(edges)
+
+or from the shell,
+
+	python corpus.py graphs --families erdos-renyi planted --sizes 32 64 128 --densities 0.3 0.5 --seeds 10 -k 6
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from multiprocessing import Pool
+from typing import Iterable
+import pnp
+
+FAMILIES = {
+	"erdos-renyi": lambda n, p, k, seed: pnp.erdos_renyi(n, p, seed),
+	"planted": lambda n, p, k, seed: pnp.planted_clique(n, p, min(k, n), seed),
+	"moon-moser": lambda n, p, k, seed: pnp.moon_moser(n)
+}
+
+# Parameters each family depends on; the others are dropped from its
+# specs so that equal graphs share one file.
+PARAMETERS = {
+	"erdos-renyi": ("n", "p", "seed"),
+	"planted": ("n", "p", "k", "seed"),
+	"moon-moser": ("n",)
+}
+
+MANIFEST = "manifest.json"
+
+class CorpusError(Exception):
+	pass
+
+def spec(family: str, n: int, p: float=None, k: int=None, seed: int=None) -> dict:
+	if family not in FAMILIES:
+		raise CorpusError(f"Unknown graph family \"{family}\" (known: {', '.join(FAMILIES)}).")
+	given = {"n": n, "p": p, "k": k, "seed": seed}
+	for x in PARAMETERS[family]:
+		if given[x] is None:
+			raise CorpusError(f"Graphs of the {family} family need {x}.")
+	return dict({"family": family}, **{x: given[x] for x in PARAMETERS[family]})
+
+def specs(families: list[str], sizes: list[int], densities: list[float]=(None,), seeds: Iterable=(0,), k: int=None) -> list[dict]:
+	"""
+	Every combination, without duplicates (moon-moser graphs only
+	depend on n).
+	"""
+
+	out = {}
+	for family in families:
+		for n in sizes:
+			for p in densities:
+				for seed in seeds:
+					s = spec(family, n, p, k, seed)
+					out.setdefault(name(s), s)
+	return list(out.values())
+
+def name(s: dict) -> str:
+	prefixes = {"n": "n", "p": "p", "k": "k", "seed": "s"}
+	return "_".join([s["family"]] + ["{}{}".format(prefixes[x], s[x]) for x in PARAMETERS[s["family"]]])
+
+def _generate(job: tuple[str, dict]) -> dict:
+	directory, s = job
+	edges = np.array(FAMILIES[s["family"]](s["n"], s.get("p"), s.get("k"), s.get("seed")), dtype=np.int32).reshape(-1, 2)
+	filename = name(s) + ".npy"
+	tmp = os.path.join(directory, filename + ".tmp")
+	with open(tmp, "wb") as f:
+		np.save(f, edges)
+	os.replace(tmp, os.path.join(directory, filename))
+	return dict(s, name=name(s), file=filename, edges=len(edges))
+
+def graph(edges: np.ndarray) -> pnp.Graph:
+	return pnp.Graph(list(map(tuple, np.asarray(edges).tolist())))
+
+class Corpus:
+
+	"""
+	A directory of cached graphs. entries maps graph names to their
+	manifest entries (the spec, the file and the number of edges).
+	"""
+
+	def __init__(self, directory: str) -> None:
+		self.directory = directory
+		os.makedirs(directory, exist_ok=True)
+		self.entries = {}
+		path = os.path.join(directory, MANIFEST)
+		if os.path.exists(path):
+			with open(path) as f:
+				self.entries = {entry["name"]: entry for entry in json.load(f)["graphs"]}
+
+	def __len__(self) -> int:
+		return len(self.entries)
+
+	def __contains__(self, s: dict) -> bool:
+		return name(s) in self.entries
+
+	def __iter__(self) -> Iterable[tuple[dict, np.ndarray]]:
+		return self.select()
+
+	def __repr__(self):
+		return f"<Corpus of {len(self)} graphs in {self.directory}>"
+
+	def _save(self) -> None:
+		path = os.path.join(self.directory, MANIFEST)
+		with open(path + ".tmp", "w") as f:
+			json.dump({"graphs": sorted(self.entries.values(), key=lambda e: e["name"])}, f, indent=1)
+		os.replace(path + ".tmp", path)
+
+	def generate(self, specs: list[dict], processes: int=None, chunksize: int=1) -> list[dict]:
+		"""
+		Generate (across processes, one per CPU by default) every graph
+		in specs that is not already cached and return the new entries.
+		"""
+
+		missing = [s for s in specs if s not in self]
+		if len(missing) == 0:
+			return []
+		jobs = [(self.directory, s) for s in missing]
+		new = []
+		# Largest graphs first, so no worker is left with a big one at the end
+		jobs.sort(key=lambda job: -job[1]["n"])
+		try:
+			if processes == 1 or len(jobs) == 1:
+				for job in jobs:
+					new.append(_generate(job))
+			else:
+				with Pool(processes) as pool:
+					for entry in pool.imap_unordered(_generate, jobs, chunksize):
+						new.append(entry)
+		finally:
+			for entry in new:
+				self.entries[entry["name"]] = entry
+			self._save()
+		return new
+
+	def edges(self, s, mmap: bool=True) -> np.ndarray:
+		"""
+		The (m, 2) int32 edge array of a graph, given by name or spec,
+		memory mapped unless mmap is False.
+		"""
+
+		key = s if isinstance(s, str) else name(s)
+		if key not in self.entries:
+			raise CorpusError(f"Graph {key} is not in {self.directory}.")
+		return np.load(os.path.join(self.directory, self.entries[key]["file"]), mmap_mode="r" if mmap else None)
+
+	def get(self, family: str, n: int, p: float=None, k: int=None, seed: int=None) -> np.ndarray:
+		"""
+		The edges of a graph, generating it first if it is not cached.
+		"""
+
+		s = spec(family, n, p, k, seed)
+		if s not in self:
+			self.generate([s], processes=1)
+		return self.edges(s)
+
+	def select(self, **where) -> Iterable[tuple[dict, np.ndarray]]:
+		"""
+		Yield (entry, edges) for the cached graphs whose spec matches
+		every keyword (family=, n=, p=, k=, seed=), in order of name.
+		"""
+
+		for key in sorted(self.entries):
+			entry = self.entries[key]
+			if all(entry.get(x) == value for x, value in where.items()):
+				yield entry, self.edges(key)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Generate a cached corpus of seeded graphs.")
+	parser.add_argument("directory")
+	parser.add_argument("--families", nargs="+", default=None, choices=list(FAMILIES), help="default: all, or all but planted without -k")
+	parser.add_argument("--sizes", type=int, nargs="+", required=True)
+	parser.add_argument("--densities", type=float, nargs="+", default=[0.5])
+	parser.add_argument("--seeds", type=int, default=1, help="graphs per family, size and density (seeds 0, 1, ...)")
+	parser.add_argument("-k", type=int, default=None, help="size of planted cliques")
+	parser.add_argument("--processes", type=int, default=None)
+	args = parser.parse_args()
+	if args.families is None:
+		args.families = [f for f in FAMILIES if args.k is not None or "k" not in PARAMETERS[f]]
+	for family in args.families:
+		if args.k is None and "k" in PARAMETERS[family]:
+			parser.error(f"graphs of the {family} family need -k")
+
+	c = Corpus(args.directory)
+	new = c.generate(specs(args.families, args.sizes, args.densities, range(args.seeds), args.k), args.processes)
+	print(f"Generated {len(new)} graphs ({sum(e['edges'] for e in new)} edges); {c!r}")
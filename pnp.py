@@ -1,7 +1,13 @@
 from typing import Any, Iterable, Callable
 from itertools import combinations
-from math import floor
+from math import comb, floor
+from multiprocessing import Pool
+import os
 import random
+import shutil
+import tempfile
+import time
+import numpy as np
 
 AB_ERROR = """Alpha/beta pair did not correctly generate.
 
@@ -98,14 +104,31 @@ class OperationCounter:
 		"""
 		self.operations += 1
 
+	def __invert__(self) -> "OperationCounter":
+		self.increment()
+		return self
+
+	def __iadd__(self, count: int) -> "OperationCounter":
+		"""
+		oc += k counts k operations at once (and, like ~, also
+		works on the int default).
+		"""
+		self.operations += count
+		return self
+
 class Graph:
 
 	"""
 	A simple Graph data structure.
 
-	Arbitrary vertices are assigned arbitrary names (objects that
-	implement __eq__), and the graph is initialized with a list of
-	the edges between them.
+	Arbitrary vertices are assigned arbitrary names (hashable objects),
+	and the graph is initialized with a list of the edges between them.
+
+	The edges are turned into a dict mapping each vertex to the set of
+	its neighbors once, in __init__, so adjacency really is an O(1)
+	lookup. For dense graphs, dense=True also builds a NumPy boolean
+	adjacency matrix (indexed by the order vertices first appear in the
+	edges, see .index) and adjacency is looked up there instead.
 	"""
 
 	"""
@@ -119,20 +142,48 @@ class Graph:
 	neighborhood of a vertex are considered O(1) operations.
 	"""
 
-	def __init__(self, edges: list[tuple[Any, Any]]) -> None:
+	def __init__(self, edges: list[tuple[Any, Any]], dense: bool=False) -> None:
 		self.edges = edges
-		self.all_vertices = None
-		list(self.vertices())
+		self.all_vertices = []
+		self.index = {}
+		self.adjacent = {}
+		for edge in edges:
+			for x in edge:
+				if x not in self.index:
+					self.index[x] = len(self.all_vertices)
+					self.all_vertices.append(x)
+					self.adjacent[x] = set()
+			x, y = edge
+			if x != y: # just in case
+				self.adjacent[x].add(y)
+				self.adjacent[y].add(x)
+
+		# The neighbors of each vertex that come after it, for
+		# enumerating cliques in increasing vertex order.
+		self.successors = {x: {y for y in neighbors if self.index[y] > self.index[x]} for x, neighbors in self.adjacent.items()}
+
+		self.bits = None
+		self.matrix = None
+		if dense:
+			n = len(self.all_vertices)
+			self.matrix = np.zeros((n, n), dtype=bool)
+			for x, neighbors in self.adjacent.items():
+				self.matrix[self.index[x], [self.index[y] for y in neighbors]] = True
+
+	def __len__(self) -> int:
+		return len(self.all_vertices)
 
 	def adjacency(self, x: Any, y: Any, oc: OperationCounter=0) -> bool:
 		"""
 		Return whether or not the given edge is in the graph.
 
-		Assumed to be an O(1) lookup.
+		An O(1) lookup.
 		"""
 
-		oc.increment()
-		return (x, y) in self.edges or (y, x) in self.edges if x != y else False # just in case
+		~oc
+		if self.matrix is not None:
+			return x in self.index and y in self.index and bool(self.matrix[self.index[x], self.index[y]])
+		return y in self.adjacent.get(x, ())
 
 	def vertices(self) -> Iterable[Any]:
 		"""
@@ -142,41 +193,82 @@ class Graph:
 		be an O(0) operation -- listing them all should
 		be part of the problem statement.
 
-		On the first pass, they are also cached.
+		They are listed in the order they first appear in
+		the edges.
 		"""
 
-		if self.all_vertices is None:
-			self.all_vertices = []
-			for edge in self.edges:
-				for x in edge:
-					if x in self.all_vertices:
-						continue
-					self.all_vertices.append(x)
-					yield x
-		else:
-			for vertex in self.all_vertices:
-				yield vertex
+		for vertex in self.all_vertices:
+			yield vertex
 
 	def neighborhood(self, vertex: Any, oc: OperationCounter=0) -> list[Any]:
 		"""
 		Return a list of vertices that have at least one edge with
 		the given vertex.
+
+		Read from the adjacency sets, but counted as one adjacency check
+		against every other vertex.
 		"""
 
-		results = []
-		for other_vertex in self.vertices():
-			if other_vertex == vertex:
-				continue
-			if self.adjacency(vertex, other_vertex, oc):
-				results.append(other_vertex)
-		return results
+		oc += len(self.all_vertices) - (vertex in self.index)
+		return list(self.adjacent.get(vertex, ()))
+
+	def bitsets(self) -> list[int]:
+		"""
+		The neighborhood of each vertex as a Python int used as a
+		bitset (bit i set for the vertex with index i), listed by
+		index. Built on first use.
+		"""
+
+		if self.bits is None:
+			self.bits = [sum(1 << self.index[y] for y in self.adjacent[x]) for x in self.all_vertices]
+		return self.bits
+
+	def degeneracy_ordering(self) -> tuple[list[Any], int]:
+		"""
+		Order the vertices by repeatedly removing one of minimum
+		degree (Matula-Beck, O(V+E) with degree buckets), and return
+		that order along with the degeneracy: the largest degree seen
+		on removal. Every vertex has at most that many neighbors later
+		in the order, and no clique is larger than the degeneracy + 1.
+		"""
+
+		degree = {x: len(self.adjacent[x]) for x in self.all_vertices}
+		buckets = [[] for _ in range(max(degree.values(), default=0) + 1)]
+		for x in self.all_vertices:
+			buckets[degree[x]].append(x)
+		removed = set()
+		order = []
+		degeneracy = 0
+		d = 0
+		while len(order) < len(self.all_vertices):
+			d = max(d - 1, 0)
+			while not buckets[d]:
+				d += 1
+			x = buckets[d].pop()
+			if x in removed or degree[x] != d:
+				continue # stale entry, x moved to a lower bucket
+			removed.add(x)
+			order.append(x)
+			degeneracy = max(degeneracy, d)
+			for y in self.adjacent[x]:
+				if y not in removed:
+					degree[y] -= 1
+					buckets[degree[y]].append(y)
+		return order, degeneracy
 
 	def subgraph(self, vertices: list[int]) -> "Graph":
+		"""
+		The graph induced by the given vertices (minus any that
+		end up isolated), in time proportional to their degrees.
+		"""
+
+		vertices = set(vertices)
 		new_edges = []
-		for x, y in self.edges:
-			if x in vertices and y in vertices:
-				new_edges.append((x, y))
-		return Graph(new_edges)
+		for x in vertices:
+			for y in self.adjacent.get(x, ()):
+				if y in vertices and self.index[x] < self.index[y]:
+					new_edges.append((x, y))
+		return Graph(new_edges, self.matrix is not None)
 
 	"""
 	# ===== CLIQUE-FINDING ===== #
@@ -196,69 +288,70 @@ class Graph:
 
 	# === Small-clique lookup === #
 
+	"""
+	All of these enumerate cliques canonically: a clique is only ever
+	built up in increasing vertex order (the order of .index), each
+	new vertex coming from the common successors of the ones before
+	it, so every clique comes out exactly once instead of k! times.
+	"""
+
+	def ordered_cliques(self, k: int, oc: OperationCounter=0, clique: list=None, candidates: set=None) -> Iterable[set]:
+		"""
+		Iterate through every k-clique exactly once, extending cliques
+		through the intersection of the successor sets of their vertices.
+		Checking a candidate against a new vertex counts as an adjacency
+		check.
+
+		Given a clique and the candidates that can extend it (vertices
+		after all of it, adjacent to all of it), only extensions of
+		that clique are produced.
+		"""
+
+		clique = [] if clique is None else clique
+		candidates = set(self.all_vertices) if candidates is None else candidates
+		if len(clique) == k:
+			yield set(clique)
+			return
+		if len(clique) + len(candidates) < k:
+			return
+
+		for vertex in sorted(candidates, key=self.index.__getitem__):
+			oc += len(candidates)
+			clique.append(vertex)
+			for found in self.ordered_cliques(k, oc, clique, candidates & self.successors[vertex]):
+				yield found
+			clique.pop()
+
 	def all_doubles(self, oc: OperationCounter=0) -> Iterable[set[Any, Any]]:
 		"""
-		Go through all the edges, for consistency.
+		Go through all the edges, for consistency (each one once,
+		whichever way round it was given).
 		
-		Worst-case time to finish: (n-1)n = O(n^2)
+		Worst-case time to finish: (n-1)n/2 = O(n^2)
 		"""
 
-		for edge in self.edges:
-			oc.increment() # doesn't end up mattering
-			yield set(edge)
+		for x in self.vertices():
+			for y in self.successors[x]:
+				~oc # doesn't end up mattering
+				yield set((x, y))
 
 	def all_triples(self, oc: OperationCounter=0) -> Iterable[set[Any, Any, Any]]:
 		"""
-		Naively iterate through all the triples in the graph.
+		Iterate through all the triples in the graph.
 
-		By "naive", it is meant that no result caching takes place
-		so some triples (e.g. {x, y, z} and {y, x, z}) are effectively
-		duplicated.
-
-		Worst-case time to finish: (n-2)(n-1)n = O(n^3)
+		Worst-case time to finish: (n-2)(n-1)n/6 = O(n^3)
 		"""
 
-		for x in self.vertices():
-			for y in self.vertices():
-				if x == y:
-					continue
-				for z in self.vertices():
-					if x == z or y == z:
-						continue
-
-					# Established: x != y, y != z, x != z
-
-					if self.adjacency(x, y, oc) and self.adjacency(x, z, oc) and self.adjacency(y, z, oc):
-						yield set((x, y, z))
+		return self.ordered_cliques(3, oc)
 	
 	def all_quadruples(self, oc: OperationCounter=0) -> Iterable[set[Any, Any, Any, Any]]:
 		"""
-		Naively iterate through all the quadruples in the graph. This
-		is naive in the same way the previous method is.
-
-		Worst-case time to finish: (n-3)(n-2)(n-1)n = O(n^4)
-		"""
-
-		for w in self.vertices():
-			for x in self.vertices():
-				if w == x:
-					continue
-				for y in self.vertices():
-					if w == y or x == y:
-						continue
-					for z in self.vertices():
-						if w == z or x == z or y == z:
-							continue
-						
-						# Established: w, x, y, z are different
-
-						if self.adjacency(w, x, oc) \
-								and self.adjacency(w, y, oc) \
-								and self.adjacency(w, z, oc) \
-								and self.adjacency(x, y, oc) \
-								and self.adjacency(x, z, oc) \
-								and self.adjacency(y, z, oc):
-							yield set((w, x, y, z))
+		Iterate through all the quadruples in the graph.
+
+		Worst-case time to finish: (n-3)(n-2)(n-1)n/24 = O(n^4)
+		"""
+
+		return self.ordered_cliques(4, oc)
 
 	def all_quintuples(self, oc: OperationCounter=0) -> Iterable[set[Any, Any, Any, Any, Any]]:
 		"""
@@ -269,37 +362,9 @@ class Graph:
 		.link method always has base cases for n.
 		"""
 
-		for v in self.vertices():
-			for w in self.vertices():
-				if v == w:
-					continue
-
-				for x in self.vertices():
-					if x == v or x == w:
-						continue
-
-					for y in self.vertices():
-						if y == x or y == w or y == v:
-							continue
+		return self.ordered_cliques(5, oc)
 
-						for z in self.vertices():
-							if z == v or z == w or z == x or z == y:
-								continue
-
-							if self.adjacency(v, w, oc) \
-									and self.adjacency(v, x, oc) \
-									and self.adjacency(v, y, oc) \
-									and self.adjacency(v, z, oc) \
-									and self.adjacency(w, x, oc) \
-									and self.adjacency(w, y, oc) \
-									and self.adjacency(w, z, oc) \
-									and self.adjacency(x, y, oc) \
-									and self.adjacency(x, z, oc) \
-									and self.adjacency(y, z, oc):
-								yield set((w, x, y, z))
-							
-
-	def link(self, clique: set, with_type: str, oc: OperationCounter) -> Iterable[set]:
+	def link(self, clique: set, with_type: str, oc: OperationCounter, ordered: bool=False) -> Iterable[set]:
 		"""
 		Link a clique with all other possible cliques of a low size.
 		This entails going through all cliques of that other size and
@@ -317,10 +382,12 @@ class Graph:
 		the same time it would take to come up with all of those smaller
 		cliques.
 
-		This function is however naive in that it certainly repeats some
-		cliques, because the functions that pull up the doubles/triples/
-		quadruples are also naive in the same way. That turns out not to
-		be important in the end, though.
+		By default this is naive in that the same larger clique comes
+		out of linking each of its sub-cliques. With ordered=True, only
+		other cliques lying entirely after the given one (in vertex
+		order) are linked, and they are only looked for among the
+		common successors of the clique's vertices, so each larger
+		clique is built from exactly one split.
 
 		clique: a size n clique, as a set.
 		with_type: one of the constants at the top of the file, referring
@@ -328,14 +395,20 @@ class Graph:
 		returns: an iterable of all the size n+k cliques!
 		"""
 
-		iterator: Iterable = None
-		
-		if with_type == DOUBLES:
-			f = self.all_doubles(oc)
-		elif with_type == TRIPLES:
-			f = self.all_triples(oc)
-		elif with_type == QUADRUPLES:
-			f = self.all_quadruples(oc)
+		k = {DOUBLES: 2, TRIPLES: 3, QUADRUPLES: 4}[with_type]
+
+		if ordered:
+			common = None
+			for x in clique:
+				oc += len(self.adjacent[x]) if common is None else len(common)
+				common = set(self.adjacent[x]) if common is None else common & self.adjacent[x]
+			last = max(self.index[x] for x in clique)
+			common = {x for x in common if self.index[x] > last}
+			for other_clique in self.ordered_cliques(k, oc, [], common):
+				yield clique.union(other_clique) # A size n+k clique.
+			return
+
+		f = self.ordered_cliques(k, oc)
 
 		flag: bool = None
 
@@ -382,6 +455,9 @@ class Graph:
 		If this is to be believed, then all other NP-complete problems can be solve in at best
 		O(n^5) with this algorithm. This is terrifyingly fast for an algorithm that solves NP-complete
 		problems, but it is by no means fast compared to something like list sort.
+
+		All links are ordered (see .link), so each size-n clique is
+		yielded exactly once.
 		"""
 
 		escape: bool = None
@@ -400,11 +476,623 @@ class Graph:
 				yield quintuple
 		elif n > 5:
 			for clique in self.cliques_of_size(n - 3, oc):
-				for new_clique in link(clique, TRIPLES):
+				for new_clique in self.link(clique, TRIPLES, oc, ordered=True):
 					yield new_clique
 		else:
 			raise ValueError(f"Invalid input for clique size: {n}. Must be an int >= 2.")
 
+def bits(b: int) -> Iterable[int]:
+	"""
+	The positions of the set bits of an int, lowest first.
+	"""
+
+	while b:
+		low = b & -b
+		yield low.bit_length() - 1
+		b ^= low
+
+class BronKerbosch:
+
+	"""
+	Clique search by Bron-Kerbosch, for comparison with the alpha/beta
+	linking of Graph.cliques_of_size on the same graphs.
+
+	Vertices are renumbered by a degeneracy ordering and every vertex
+	set is an int bitset over those positions, so intersecting a
+	candidate set with a neighborhood is a single & and its size a
+	single popcount. The outer loop takes each vertex with its later
+	neighbors as candidates (at most degeneracy-many of them), and
+	the recursion picks pivots the Tomita way: the vertex of P | X
+	with the most neighbors in P, whose neighbors then need not be
+	branched on.
+
+	Every recursive call and every bitset intersection counts as one
+	operation on the OperationCounter (an intersection stands in for
+	the adjacency checks it replaces).
+	"""
+
+	def __init__(self, graph: Graph) -> None:
+		self.graph = graph
+		self.order, self.degeneracy = graph.degeneracy_ordering()
+		position = {x: i for i, x in enumerate(self.order)}
+		self.neighbors = [sum(1 << position[y] for y in graph.adjacent[x]) for x in self.order]
+
+	def _names(self, clique: list[int]) -> set:
+		return set(self.order[i] for i in clique)
+
+	def _later(self, i: int) -> int:
+		return self.neighbors[i] >> (i + 1) << (i + 1)
+
+	def maximal_cliques(self, oc: OperationCounter=0) -> Iterable[set]:
+		"""
+		Iterate through every maximal clique exactly once.
+		"""
+
+		for i in range(len(self.order)):
+			later = self._later(i)
+			for clique in self._tomita([i], later, self.neighbors[i] & ~later, oc):
+				yield self._names(clique)
+
+	def _tomita(self, R: list[int], P: int, X: int, oc: OperationCounter) -> Iterable[list[int]]:
+		~oc
+		if not P and not X:
+			yield R
+			return
+
+		pivot, most = None, -1
+		for u in bits(P | X):
+			~oc
+			count = (P & self.neighbors[u]).bit_count()
+			if count > most:
+				pivot, most = u, count
+
+		for v in bits(P & ~self.neighbors[pivot]):
+			oc += 2
+			for clique in self._tomita(R + [v], P & self.neighbors[v], X & self.neighbors[v], oc):
+				yield clique
+			P &= ~(1 << v)
+			X |= 1 << v
+
+	def maximum_clique(self, oc: OperationCounter=0) -> set:
+		"""
+		A largest clique, by branch and bound on the same recursion:
+		a branch is dropped as soon as the clique so far plus all its
+		candidates cannot beat the best found.
+		"""
+
+		best = []
+
+		def search(R: list[int], P: int) -> None:
+			nonlocal best
+			~oc
+			if not P:
+				if len(R) > len(best):
+					best = R
+				return
+			for v in bits(P):
+				if len(R) + P.bit_count() <= len(best):
+					return
+				~oc
+				search(R + [v], P & self.neighbors[v])
+				P &= ~(1 << v)
+
+		for i in range(len(self.order)):
+			if len(best) > self.degeneracy:
+				break # no clique is larger than the degeneracy + 1
+			search([i], self._later(i))
+		return self._names(best)
+
+	def cliques_of_size(self, k: int, oc: OperationCounter=0) -> Iterable[set]:
+		"""
+		Iterate through every k-clique (maximal or not) exactly once,
+		growing cliques in increasing position and pruning candidate
+		sets too small to finish one.
+		"""
+
+		if k < 1:
+			raise ValueError(f"Invalid input for clique size: {k}. Must be an int >= 1.")
+		if k > self.degeneracy + 1:
+			return
+		for i in range(len(self.order)):
+			for clique in self.extend([i], self._later(i), k, oc):
+				yield self._names(clique)
+
+	def extend(self, R: list[int], P: int, k: int, oc: OperationCounter=0) -> Iterable[list[int]]:
+		"""
+		The k-cliques (as lists of positions) that extend the clique R
+		by vertices of P, all of which must come after R and be
+		adjacent to all of it.
+		"""
+
+		~oc
+		if len(R) == k:
+			yield R
+			return
+		for v in bits(P):
+			~oc
+			Q = P & self._later(v)
+			if Q.bit_count() >= k - len(R) - 1:
+				for clique in self.extend(R + [v], Q, k, oc):
+					yield clique
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(words: np.ndarray) -> np.ndarray:
+	"""
+	The number of set bits in each row of an array of uint64 words.
+	"""
+
+	if hasattr(np, "bitwise_count"):
+		return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+	return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+class CliqueCounter:
+
+	"""
+	Counts k-cliques without listing them.
+
+	As in BronKerbosch, vertices are renumbered by a degeneracy
+	ordering and each one keeps the bitset of its later neighbors, so
+	every k-clique is counted once, from its first vertex. Cliques are
+	grown one vertex at a time by intersecting bitsets, and the last
+	vertex is never branched on: the number of ways to finish a clique
+	is the popcount of its candidate set.
+
+	Bitsets are Python ints by default. With words="numpy" they are
+	rows of uint64 words instead, and whole batches of partial cliques
+	are extended together: every candidate of every one of them is
+	intersected and popcounted in one vectorized step per level.
+
+	count(k, processes=p) splits the work by first vertex across a
+	process pool, handing out the heaviest roots first.
+	"""
+
+	def __init__(self, graph: Graph, words: str="int") -> None:
+		if words not in ("int", "numpy"):
+			raise ValueError(f"Unknown bitset representation: {words}. Must be \"int\" or \"numpy\".")
+		self.graph = graph
+		self.words = words
+		self.order, self.degeneracy = graph.degeneracy_ordering()
+		position = {x: i for i, x in enumerate(self.order)}
+		n = len(self.order)
+		self.later = [sum(1 << position[y] for y in graph.adjacent[x] if position[y] > i) for i, x in enumerate(self.order)]
+		self.matrix = None
+		if words == "numpy":
+			width = (n + 63) // 64
+			self.matrix = np.zeros((n, width), dtype=np.uint64)
+			for i, b in enumerate(self.later):
+				self.matrix[i] = np.frombuffer(b.to_bytes(8 * width, "little"), dtype="<u8")
+
+	def _count(self, P: int, r: int, oc: OperationCounter) -> int:
+		~oc
+		if r == 1:
+			return P.bit_count()
+		later = self.later
+		if r == 2:
+			oc += P.bit_count()
+			return sum((P & later[v]).bit_count() for v in bits(P))
+		total = 0
+		for v in bits(P):
+			~oc
+			Q = P & later[v]
+			if Q.bit_count() >= r - 1:
+				total += self._count(Q, r - 1, oc)
+		return total
+
+	def _count_words(self, P: np.ndarray, r: int, oc: OperationCounter, block: int=1 << 16) -> int:
+		"""
+		The same count for a whole batch of candidate sets (rows of P)
+		at once: every (set, member) pair is expanded together, in
+		blocks of about block pairs to bound memory.
+		"""
+
+		~oc
+		if r == 1:
+			return int(popcount(P).sum())
+		n = len(self.order)
+		total = 0
+		step = max(1, block // max(1, n // 4))
+		for start in range(0, len(P), step):
+			chunk = P[start:start + step]
+			rows, members = np.nonzero(np.unpackbits(chunk.view(np.uint8), axis=1, bitorder="little")[:, :n])
+			oc += len(members)
+			Q = chunk[rows] & self.matrix[members]
+			sizes = popcount(Q)
+			if r == 2:
+				total += int(sizes.sum())
+			else:
+				total += self._count_words(Q[sizes >= r - 1], r - 1, oc, block)
+		return total
+
+	def count_from(self, root: int, k: int, oc: OperationCounter=0) -> int:
+		"""
+		The number of k-cliques whose first vertex (in the degeneracy
+		ordering) is the one at position root.
+		"""
+
+		if k == 1:
+			return 1
+		if self.words == "numpy":
+			return self._count_words(self.matrix[root:root + 1], k - 1, oc)
+		return self._count(self.later[root], k - 1, oc)
+
+	def count(self, k: int, oc: OperationCounter=0, processes: int=None) -> int:
+		if k < 1:
+			raise ValueError(f"Invalid input for clique size: {k}. Must be an int >= 1.")
+		if k > self.degeneracy + 1:
+			return 0
+
+		roots = [i for i in range(len(self.order)) if self.later[i].bit_count() >= k - 1]
+		if processes is None or processes <= 1:
+			if self.words == "numpy" and k > 1:
+				return self._count_words(self.matrix[roots], k - 1, oc)
+			return sum(self.count_from(i, k, oc) for i in roots)
+
+		roots.sort(key=lambda i: -self.later[i].bit_count())
+		total = 0
+		with Pool(processes, initializer=_initialize_counter, initargs=(self,)) as pool:
+			for found, operations in pool.imap_unordered(_count_root, [(i, k) for i in roots], chunksize=max(1, len(roots) // (8 * processes))):
+				total += found
+				oc += operations
+		return total
+
+_counter = None
+
+def _initialize_counter(counter: CliqueCounter) -> None:
+	global _counter
+	_counter = counter
+
+def _count_root(job: tuple[int, int]) -> tuple[int, int]:
+	root, k = job
+	oc = OperationCounter()
+	return _counter.count_from(root, k, oc), oc.operations
+
+class CliqueIndex:
+
+	"""
+	Clique search that builds the small cliques once and reuses them.
+
+	Graph.link goes back to all_doubles/all_triples/all_quadruples
+	for every clique it extends. Here the 2-, 3- and 4-cliques are
+	materialized once (each size on first use) into compact tables:
+	vertices are renumbered by a degeneracy ordering as in
+	BronKerbosch, and the s-cliques of the graph are stored as an
+	(m, s) int32 array of positions, sorted, with start[u]:start[u + 1]
+	the rows of those starting at position u. Each table is built from
+	the one below it.
+
+	A k-clique is then assembled as a chain of small cliques, each
+	lying entirely after the one before (see .plan), so it is found
+	exactly once, from one split. Partial cliques are extended a block
+	at a time, as in CliqueCounter with words="numpy": for each one
+	only the table rows starting at its common later neighbors are
+	gathered, and they are all checked against those neighbors in one
+	vectorized step. Blocks are extended depth first, so at most a few
+	blocks are held at once and cliques stream out as they are found.
+
+	budget caps the bytes of tables held in memory: a table that does
+	not fit is written to a file in directory (a temporary directory
+	by default) as it is built and read back memory mapped. close()
+	(or leaving a with block) removes the spilled files.
+
+	Every adjacency check against a table row and every intersection
+	with a neighborhood counts as one operation, including those made
+	while building the tables.
+	"""
+
+	def __init__(self, graph: Graph, budget: int=None, directory: str=None, block: int=1 << 16) -> None:
+		self.graph = graph
+		self.budget = budget
+		self.directory = directory
+		self.block = block
+		self.order, self.degeneracy = graph.degeneracy_ordering()
+		position = {x: i for i, x in enumerate(self.order)}
+		n = len(self.order)
+		self.matrix = np.zeros((n, n), dtype=bool)
+		for i, x in enumerate(self.order):
+			self.matrix[i, [position[y] for y in graph.adjacent[x]]] = True
+		self.tables = {}
+		self.spilled = {}
+		self.resident = 0
+		self._temporary = None
+
+	def __enter__(self) -> "CliqueIndex":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def _names(self, clique: list[int]) -> set:
+		return set(self.order[i] for i in clique)
+
+	def _candidates(self, C: np.ndarray, oc: OperationCounter) -> np.ndarray:
+		"""
+		The common later neighbors of each row of C, as the rows of a
+		boolean matrix.
+		"""
+
+		oc += C.size
+		M = np.arange(len(self.order)) > C[:, -1:]
+		for j in range(C.shape[1]):
+			M &= self.matrix[C[:, j]]
+		return M
+
+	def _spill_path(self, s: int) -> str:
+		if self.directory is None:
+			self._temporary = self._temporary or tempfile.mkdtemp(prefix="pnp-cliques-")
+			return os.path.join(self._temporary, f"cliques_{s}.bin")
+		os.makedirs(self.directory, exist_ok=True)
+		return os.path.join(self.directory, f"cliques_{id(self):x}_{s}.bin")
+
+	def table(self, s: int, oc: OperationCounter=0) -> tuple[np.ndarray, np.ndarray]:
+		"""
+		The (cliques, start) table of the s-cliques, built on first use.
+		"""
+
+		if s in self.tables:
+			return self.tables[s]
+
+		n = len(self.order)
+		below = np.arange(n, dtype=np.int32)[:, None] if s == 2 else self.table(s - 1, oc)[0]
+		step = max(1, self.block // max(n, 1))
+		chunks, buffered, rows = [], 0, 0
+		counts = np.zeros(n, dtype=np.int64)
+		spill = None
+		for i in range(0, len(below), step):
+			C = np.asarray(below[i:i + step])
+			r, v = np.nonzero(self._candidates(C, oc))
+			chunk = np.column_stack([C[r], v]).astype(np.int32)
+			chunks.append(chunk)
+			buffered += chunk.nbytes
+			rows += len(chunk)
+			counts += np.bincount(chunk[:, 0], minlength=n)
+			if self.budget is not None and self.resident + buffered > self.budget:
+				if spill is None:
+					path = self._spill_path(s)
+					spill = open(path, "wb")
+				for chunk in chunks:
+					chunk.tofile(spill)
+				chunks, buffered = [], 0
+
+		if spill is not None:
+			for chunk in chunks:
+				chunk.tofile(spill)
+			spill.close()
+			self.spilled[s] = path
+			cliques = np.memmap(path, dtype=np.int32, mode="r", shape=(rows, s)) if rows else np.zeros((0, s), dtype=np.int32)
+		else:
+			cliques = np.concatenate(chunks) if chunks else np.zeros((0, s), dtype=np.int32)
+			self.resident += cliques.nbytes
+		self.tables[s] = (cliques, np.concatenate([[0], np.cumsum(counts)]))
+		return self.tables[s]
+
+	def memory(self) -> dict[int, tuple[int, bool]]:
+		"""
+		The bytes taken by each table built so far, and whether it was
+		spilled to disk.
+		"""
+
+		return {s: (cliques.nbytes + start.nbytes, s in self.spilled) for s, (cliques, start) in self.tables.items()}
+
+	def close(self) -> None:
+		self.tables = {}
+		for path in self.spilled.values():
+			if os.path.exists(path):
+				os.remove(path)
+		if self._temporary is not None:
+			shutil.rmtree(self._temporary, ignore_errors=True)
+			self._temporary = None
+		self.spilled = {}
+		self.resident = 0
+
+	@staticmethod
+	def plan(k: int) -> list[int]:
+		"""
+		The sizes of the small cliques a k-clique is assembled from:
+		triangles, then a 2-clique or two for what is left over (a 2-,
+		3- or 4-clique is looked up whole).
+		"""
+
+		if k <= 4:
+			return [k]
+		return [3] * (k // 3 - (k % 3 == 1)) + [2] * {0: 0, 1: 2, 2: 1}[k % 3]
+
+	def _extend(self, C: np.ndarray, M: np.ndarray, plan: list[int], oc: OperationCounter) -> Iterable[np.ndarray]:
+		"""
+		Extend the partial cliques C (rows), whose common later
+		neighbors are the rows of M, by the small cliques in plan,
+		yielding blocks of finished cliques.
+		"""
+
+		keep = M.sum(axis=1) >= sum(plan)
+		C, M = C[keep], M[keep]
+		cliques, start = self.table(plan[0], oc)
+		step = max(1, self.block // max(len(self.order), 1))
+
+		# Every (partial clique, candidate first vertex) pair, cut into
+		# runs that gather about self.block table rows at a time
+		pairs, roots = np.nonzero(M)
+		lengths = start[roots + 1] - start[roots]
+		ends = np.cumsum(lengths)
+		a = 0
+		while a < len(pairs):
+			b = max(a + 1, int(np.searchsorted(ends, (ends[a - 1] if a else 0) + self.block, side="right")))
+			L = lengths[a:b]
+			p = np.repeat(pairs[a:b], L)
+			rows = np.asarray(cliques[np.repeat(start[roots[a:b]] - np.cumsum(L) + L, L) + np.arange(L.sum())])
+			oc += rows.size - len(rows)
+			found = M[p[:, None], rows[:, 1:]].all(axis=1)
+			p, rows = p[found], rows[found]
+			if len(plan) == 1:
+				yield np.concatenate([C[p], rows], axis=1)
+			else:
+				for i in range(0, len(rows), step):
+					q = p[i:i + step]
+					for done in self._extend(np.concatenate([C[q], rows[i:i + step]], axis=1), M[q] & self._candidates(rows[i:i + step], oc), plan[1:], oc):
+						yield done
+			a = b
+
+	def cliques_of_size(self, k: int, oc: OperationCounter=0, limit: int=None, first_only: bool=False) -> Iterable[set]:
+		"""
+		Iterate through the k-cliques, each exactly once, stopping
+		after limit of them (or the first, with first_only). The
+		search goes no further than the block the last clique yielded
+		came from.
+		"""
+
+		if k < 2:
+			raise ValueError(f"Invalid input for clique size: {k}. Must be an int >= 2.")
+		if first_only:
+			limit = 1
+		if k > self.degeneracy + 1 or limit == 0:
+			return
+		n = len(self.order)
+		found = 0
+		for block in self._extend(np.zeros((1, 0), dtype=np.int32), np.ones((1, n), dtype=bool), self.plan(k), oc):
+			for clique in block.tolist():
+				yield self._names(clique)
+				found += 1
+				if limit is not None and found >= limit:
+					return
+
+class ParallelCliques:
+
+	"""
+	k-clique enumeration split across a process pool by root vertex.
+
+	Under the degeneracy ordering of BronKerbosch every k-clique has
+	exactly one first vertex, and the cliques starting at a vertex
+	only involve its later neighbors, so each root is an independent
+	job. Jobs are handed out one at a time (imap_unordered with a
+	chunksize of 1), heaviest first by the number of ways to pick the
+	rest of a clique from the candidates, so idle workers keep taking
+	work and the small jobs even out the end. A root whose share of
+	that estimate is more than 1 / (split * processes) of the total
+	is itself split into one job per second vertex, so a few hubs in
+	a skewed degree distribution cannot leave one worker running
+	alone.
+
+	Operations are counted exactly as in BronKerbosch.cliques_of_size
+	(the ones spent splitting roots are counted here), so the totals
+	match a serial run. After a run, workers maps each worker's
+	process id to the jobs, cliques, operations and busy seconds it
+	accounted for.
+	"""
+
+	def __init__(self, graph: Graph, processes: int=None, split: int=4) -> None:
+		self.search = BronKerbosch(graph)
+		self.processes = processes if processes is not None else os.cpu_count()
+		self.split = split
+		self.workers = {}
+
+	def jobs(self, k: int, oc: OperationCounter=0) -> list[tuple[list[int], int]]:
+		"""
+		(clique prefix, candidates) pairs covering every k-clique
+		once, heaviest first.
+		"""
+
+		search = self.search
+		roots = []
+		for i in range(len(search.order)):
+			P = search._later(i)
+			if P.bit_count() >= k - 1:
+				roots.append(([i], P))
+			else:
+				oc += 1 + P.bit_count() # what extend spends finding nothing
+		weight = lambda job: comb(job[1].bit_count(), k - len(job[0]))
+		total = sum(map(weight, roots))
+		jobs = []
+		for R, P in roots:
+			if k > 2 and self.processes > 1 and weight((R, P)) * self.split * self.processes > total:
+				~oc # the steps extend would have taken for this root
+				for v in bits(P):
+					~oc
+					Q = P & search._later(v)
+					if Q.bit_count() >= k - 2:
+						jobs.append((R + [v], Q))
+			else:
+				jobs.append((R, P))
+		jobs.sort(key=weight, reverse=True)
+		return jobs
+
+	def _run(self, k: int, oc: OperationCounter, count: bool) -> Iterable[tuple[int, Any]]:
+		jobs = self.jobs(k, oc)
+		self.workers = {}
+		if self.processes <= 1:
+			# In this process, in the same order and counting as BronKerbosch
+			for R, P in sorted(jobs):
+				found = self.search.extend(R, P, k, oc)
+				if count:
+					yield sum(1 for _ in found)
+				else:
+					for clique in found:
+						yield clique
+			return
+
+		with Pool(self.processes, initializer=_initialize_search, initargs=(self.search,)) as pool:
+			for pid, found, operations, seconds in pool.imap_unordered(_search_prefix, [(R, P, k, count) for R, P in jobs], chunksize=1):
+				oc += operations
+				worker = self.workers.setdefault(pid, {"jobs": 0, "cliques": 0, "operations": 0, "seconds": 0.0})
+				worker["jobs"] += 1
+				worker["cliques"] += found if count else len(found)
+				worker["operations"] += operations
+				worker["seconds"] += seconds
+				if count:
+					yield found
+				else:
+					for clique in found:
+						yield clique
+
+	def cliques_of_size(self, k: int, oc: OperationCounter=0, limit: int=None) -> Iterable[set]:
+		"""
+		Iterate through every k-clique exactly once, in the order the
+		jobs finish. With a limit, the pool is shut down as soon as
+		that many have been found.
+		"""
+
+		if k < 1:
+			raise ValueError(f"Invalid input for clique size: {k}. Must be an int >= 1.")
+		if k > self.search.degeneracy + 1 or limit == 0:
+			return
+		if k == 1:
+			for x in self.search.order[:limit]:
+				yield {x}
+			return
+		found = 0
+		for clique in self._run(k, oc, False):
+			yield self.search._names(clique)
+			found += 1
+			if limit is not None and found >= limit:
+				return
+
+	def count(self, k: int, oc: OperationCounter=0) -> int:
+		"""
+		The number of k-cliques, without sending them back from the
+		workers.
+		"""
+
+		if k < 1:
+			raise ValueError(f"Invalid input for clique size: {k}. Must be an int >= 1.")
+		if k > self.search.degeneracy + 1:
+			return 0
+		if k == 1:
+			return len(self.search.order)
+		return sum(self._run(k, oc, True))
+
+_search = None
+
+def _initialize_search(search: BronKerbosch) -> None:
+	global _search
+	_search = search
+
+def _search_prefix(job: tuple[list[int], int, int, bool]) -> tuple[int, Any, int, float]:
+	R, P, k, count = job
+	oc = OperationCounter()
+	start = time.perf_counter()
+	found = _search.extend(R, P, k, oc)
+	found = sum(1 for _ in found) if count else list(found)
+	return os.getpid(), found, oc.operations, time.perf_counter() - start
+
 def generate_graph_with_cliques(num_vertices):
     vertices = [chr(65 + i) for i in range(num_vertices)]  # 'A', 'B', ..., up to needed count
 
@@ -433,6 +1121,45 @@ def generate_graph_with_cliques(num_vertices):
     return list(edges)
 
 
+"""
+# ===== GRAPH FAMILIES ===== #
+
+Seeded generators for experiments. Each takes its own random.Random
+(or a seed) instead of seeding the global generator, so graphs can be
+generated independently and in parallel. Vertices are 0..n-1.
+"""
+
+def _rng(seed) -> random.Random:
+	return seed if isinstance(seed, random.Random) else random.Random(seed)
+
+def erdos_renyi(n: int, p: float, seed=None) -> list[tuple[int, int]]:
+	"""
+	G(n, p): every pair of vertices is an edge with probability p.
+	"""
+
+	rng = _rng(seed)
+	return [(x, y) for x, y in combinations(range(n), 2) if rng.random() < p]
+
+def planted_clique(n: int, p: float, k: int, seed=None) -> list[tuple[int, int]]:
+	"""
+	G(n, p) with a clique on k random vertices added.
+	"""
+
+	rng = _rng(seed)
+	edges = set(erdos_renyi(n, p, rng))
+	for x, y in combinations(sorted(rng.sample(range(n), k)), 2):
+		edges.add((x, y))
+	return sorted(edges)
+
+def moon_moser(n: int) -> list[tuple[int, int]]:
+	"""
+	The complement of n/3 disjoint triangles: the graph with the most
+	maximal cliques (3^(n/3)) for its size, the worst case for listing
+	them.
+	"""
+
+	return [(x, y) for x, y in combinations(range(n - n % 3), 2) if x // 3 != y // 3]
+
 if __name__ == "__main__":
 	# Generate 20 graphs for sizes from 6 to 26
 	print("Generating graphs >-<")
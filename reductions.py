@@ -0,0 +1,429 @@
+"""
+Reductions between 3-SAT, clique and independent set.
+
+The docstrings in pnp argue that a fast clique search solves every
+NP-complete problem, since every one of them reduces to clique. This
+makes that concrete for 3-SAT and measures what it costs. The
+reductions are Karp's:
+
+	* 3-SAT to clique: a vertex for every literal occurrence (3i + p
+	  for the p-th literal of clause i), joined to every occurrence in
+	  another clause that does not contradict it. The formula is
+	  satisfiable exactly when there is a clique with one vertex per
+	  clause (k = number of clauses), and the literals of that clique
+	  can all be made true.
+	* 3-SAT to independent set: the same vertices, joined within each
+	  clause and to every contradicting occurrence; again k = number of
+	  clauses.
+	* Independent set to clique and back: the complement graph, same k.
+	* Clique to 3-SAT: sat.clique_to_sat, whose clauses of n literals
+	  ("position i holds some vertex") are then split into chains of
+	  3-literal clauses over fresh variables by to_3sat; a model goes
+	  back to a clique through model_to_clique.
+
+Instances are kept as arrays: a graph problem is (n, edges, k) with
+vertices 0..n-1 and edges an (m, 2) int32 array (n is needed since
+independent sets may use isolated vertices), and a formula is a
+sat.Satisfiability. The edge sets are built by broadcasting over
+occurrence pairs, not by looping over them.
+
+The harness runs families of 3-SAT instances directly through the
+CDCL solver, through each reduction into the pnp clique searches and
+(route clique-sat) round trip through clique back to 3-SAT,
+recording the sizes of the reduced instances, the time spent reducing
+and solving, and how many times slower each route is than solving
+the formula directly. For example,
+
+	python reductions.py --variables 8 12 16 20 --ratio 4.26 --instances 5 --timeout 60 -o results/reductions
+
+Besides the random and planted families, --dimacs runs the DIMACS
+files given (or found in the directories given), such as the SATLIB
+uf*/uuf* sets, smallest first:
+
+	python reductions.py --dimacs satlib/uf20-91 satlib/uuf50-218 --timeout 60 -o results/satlib
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+import numpy as np
+from typing import Iterable
+import pnp
+import sat
+import corpus
+import benchmark
+
+# ===== ENCODINGS ===== #
+
+def _formula(formula) -> sat.Satisfiability:
+	if isinstance(formula, sat.Satisfiability):
+		return formula
+	return sat.Satisfiability.from_clauses(formula)
+
+def _occurrences(formula: sat.Satisfiability) -> tuple[np.ndarray, np.ndarray]:
+	"""
+	The literal and the clause of every literal occurrence, as arrays.
+	"""
+
+	clause = np.repeat(np.arange(len(formula)), np.diff(formula.starts))
+	return formula.literals, clause
+
+def sat3_to_clique(formula) -> tuple[int, np.ndarray, int]:
+	"""
+	3-SAT (a Satisfiability, or a list of Clause3) to clique. Clauses
+	of any width work the same way.
+	"""
+
+	formula = _formula(formula)
+	literal, clause = _occurrences(formula)
+	compatible = (clause[:, None] < clause[None, :]) & (literal[:, None] != -literal[None, :])
+	return len(literal), np.argwhere(compatible).astype(np.int32), len(formula)
+
+def sat3_to_independent_set(formula) -> tuple[int, np.ndarray, int]:
+	formula = _formula(formula)
+	literal, clause = _occurrences(formula)
+	conflicting = (clause[:, None] == clause[None, :]) | (literal[:, None] == -literal[None, :])
+	return len(literal), np.argwhere(np.triu(conflicting, 1)).astype(np.int32), len(formula)
+
+def complement(n: int, edges: np.ndarray) -> np.ndarray:
+	adjacent = np.zeros((n, n), dtype=bool)
+	adjacent[edges[:, 0], edges[:, 1]] = True
+	adjacent |= adjacent.T
+	return np.argwhere(np.triu(~adjacent, 1)).astype(np.int32)
+
+def independent_set_to_clique(n: int, edges: np.ndarray, k: int) -> tuple[int, np.ndarray, int]:
+	return n, complement(n, edges), k
+
+def clique_to_independent_set(n: int, edges: np.ndarray, k: int) -> tuple[int, np.ndarray, int]:
+	return n, complement(n, edges), k
+
+def to_3sat(formula) -> sat.Satisfiability:
+	"""
+	An equisatisfiable formula with at most three literals per clause.
+	Every longer clause l1 | l2 | ... | lm becomes the chain
+
+		(l1 | l2 | y1) (-y1 | l3 | y2) ... (-y(m-3) | l(m-1) | lm)
+
+	over fresh variables y, numbered after the formula's own, so the
+	first formula.variables literals of a model are a model of formula.
+	"""
+
+	formula = _formula(formula)
+	widths = np.diff(formula.starts)
+	short = widths <= 3
+	if np.all(short):
+		return formula
+	literals = [formula.literals[np.repeat(short, widths)]]
+	lengths = [widths[short]]
+	fresh = formula.variables
+	for i in np.flatnonzero(~short):
+		clause = formula.literals[formula.starts[i]:formula.starts[i + 1]]
+		y = np.arange(fresh + 1, fresh + len(clause) - 2, dtype=np.int32)
+		fresh += len(y)
+		chain = np.column_stack([np.concatenate([clause[:1], -y]), clause[1:-1], np.concatenate([y, clause[-1:]])])
+		literals.append(chain.ravel())
+		lengths.append(np.full(len(chain), 3))
+	starts = np.concatenate([[0], np.cumsum(np.concatenate(lengths))])
+	return sat.Satisfiability(fresh, np.concatenate(literals), starts)
+
+def _graph(n: int, edges: np.ndarray) -> pnp.Graph:
+	# Self-loops put every vertex in the graph, isolated ones included,
+	# with vertex v at index v.
+	return pnp.Graph([(v, v) for v in range(n)] + list(map(tuple, np.asarray(edges).tolist())))
+
+def clique_to_sat(n: int, edges: np.ndarray, k: int) -> sat.Satisfiability:
+	"""
+	Clique to 3-SAT, through sat.clique_to_sat on vertices 0..n-1 and
+	to_3sat: variable i * n + v + 1 says that vertex v holds position
+	i of the clique, and the chain variables come after all k * n of
+	them.
+	"""
+
+	return to_3sat(sat.clique_to_sat(_graph(n, edges), k))
+
+def model_to_clique(n: int, edges: np.ndarray, k: int, model: list[int]) -> set:
+	"""
+	The k-clique a model of clique_to_sat(n, edges, k) describes (None
+	for no model).
+	"""
+
+	if model is None:
+		return None
+	return sat.sat_to_clique(_graph(n, edges), k, model[:k * n])
+
+def is_clique(n: int, edges: np.ndarray, k: int, vertices: Iterable[int]) -> bool:
+	vertices = np.fromiter(set(vertices), dtype=np.int64)
+	if len(vertices) != k or np.any((vertices < 0) | (vertices >= n)):
+		return False
+	adjacent = np.zeros((n, n), dtype=bool)
+	adjacent[edges[:, 0], edges[:, 1]] = True
+	adjacent |= adjacent.T
+	np.fill_diagonal(adjacent, True)
+	return bool(np.all(adjacent[np.ix_(vertices, vertices)]))
+
+def occurrences_to_model(formula, vertices: Iterable[int]) -> list[int]:
+	"""
+	The model a clique (or independent set) of the reduced graph
+	describes: the literals of its occurrences true, every other
+	variable false.
+	"""
+
+	formula = _formula(formula)
+	value = np.zeros(formula.variables + 1, dtype=bool)
+	chosen = formula.literals[np.fromiter(vertices, dtype=np.int64)]
+	value[chosen[chosen > 0]] = True
+	return [v if value[v] else -v for v in range(1, formula.variables + 1)]
+
+# ===== SOLVING ===== #
+
+def _first(cliques: Iterable[set]) -> set:
+	return next(iter(cliques), None)
+
+# Each takes (graph, k, oc) and returns some k-clique, or None.
+CLIQUE_SOLVERS = {
+	"bron-kerbosch": lambda g, k, oc: _first(pnp.BronKerbosch(g).cliques_of_size(k, oc)),
+	"ordered": lambda g, k, oc: _first(g.ordered_cliques(k, oc)),
+	"indexed": lambda g, k, oc: _first(pnp.CliqueIndex(g).cliques_of_size(k, oc, first_only=True)),
+	"link": lambda g, k, oc: _first(g.cliques_of_size(k, oc))
+}
+
+def clique(n: int, edges: np.ndarray, k: int, solver: str="bron-kerbosch", oc: pnp.OperationCounter=0) -> set:
+	if k == 1:
+		return {0} if n > 0 else None
+	if k == 0:
+		return set()
+	return CLIQUE_SOLVERS[solver](corpus.graph(edges), k, oc)
+
+def solve(formula, route: str="clique", solver: str="bron-kerbosch", oc: pnp.OperationCounter=0) -> tuple[list[int], dict]:
+	"""
+	Solve a formula directly (route "direct") or by reducing it to a
+	clique ("clique") or independent set ("independent-set", solved as
+	a clique in the complement) problem, or to a clique problem that
+	is reduced back to 3-SAT and solved directly ("clique-sat"). Returns
+	the model (or None) and the sizes and timings along the way,
+	including whether the clique found is a k-clique of the reduced
+	graph.
+	"""
+
+	formula = _formula(formula)
+	info = {"vertices": None, "edges": None, "k": None, "clique_verified": None}
+	start = time.perf_counter()
+	if route == "direct":
+		info["reduce_seconds"] = 0.0
+		start = time.perf_counter()
+		model = formula.solve(oc)
+		info["solve_seconds"] = time.perf_counter() - start
+		return model, info
+
+	if route in ("clique", "clique-sat"):
+		n, edges, k = sat3_to_clique(formula)
+		info.update(vertices=n, edges=len(edges), k=k)
+	elif route == "independent-set":
+		n, edges, k = sat3_to_independent_set(formula)
+		info.update(vertices=n, edges=len(edges), k=k)
+		n, edges, k = independent_set_to_clique(n, edges, k)
+	else:
+		raise ValueError(f"Unknown route: {route}. Must be one of {', '.join(ROUTES)}.")
+	info["reduce_seconds"] = time.perf_counter() - start
+
+	start = time.perf_counter()
+	if route == "clique-sat":
+		found = model_to_clique(n, edges, k, clique_to_sat(n, edges, k).solve(oc))
+	else:
+		found = clique(n, edges, k, solver, oc)
+	info["solve_seconds"] = time.perf_counter() - start
+	info["clique_verified"] = found is None or is_clique(n, edges, k, found)
+	return (occurrences_to_model(formula, found) if found is not None else None), info
+
+ROUTES = ["direct", "clique", "independent-set", "clique-sat"]
+
+# Routes that go through a pnp clique search, and so take a solver
+CLIQUE_ROUTES = ["clique", "independent-set"]
+
+# ===== INSTANCES ===== #
+
+def random_3sat(variables: int, clauses: int, seed=None) -> list[sat.Clause3]:
+	"""
+	Uniform random 3-SAT: three distinct variables per clause, each
+	negated with probability 1/2. Hardest around 4.26 clauses per
+	variable.
+	"""
+
+	rng = random.Random(seed)
+	return [sat.Clause3(*[x if rng.random() < 0.5 else -x for x in rng.sample(range(1, variables + 1), 3)]) for _ in range(clauses)]
+
+def planted_3sat(variables: int, clauses: int, seed=None) -> list[sat.Clause3]:
+	"""
+	Random 3-SAT satisfied by a hidden random assignment (clauses it
+	falsifies are redrawn), so the answer is always yes.
+	"""
+
+	rng = random.Random(seed)
+	hidden = [None] + [rng.random() < 0.5 for _ in range(variables)]
+	out = []
+	while len(out) < clauses:
+		literals = [x if rng.random() < 0.5 else -x for x in rng.sample(range(1, variables + 1), 3)]
+		if any((x > 0) == hidden[abs(x)] for x in literals):
+			out.append(sat.Clause3(*literals))
+	return out
+
+FAMILIES = {
+	"random": random_3sat,
+	"planted": planted_3sat
+}
+
+DIMACS = "dimacs"
+
+def dimacs_instances(paths: list[str]) -> list[tuple[str, sat.Satisfiability]]:
+	"""
+	(file name, formula) for every DIMACS file given, with directories
+	searched for *.cnf files, ordered by size.
+	"""
+
+	files = []
+	for path in paths:
+		if os.path.isdir(path):
+			files.extend(sorted(os.path.join(root, f) for root, _, names in os.walk(path) for f in names if f.endswith(".cnf")))
+		elif os.path.exists(path):
+			files.append(path)
+		else:
+			raise ValueError(f"No such DIMACS file or directory: {path}.")
+	formulas = [(os.path.basename(f), sat.Satisfiability.read(f)) for f in files]
+	return sorted(formulas, key=lambda x: (x[1].variables, len(x[1]), x[0]))
+
+# ===== HARNESS ===== #
+
+FIELDS = ["family", "instance", "variables", "clauses", "seed", "route", "solver", "status", "satisfiable", "verified", "clique_verified", "vertices", "edges", "k", "reduce_seconds", "solve_seconds", "seconds", "operations", "slowdown", "peak_kib"]
+
+def _run(clauses: list[list[int]], variables: int, route: str, solver: str) -> tuple[list[int], dict, int]:
+	formula = sat.Satisfiability.from_clauses(clauses, variables)
+	oc = pnp.OperationCounter()
+	model, info = solve(formula, route, solver, oc)
+	return model, info, oc.operations
+
+def trial(clauses: list[sat.Clause3], variables: int, route: str, solver: str, timeout: float) -> dict:
+	"""
+	Solve one instance by one route in a child process (see
+	benchmark.call).
+	"""
+
+	clauses = [list(c) for c in clauses]
+	status, value, peak = benchmark.call(_run, (clauses, variables, route, solver), timeout)
+	row = {"route": route, "solver": solver if route in CLIQUE_ROUTES else None, "status": status, "peak_kib": peak}
+	if status == "ok":
+		model, info, operations = value
+		formula = sat.Satisfiability.from_clauses(clauses, variables)
+		row.update(info, satisfiable=model is not None, operations=operations)
+		row["verified"] = (model is None or formula.satisfied(model)) and info["clique_verified"] is not False
+		row["seconds"] = info["reduce_seconds"] + info["solve_seconds"]
+	return row
+
+def _instances(family: str, variables: list[int], ratio: float, instances: int, seed: int, dimacs: list[str]) -> Iterable[tuple[str, int, int, int, list]]:
+	# (name, variables, clauses, seed, clauses), smallest first
+	if family == DIMACS:
+		for name, formula in dimacs_instances(dimacs):
+			yield name, formula.variables, len(formula), None, list(formula.clauses())
+		return
+	for n in sorted(variables):
+		m = max(1, round(ratio * n))
+		for i in range(instances):
+			yield None, n, m, seed + i, FAMILIES[family](n, m, seed + i)
+
+def sweep(variables: list[int], ratio: float, families: list[str], routes: list[str], solvers: list[str], instances: int=3, timeout: float=60.0, seed: int=0, dimacs: list[str]=(), log=print) -> list[dict]:
+	"""
+	Run every instance through every route. Each row records how
+	many times slower its route was than solving directly; a route
+	that times out is skipped for larger instances. The dimacs family
+	runs the files in dimacs (see dimacs_instances) instead of
+	generating formulas.
+	"""
+
+	rows = []
+	for family in families:
+		given_up = set()
+		for name, n, m, instance_seed, clauses in _instances(family, variables, ratio, instances, seed, dimacs):
+			direct = None
+			for route in routes:
+				for solver in (solvers if route in CLIQUE_ROUTES else [None]):
+					if (route, solver) in given_up:
+						continue
+					row = {"family": family, "instance": name, "variables": n, "clauses": m, "seed": instance_seed}
+					row.update(trial(clauses, n, route, solver, timeout))
+					if route == "direct" and row["status"] == "ok":
+						direct = row["seconds"]
+					if direct and row.get("seconds") is not None:
+						row["slowdown"] = row["seconds"] / direct
+					rows.append(row)
+					if row["status"] != "ok":
+						given_up.add((route, solver))
+					log("{family:>8} n={variables:<4} m={clauses:<5} {route:>15} {solver!s:>13}: {status:<7} sat={satisfiable!s:<5} |V|={vertices!s:<6} |E|={edges!s:<8} {seconds!s:.10} s".format(**{x: row.get(x) for x in FIELDS}))
+	return rows
+
+def summarize(rows: list[dict]) -> list[dict]:
+	"""
+	Per route, solver and instance size: the mean reduced size and
+	the geometric mean slowdown against solving directly.
+	"""
+
+	groups = {}
+	for row in rows:
+		if row["status"] == "ok":
+			groups.setdefault((row["family"], row["route"], row["solver"] or "", row["variables"]), []).append(row)
+	out = []
+	for (family, route, solver, n), group in sorted(groups.items()):
+		slowdowns = [r["slowdown"] for r in group if r.get("slowdown")]
+		out.append({
+			"family": family, "route": route, "solver": solver or None, "variables": n, "clauses": group[0]["clauses"],
+			"vertices": float(np.mean([r["vertices"] for r in group])) if group[0]["vertices"] is not None else None,
+			"edges": float(np.mean([r["edges"] for r in group])) if group[0]["edges"] is not None else None,
+			"seconds": float(np.mean([r["seconds"] for r in group])),
+			"slowdown": float(np.exp(np.mean(np.log(slowdowns)))) if slowdowns else None,
+			"verified": all(r["verified"] for r in group)
+		})
+	return out
+
+def write(rows: list[dict], summary: list[dict], prefix: str, options: dict=None) -> list[str]:
+	directory = os.path.dirname(prefix)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	paths = [prefix + ".csv", prefix + ".json"]
+	with open(paths[0], "w", newline="") as f:
+		writer = csv.DictWriter(f, FIELDS, extrasaction="ignore")
+		writer.writeheader()
+		writer.writerows(rows)
+	with open(paths[1], "w") as f:
+		json.dump({"options": options or {}, "trials": rows, "summary": summary}, f, indent=1)
+	return paths
+
+def main(argv: list[str]=None) -> tuple[list[dict], list[dict]]:
+	parser = argparse.ArgumentParser(description="Solve 3-SAT directly and through reductions to clique and independent set.")
+	parser.add_argument("--variables", type=int, nargs="+", default=[6, 9, 12, 15])
+	parser.add_argument("--ratio", type=float, default=4.26, help="clauses per variable")
+	parser.add_argument("--families", nargs="+", default=None, choices=list(FAMILIES) + [DIMACS], help="default: random and planted, or dimacs with --dimacs")
+	parser.add_argument("--dimacs", nargs="+", default=[], metavar="PATH", help="DIMACS files, or directories of *.cnf files, for the dimacs family")
+	parser.add_argument("--routes", nargs="+", default=ROUTES, choices=ROUTES)
+	parser.add_argument("--solvers", nargs="+", default=["bron-kerbosch"], choices=list(CLIQUE_SOLVERS))
+	parser.add_argument("--instances", type=int, default=3, help="formulas per size (seeds seed, seed + 1, ...)")
+	parser.add_argument("--timeout", type=float, default=60.0, help="seconds per trial")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("-o", "--output", default="reductions", help="prefix of the output files")
+	args = parser.parse_args(argv)
+	if args.families is None:
+		args.families = [DIMACS] if args.dimacs else list(FAMILIES)
+	if DIMACS in args.families and not args.dimacs:
+		parser.error("the dimacs family needs --dimacs")
+
+	rows = sweep(args.variables, args.ratio, args.families, args.routes, args.solvers, args.instances, args.timeout, args.seed, args.dimacs)
+	summary = summarize(rows)
+	for s in summary:
+		print("{family:>8} n={variables:<4} {route:>15} {solver!s:>13}: |V|={vertices!s:<8} |E|={edges!s:<10} {seconds:.4f} s, {slowdown_text} direct{check}".format(
+			slowdown_text="{:.1f}x".format(s["slowdown"]) if s["slowdown"] is not None else "?x",
+			check="" if s["verified"] else " (WRONG ANSWERS)", **s))
+	print("Wrote " + ", ".join(write(rows, summary, args.output, vars(args))))
+	return rows, summary
+
+if __name__ == "__main__":
+	main()
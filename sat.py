@@ -1,10 +1,537 @@
+"""
+Boolean satisfiability, to set next to the clique search in pnp.
+
+A formula in conjunctive normal form is kept the way DIMACS CNF
+files write it: variables are 1..n, a literal is a variable or its
+negative, and the clauses are stored flat, as one int32 array of
+literals with an array of offsets (clause i is
+literals[starts[i]:starts[i + 1]]). For example,
+
+	formula = Satisfiability.read("uf20-01.cnf")
+	model = formula.solve()		# [1, -2, -3, 4, ...] or None
+	formula.satisfied(model)
+
+and the same for a k-clique problem,
+
+	formula = clique_to_sat(graph, k)
+	clique = sat_to_clique(graph, k, formula.solve())
+
+Solving is done by CDCL: unit propagation with two watched literals
+per clause, conflict analysis to the first unique implication point
+with the learned clause added to the formula, VSIDS branching with
+saved phases, Luby restarts and periodic removal of the learned
+clauses with the most decision levels (LBD) in them.
+"""
+
+import heapq
+import sys
+import numpy as np
+from typing import Iterable
+import pnp
+
 class Clause3:
 
+	"""
+	A clause of exactly three literals, for 3-SAT. Literals are
+	DIMACS style: a variable number, negative when negated.
+	"""
+
 	def __init__(self, a: int, b: int, c: int) -> None:
 		self.a = a
 		self.b = b
 		self.c = c
 
+	def __iter__(self) -> Iterable[int]:
+		return iter((self.a, self.b, self.c))
+
+	def __repr__(self) -> str:
+		return f"Clause3({self.a}, {self.b}, {self.c})"
+
+# ===== DIMACS ===== #
+
+def parse_dimacs(text: str) -> tuple[int, np.ndarray, np.ndarray]:
+	"""
+	Parse DIMACS CNF into (variables, literals, starts). Comment
+	lines are skipped, and so is anything after a "%" line (as in the
+	SATLIB benchmark files).
+	"""
+
+	header = None
+	body = []
+	for line in text.splitlines():
+		line = line.strip()
+		if line.startswith("%"):
+			break
+		if not line or line.startswith("c"):
+			continue
+		if line.startswith("p"):
+			fields = line.split()
+			if len(fields) != 4 or fields[1] != "cnf":
+				raise ValueError(f"Invalid DIMACS problem line: \"{line}\".")
+			header = (int(fields[2]), int(fields[3]))
+			continue
+		body.append(line)
+	if header is None:
+		raise ValueError("No \"p cnf <variables> <clauses>\" line in DIMACS input.")
+
+	variables, count = header
+	tokens = np.array(" ".join(body).split(), dtype=np.int64)
+	if len(tokens) > 0 and tokens[-1] != 0:
+		tokens = np.append(tokens, 0) # last clause left unterminated
+	ends = np.flatnonzero(tokens == 0)
+	if len(ends) != count:
+		raise ValueError(f"DIMACS header promises {count} clauses but {len(ends)} were given.")
+	literals = np.delete(tokens, ends).astype(np.int32)
+	if len(literals) > 0 and np.abs(literals).max() > variables:
+		raise ValueError(f"DIMACS clauses use variable {np.abs(literals).max()} but the header only has {variables}.")
+	starts = np.concatenate([[0], ends - np.arange(len(ends))]).astype(np.int64)
+	return variables, literals, starts
+
 class Satisfiability:
 
-	
\ No newline at end of file
+	"""
+	A CNF formula: variables 1..variables and clauses stored flat
+	(see the top of the file). A model is a list with one literal per
+	variable, positive for true: [1, -2, 3, ...].
+	"""
+
+	def __init__(self, variables: int, literals: np.ndarray, starts: np.ndarray) -> None:
+		self.variables = variables
+		self.literals = np.asarray(literals, dtype=np.int32)
+		self.starts = np.asarray(starts, dtype=np.int64)
+
+	def __len__(self) -> int:
+		return len(self.starts) - 1
+
+	def __repr__(self) -> str:
+		return f"<Satisfiability with {self.variables} variables and {len(self)} clauses>"
+
+	@classmethod
+	def from_clauses(cls, clauses: Iterable[Iterable[int]], variables: int=None) -> "Satisfiability":
+		"""
+		From clauses given as iterables of literals (Clause3 objects
+		included).
+		"""
+
+		clauses = [list(clause) for clause in clauses]
+		literals = np.array([x for clause in clauses for x in clause], dtype=np.int32)
+		starts = np.concatenate([[0], np.cumsum([len(clause) for clause in clauses], dtype=np.int64)])
+		if variables is None:
+			variables = int(np.abs(literals).max()) if len(literals) > 0 else 0
+		return cls(variables, literals, starts)
+
+	@classmethod
+	def from_dimacs(cls, text: str) -> "Satisfiability":
+		return cls(*parse_dimacs(text))
+
+	@classmethod
+	def read(cls, path: str) -> "Satisfiability":
+		with open(path) as f:
+			return cls.from_dimacs(f.read())
+
+	def clause(self, i: int) -> list[int]:
+		return self.literals[self.starts[i]:self.starts[i + 1]].tolist()
+
+	def clauses(self) -> Iterable[list[int]]:
+		for i in range(len(self)):
+			yield self.clause(i)
+
+	def to_dimacs(self) -> str:
+		lines = [f"p cnf {self.variables} {len(self)}"]
+		lines.extend(" ".join(map(str, clause + [0])) for clause in self.clauses())
+		return "\n".join(lines) + "\n"
+
+	def write(self, path: str) -> None:
+		with open(path, "w") as f:
+			f.write(self.to_dimacs())
+
+	def satisfied(self, model: list[int]) -> bool:
+		"""
+		Whether a model (with a literal for every variable) satisfies
+		every clause, checked all at once.
+		"""
+
+		if model is None:
+			return False
+		value = np.zeros(self.variables + 1, dtype=bool)
+		model = np.asarray(model, dtype=np.int64)
+		value[np.abs(model)] = model > 0
+		true = value[np.abs(self.literals)] == (self.literals > 0)
+		if len(self) == 0:
+			return True
+		counts = np.add.reduceat(true.astype(np.int64), self.starts[:-1]) if len(true) > 0 else np.zeros(len(self))
+		counts[self.starts[:-1] == self.starts[1:]] = 0 # reduceat gives empty clauses a value
+		return bool((counts > 0).all())
+
+	def solve(self, oc: pnp.OperationCounter=0, **options) -> list[int]:
+		"""
+		A model, or None if the formula is unsatisfiable. See CDCL for
+		the options.
+		"""
+
+		return CDCL(self, **options).solve(oc)
+
+# ===== SOLVER ===== #
+
+def luby(i: int) -> int:
+	"""
+	The i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+	"""
+
+	size, power = 1, 0
+	while size < i + 1:
+		power += 1
+		size = 2 * size + 1
+	while size - 1 != i:
+		size = (size - 1) >> 1
+		power -= 1
+		i %= size
+	return 1 << power
+
+class CDCL:
+
+	"""
+	A conflict-driven clause learning solver for one formula.
+
+	Internally variable v (from 0) has the literals 2v (true) and
+	2v + 1 (false), so negation is ^ 1, and values holds 1, -1 or 0
+	(unassigned) for every literal. Clauses are Python lists of these
+	literals, with the two watched ones kept in front; a clause is
+	only looked at when one of those becomes false, and not even then
+	if the other literal stored with the watch (its blocker) is
+	already true. Binary clauses
+	(most of those clique_to_sat makes) are kept as implication
+	lists instead: binary[x] holds (y, clause) for every clause x or
+	y, to make y true as soon as x is false.
+
+	restart is the number of conflicts in a Luby unit, decay the VSIDS
+	activity decay, and learned the number of learned clauses kept
+	before the first clean-up (it grows by half each time).
+
+	Every clause visited during propagation counts as one operation.
+	stats counts decisions, propagations, conflicts, restarts and
+	learned clauses.
+	"""
+
+	def __init__(self, formula: Satisfiability, restart: int=100, decay: float=0.95, learned: int=2000) -> None:
+		n = formula.variables
+		self.variables = n
+		self.clauses = []
+		self.learned = []
+		self.lbd = {}
+		self.watches = [[] for _ in range(2 * n)]
+		self.binary = [[] for _ in range(2 * n)]
+		self.values = [0] * (2 * n)
+		self.level = [0] * n
+		self.reason = [None] * n
+		self.trail = []
+		self.trail_lim = []
+		self.head = 0
+		self.activity = [0.0] * n
+		self.increment = 1.0
+		self.decay = decay
+		self.restart = restart
+		self.max_learned = learned
+		self.phase = [False] * n
+		self.heap = [(0.0, v) for v in range(n)]
+		self.seen = [False] * n
+		self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0, "restarts": 0, "learned": 0}
+		self.ok = True
+		for clause in formula.clauses():
+			self.add_clause(clause)
+
+	def add_clause(self, clause: list[int]) -> None:
+		"""
+		Add a clause given in DIMACS literals (before solving).
+		"""
+
+		if not self.ok:
+			return
+		literals = sorted({2 * (abs(x) - 1) + (x < 0) for x in clause})
+		if any(literals[i] ^ 1 == literals[i + 1] for i in range(len(literals) - 1)):
+			return # tautology
+		literals = [x for x in literals if self.values[x] != -1 or self.level[x >> 1] > 0]
+		if any(self.values[x] == 1 for x in literals):
+			return
+		if len(literals) == 0:
+			self.ok = False
+		elif len(literals) == 1:
+			self._enqueue(literals[0], None)
+			self.ok = self._propagate(0) is None
+		else:
+			self._attach(literals)
+
+	def _attach(self, clause: list[int]) -> int:
+		self.clauses.append(clause)
+		ci = len(self.clauses) - 1
+		if len(clause) == 2:
+			self.binary[clause[0]].append((clause[1], ci))
+			self.binary[clause[1]].append((clause[0], ci))
+		else:
+			self.watches[clause[0]].append((ci, clause[1]))
+			self.watches[clause[1]].append((ci, clause[0]))
+		return ci
+
+	def _enqueue(self, literal: int, reason: int) -> None:
+		v = literal >> 1
+		self.values[literal] = 1
+		self.values[literal ^ 1] = -1
+		self.level[v] = len(self.trail_lim)
+		self.reason[v] = reason
+		self.trail.append(literal)
+
+	def _propagate(self, oc: pnp.OperationCounter) -> int:
+		"""
+		Unit propagation from the unprocessed part of the trail; the
+		index of a conflicting clause, or None.
+		"""
+
+		values, clauses, watches, trail = self.values, self.clauses, self.watches, self.trail
+		while self.head < len(trail):
+			false = trail[self.head] ^ 1
+			self.head += 1
+			self.stats["propagations"] += 1
+
+			for other, ci in self.binary[false]:
+				~oc
+				if values[other] == 1:
+					continue
+				c = clauses[ci]
+				if c[0] != other:
+					c[0], c[1] = other, false # the implied literal goes first
+				if values[other] == -1:
+					return ci
+				self._enqueue(other, ci)
+
+			ws = watches[false]
+			i = j = 0
+			size = len(ws)
+			while i < size:
+				entry = ws[i]
+				i += 1
+				if values[entry[1]] == 1:
+					ws[j] = entry # satisfied by its blocker, no need to look
+					j += 1
+					continue
+				ci = entry[0]
+				c = clauses[ci]
+				if c is None:
+					continue # removed, drop the watch
+				~oc
+				if c[0] == false:
+					c[0], c[1] = c[1], false
+				first = c[0]
+				if values[first] == 1:
+					ws[j] = (ci, first)
+					j += 1
+					continue
+				for m in range(2, len(c)):
+					if values[c[m]] != -1:
+						c[1], c[m] = c[m], false
+						watches[c[1]].append((ci, first))
+						break
+				else:
+					ws[j] = (ci, first)
+					j += 1
+					if values[first] == -1:
+						while i < size:
+							ws[j] = ws[i]
+							i += 1
+							j += 1
+						del ws[j:]
+						return ci
+					self._enqueue(first, ci)
+			del ws[j:]
+		return None
+
+	def _bump(self, v: int) -> None:
+		self.activity[v] += self.increment
+		if self.activity[v] > 1e100:
+			self.activity = [a * 1e-100 for a in self.activity]
+			self.increment *= 1e-100
+			self.heap = [(-a, u) for u, a in enumerate(self.activity) if self.values[2 * u] == 0]
+			heapq.heapify(self.heap)
+		heapq.heappush(self.heap, (-self.activity[v], v))
+
+	def _analyze(self, conflict: int) -> tuple[list[int], int]:
+		"""
+		The first-UIP learned clause (asserting literal first, a
+		literal of the backjump level second) and the backjump level.
+		"""
+
+		seen, level, trail = self.seen, self.level, self.trail
+		current = len(self.trail_lim)
+		learned = [None]
+		pending = 0
+		p = None
+		index = len(trail) - 1
+		ci = conflict
+		while True:
+			c = self.clauses[ci]
+			for q in (c if p is None else c[1:]):
+				v = q >> 1
+				if not seen[v] and level[v] > 0:
+					seen[v] = True
+					self._bump(v)
+					if level[v] == current:
+						pending += 1
+					else:
+						learned.append(q)
+			while not seen[trail[index] >> 1]:
+				index -= 1
+			p = trail[index]
+			index -= 1
+			ci = self.reason[p >> 1]
+			seen[p >> 1] = False
+			pending -= 1
+			if pending == 0:
+				break
+		learned[0] = p ^ 1
+		for q in learned[1:]:
+			seen[q >> 1] = False
+
+		if len(learned) == 1:
+			return learned, 0
+		second = max(range(1, len(learned)), key=lambda i: level[learned[i] >> 1])
+		learned[1], learned[second] = learned[second], learned[1]
+		return learned, level[learned[1] >> 1]
+
+	def _cancel(self, target: int) -> None:
+		if len(self.trail_lim) <= target:
+			return
+		for literal in reversed(self.trail[self.trail_lim[target]:]):
+			v = literal >> 1
+			self.values[literal] = self.values[literal ^ 1] = 0
+			self.reason[v] = None
+			self.phase[v] = not literal & 1
+			heapq.heappush(self.heap, (-self.activity[v], v))
+		del self.trail[self.trail_lim[target]:]
+		del self.trail_lim[target:]
+		self.head = len(self.trail)
+
+	def _decide(self) -> int:
+		while self.heap:
+			activity, v = heapq.heappop(self.heap)
+			if self.values[2 * v] == 0 and -activity == self.activity[v]:
+				return 2 * v + (not self.phase[v])
+		for v in range(self.variables): # stale heap, fall back to a scan
+			if self.values[2 * v] == 0:
+				return 2 * v + (not self.phase[v])
+		return None
+
+	def _locked(self, ci: int) -> bool:
+		c = self.clauses[ci]
+		return self.reason[c[0] >> 1] == ci and self.values[c[0]] == 1
+
+	def _reduce(self) -> None:
+		"""
+		Remove the half of the learned clauses with the highest LBD,
+		keeping binary and glue (LBD 2) clauses and current reasons.
+		"""
+
+		candidates = [ci for ci in self.learned if len(self.clauses[ci]) > 2 and self.lbd[ci] > 2 and not self._locked(ci)]
+		candidates.sort(key=lambda ci: -self.lbd[ci])
+		removed = set(candidates[:len(candidates) // 2])
+		for ci in removed:
+			self.clauses[ci] = None
+			del self.lbd[ci]
+		self.learned = [ci for ci in self.learned if ci not in removed]
+
+	def solve(self, oc: pnp.OperationCounter=0) -> list[int]:
+		if not self.ok or self._propagate(oc) is not None:
+			return None
+		restarts = 0
+		budget = luby(restarts) * self.restart
+		conflicts = 0
+		while True:
+			conflict = self._propagate(oc)
+			if conflict is not None:
+				self.stats["conflicts"] += 1
+				conflicts += 1
+				if len(self.trail_lim) == 0:
+					return None
+				learned, back = self._analyze(conflict)
+				self._cancel(back)
+				if len(learned) == 1:
+					self._enqueue(learned[0], None)
+				else:
+					ci = self._attach(learned)
+					self.learned.append(ci)
+					self.lbd[ci] = len({self.level[x >> 1] for x in learned})
+					self._enqueue(learned[0], ci)
+				self.stats["learned"] += 1
+				self.increment /= self.decay
+				continue
+
+			if conflicts >= budget:
+				self._cancel(0)
+				restarts += 1
+				self.stats["restarts"] += 1
+				budget = luby(restarts) * self.restart
+				conflicts = 0
+			if len(self.learned) >= self.max_learned:
+				self._reduce()
+				self.max_learned = int(self.max_learned * 1.5)
+
+			literal = self._decide()
+			if literal is None:
+				return [v + 1 if self.values[2 * v] == 1 else -(v + 1) for v in range(self.variables)]
+			self.stats["decisions"] += 1
+			self.trail_lim.append(len(self.trail))
+			self._enqueue(literal, None)
+
+# ===== CLIQUE ===== #
+
+def clique_to_sat(graph: pnp.Graph, k: int) -> Satisfiability:
+	"""
+	A formula satisfiable exactly when the graph has a k-clique.
+
+	Variable i * n + j + 1 means "the i-th vertex of the clique (for
+	i in 0..k-1) is the j-th vertex of the graph" (in the order of
+	graph.index). Every position holds some vertex, no position holds
+	two, and two positions i < j can only hold vertices u, w that are
+	adjacent with u before w, so each k-clique has exactly one model.
+	"""
+
+	n = len(graph)
+	adjacent = np.zeros((n, n), dtype=bool)
+	for x, neighbors in graph.adjacent.items():
+		adjacent[graph.index[x], [graph.index[y] for y in neighbors]] = True
+	u, w = np.nonzero(~adjacent | (np.arange(n)[:, None] >= np.arange(n)))
+	same = np.nonzero(np.triu(np.ones((n, n), dtype=bool), 1))
+
+	literals = [np.arange(i * n + 1, (i + 1) * n + 1, dtype=np.int32) for i in range(k)]
+	starts = [np.arange(k + 1, dtype=np.int64) * n]
+	pairs = []
+	for i in range(k):
+		pairs.append(np.column_stack([-(i * n + same[0] + 1), -(i * n + same[1] + 1)]))
+		for j in range(i + 1, k):
+			pairs.append(np.column_stack([-(i * n + u + 1), -(j * n + w + 1)]))
+	pairs = np.concatenate(pairs).astype(np.int32) if pairs else np.zeros((0, 2), dtype=np.int32)
+	literals.append(pairs.ravel())
+	starts.append(k * n + 2 * np.arange(1, len(pairs) + 1, dtype=np.int64))
+	return Satisfiability(k * n, np.concatenate(literals), np.concatenate(starts))
+
+def sat_to_clique(graph: pnp.Graph, k: int, model: list[int]) -> set:
+	"""
+	The k-clique a model of clique_to_sat(graph, k) describes (None
+	for no model).
+	"""
+
+	if model is None:
+		return None
+	n = len(graph)
+	return {graph.all_vertices[(x - 1) % n] for x in model if x > 0}
+
+if __name__ == "__main__":
+	# Solve a DIMACS file, answering in the format of the SAT competitions
+	formula = Satisfiability.read(sys.argv[1])
+	oc = pnp.OperationCounter()
+	solver = CDCL(formula)
+	model = solver.solve(oc)
+	print("c {} operations, {}".format(oc.operations, ", ".join(f"{v} {k}" for k, v in solver.stats.items())))
+	if model is None:
+		print("s UNSATISFIABLE")
+	else:
+		print("s SATISFIABLE")
+		print("v " + " ".join(map(str, model + [0])))
@@ -8,5 +8,7 @@ from sxl import settings
 from sxl import util
 from sxl import error
 from sxl import library
+from sxl import export
+from sxl import codegen
 from sxl import manual
 print("done.")
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Exact numeric derivatives of metrics by forward-mode automatic
+differentiation.
+
+Finite differences lose accuracy where a profile changes quickly
+(the walls of a warp bubble, say), and taking them finer only trades
+truncation error for round-off. Hyper-dual numbers
+
+	x = a + b e1 + c e2 + d e1 e2,		e1^2 = e2^2 = 0
+
+carry first and second derivatives through arithmetic exactly: for
+any function built from arithmetic and NumPy functions,
+
+	f(x + e1 + e2) = f(x) + f'(x) e1 + f'(x) e2 + f''(x) e1 e2
+
+and seeding e1 and e2 along two different coordinates gives the
+mixed second derivative d_c d_d f in the e1 e2 part. The parts are
+arrays, so a whole grid is differentiated at once, and a metric of
+dimension n takes n (n + 1) / 2 evaluations for every first and
+second derivative of every component, to machine precision.
+
+DualMetric has the same interface as curvature.FiniteDifferenceMetric
+(it is another NumericMetric), except that grids need not be uniform
+and the metric function has to return nested components, as
+lambdified metrics do; generated codegen kernels write into float
+arrays and cannot carry hyper-dual numbers. For example,
+
+	ad = autodiff.DualMetric.from_manifold(mf, [0, np.linspace(-3, 3, 201), 0, np.linspace(-3, 3, 201)], functions={"H": profile}, defaults={"c": 1})
+	ad.stress_energy("contra")[..., 0, 0]
+
+Profile functions see hyper-dual numbers as arguments, so they must
+stick to arithmetic, NumPy ufuncs (np.exp, np.tanh, ...) and where()
+from this module instead of np.where.
+"""
+
+import numpy as np
+from sympy import Matrix
+from sxl import curvature
+from sxl import spacetime
+
+class HyperDual:
+
+	"""
+	A hyper-dual number (or array of them): real + e1 * d/de1 + e2 *
+	d/de2 + e12 * d2/de1de2, each part a float or an array.
+	"""
+
+	def __init__(self, real, e1=0.0, e2=0.0, e12=0.0):
+		self.real = real
+		self.e1 = e1
+		self.e2 = e2
+		self.e12 = e12
+
+	def __repr__(self):
+		return "HyperDual({!r}, {!r}, {!r}, {!r})".format(self.real, self.e1, self.e2, self.e12)
+
+	@property
+	def shape(self) -> tuple:
+		return np.broadcast(self.real, self.e1, self.e2, self.e12).shape
+
+	def parts(self) -> tuple:
+		return self.real, self.e1, self.e2, self.e12
+
+	def chain(self, f, df, ddf) -> "HyperDual":
+		"""
+		The image under a function with value f, first derivative df and
+		second derivative ddf at the real part.
+		"""
+
+		return HyperDual(f, df * self.e1, df * self.e2, df * self.e12 + ddf * self.e1 * self.e2)
+
+	def __add__(self, other):
+		other = lift(other)
+		return HyperDual(self.real + other.real, self.e1 + other.e1, self.e2 + other.e2, self.e12 + other.e12)
+
+	__radd__ = __add__
+
+	def __sub__(self, other):
+		other = lift(other)
+		return HyperDual(self.real - other.real, self.e1 - other.e1, self.e2 - other.e2, self.e12 - other.e12)
+
+	def __rsub__(self, other):
+		return lift(other) - self
+
+	def __mul__(self, other):
+		if not isinstance(other, HyperDual):
+			return HyperDual(self.real * other, self.e1 * other, self.e2 * other, self.e12 * other)
+		return HyperDual(
+			self.real * other.real,
+			self.real * other.e1 + self.e1 * other.real,
+			self.real * other.e2 + self.e2 * other.real,
+			self.real * other.e12 + self.e1 * other.e2 + self.e2 * other.e1 + self.e12 * other.real
+		)
+
+	__rmul__ = __mul__
+
+	def reciprocal(self) -> "HyperDual":
+		r = 1 / self.real
+		return self.chain(r, -r * r, 2 * r * r * r)
+
+	def __truediv__(self, other):
+		if not isinstance(other, HyperDual):
+			return HyperDual(self.real / other, self.e1 / other, self.e2 / other, self.e12 / other)
+		return self * other.reciprocal()
+
+	def __rtruediv__(self, other):
+		return other * self.reciprocal()
+
+	def __pow__(self, other):
+		if isinstance(other, HyperDual):
+			return np.exp(other * np.log(self))
+		if np.ndim(other) == 0 and float(other).is_integer():
+			# Integer powers by repeated squaring, which (unlike the chain
+			# rule) stays finite at zero.
+			p = int(other)
+			result, base = HyperDual(np.ones_like(self.real, dtype=float)), self if p >= 0 else self.reciprocal()
+			p = abs(p)
+			while p:
+				if p & 1:
+					result = result * base
+				base = base * base
+				p >>= 1
+			return result
+		return self.chain(self.real**other, other * self.real**(other - 1), other * (other - 1) * self.real**(other - 2))
+
+	def __rpow__(self, other):
+		value = other**self.real
+		l = np.log(other)
+		return self.chain(value, value * l, value * l * l)
+
+	def __neg__(self):
+		return HyperDual(-self.real, -self.e1, -self.e2, -self.e12)
+
+	def __pos__(self):
+		return self
+
+	def __abs__(self):
+		s = np.sign(self.real)
+		return HyperDual(abs(self.real), s * self.e1, s * self.e2, s * self.e12)
+
+	def __lt__(self, other):
+		return self.real < lift(other).real
+
+	def __le__(self, other):
+		return self.real <= lift(other).real
+
+	def __gt__(self, other):
+		return self.real > lift(other).real
+
+	def __ge__(self, other):
+		return self.real >= lift(other).real
+
+	def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+		if method != "__call__" or "out" in kwargs:
+			return NotImplemented
+		name = ufunc.__name__
+		if name in _UNARY:
+			f, df, ddf = _UNARY[name]
+			x = inputs[0]
+			return x.chain(f(x.real), df(x.real), ddf(x.real))
+		if name in _BINARY:
+			return _BINARY[name](lift(inputs[0]), inputs[1])
+		if name in _CONSTANT:
+			return ufunc(*[lift(x).real for x in inputs], **kwargs)
+		return NotImplemented
+
+def lift(x) -> HyperDual:
+	return x if isinstance(x, HyperDual) else HyperDual(x)
+
+def real(x):
+	return x.real if isinstance(x, HyperDual) else x
+
+def where(condition, a, b) -> HyperDual:
+	"""
+	np.where for hyper-dual numbers (the condition is taken on real
+	parts, as comparisons of hyper-dual numbers are).
+	"""
+
+	a, b = lift(a), lift(b)
+	return HyperDual(*[np.where(condition, x, y) for x, y in zip(a.parts(), b.parts())])
+
+def _sqrt_second(a):
+	return -0.25 / (a * np.sqrt(a))
+
+# (value, first derivative, second derivative) of NumPy's unary ufuncs.
+_UNARY = {
+	"negative": (np.negative, lambda a: -np.ones_like(a), np.zeros_like),
+	"positive": (np.positive, np.ones_like, np.zeros_like),
+	"absolute": (np.absolute, np.sign, np.zeros_like),
+	"square": (np.square, lambda a: 2 * a, lambda a: 2 * np.ones_like(a)),
+	"reciprocal": (lambda a: 1 / a, lambda a: -1 / a**2, lambda a: 2 / a**3),
+	"sqrt": (np.sqrt, lambda a: 0.5 / np.sqrt(a), _sqrt_second),
+	"cbrt": (np.cbrt, lambda a: 1 / (3 * np.cbrt(a)**2), lambda a: -2 / (9 * np.cbrt(a)**5)),
+	"exp": (np.exp, np.exp, np.exp),
+	"exp2": (np.exp2, lambda a: np.log(2) * np.exp2(a), lambda a: np.log(2)**2 * np.exp2(a)),
+	"expm1": (np.expm1, np.exp, np.exp),
+	"log": (np.log, lambda a: 1 / a, lambda a: -1 / a**2),
+	"log2": (np.log2, lambda a: 1 / (a * np.log(2)), lambda a: -1 / (a**2 * np.log(2))),
+	"log10": (np.log10, lambda a: 1 / (a * np.log(10)), lambda a: -1 / (a**2 * np.log(10))),
+	"log1p": (np.log1p, lambda a: 1 / (1 + a), lambda a: -1 / (1 + a)**2),
+	"sin": (np.sin, np.cos, lambda a: -np.sin(a)),
+	"cos": (np.cos, lambda a: -np.sin(a), lambda a: -np.cos(a)),
+	"tan": (np.tan, lambda a: 1 + np.tan(a)**2, lambda a: 2 * np.tan(a) * (1 + np.tan(a)**2)),
+	"arcsin": (np.arcsin, lambda a: 1 / np.sqrt(1 - a**2), lambda a: a / (1 - a**2)**1.5),
+	"arccos": (np.arccos, lambda a: -1 / np.sqrt(1 - a**2), lambda a: -a / (1 - a**2)**1.5),
+	"arctan": (np.arctan, lambda a: 1 / (1 + a**2), lambda a: -2 * a / (1 + a**2)**2),
+	"sinh": (np.sinh, np.cosh, np.sinh),
+	"cosh": (np.cosh, np.sinh, np.cosh),
+	"tanh": (np.tanh, lambda a: 1 - np.tanh(a)**2, lambda a: -2 * np.tanh(a) * (1 - np.tanh(a)**2)),
+	"arcsinh": (np.arcsinh, lambda a: 1 / np.sqrt(a**2 + 1), lambda a: -a / (a**2 + 1)**1.5),
+	"arccosh": (np.arccosh, lambda a: 1 / np.sqrt(a**2 - 1), lambda a: -a / (a**2 - 1)**1.5),
+	"arctanh": (np.arctanh, lambda a: 1 / (1 - a**2), lambda a: 2 * a / (1 - a**2)**2)
+}
+
+_BINARY = {
+	"add": lambda x, y: x + y,
+	"subtract": lambda x, y: x - y,
+	"multiply": lambda x, y: x * y,
+	"divide": lambda x, y: x / y,
+	"true_divide": lambda x, y: x / y,
+	"power": lambda x, y: x**y,
+	"maximum": lambda x, y: where(x.real >= real(y), x, y),
+	"minimum": lambda x, y: where(x.real <= real(y), x, y)
+}
+
+# Ufuncs that are locally constant (or boolean), applied to real parts.
+_CONSTANT = {"sign", "floor", "ceil", "rint", "trunc", "heaviside", "less", "less_equal", "greater", "greater_equal", "equal", "not_equal", "isfinite", "isnan"}
+
+class DualMetric(curvature.NumericMetric):
+
+	"""
+	A metric given by a function f(*coords, **params) returning its
+	covariant components as nested (n, n) sequences, differentiated
+	with hyper-dual numbers on the grid made by axes: for each
+	coordinate, a 1D array of values (in any spacing) or a single value
+	to hold it at. Coordinates listed in independent (by index) are
+	ones the metric does not depend on.
+	"""
+
+	def __init__(self, f, axes: list, independent: list=(), **params):
+		self.f = f
+		self.params = params
+		self.independent = list(independent)
+		n = len(axes)
+		arrays = [np.asarray(a, dtype=float) for a in axes if np.ndim(a) != 0]
+		grid = iter(np.meshgrid(*arrays, indexing="ij"))
+		self.coordinates = [float(a) if np.ndim(a) == 0 else next(grid) for a in axes]
+		curvature.NumericMetric.__init__(self, n, tuple(len(a) for a in arrays))
+
+	@classmethod
+	def from_function(cls, f, axes: list, independent: list=(), **params) -> "DualMetric":
+		return cls(f, axes, independent, **params)
+
+	@classmethod
+	def from_manifold(cls, manifold: spacetime.Manifold, axes: list, functions: dict=None, defaults: dict=None, **params) -> "DualMetric":
+		m = Matrix(manifold.metric_tensor.co())
+		independent = [i for i, x in enumerate(manifold.coordinates) if not m.has(x)]
+		return cls(curvature.metric_components(manifold, functions, defaults), axes, independent, **params)
+
+	def evaluate(self, c: int=None, d: int=None) -> tuple:
+		"""
+		The parts (real, e1, e2, e12) of the metric with e1 seeded along
+		coordinate c and e2 along d, each an array of shape grid + (n, n).
+		"""
+
+		x = list(self.coordinates)
+		for i in {c, d} - {None}:
+			x[i] = HyperDual(x[i], float(i == c), float(i == d), 0.0)
+		with np.errstate(all="ignore"):
+			entries = self.f(*x, **self.params)
+		n = self.dimension
+		parts = []
+		for k in range(4):
+			component = [[lift(entries[a][b]).parts()[k] for b in range(n)] for a in range(n)]
+			parts.append(np.moveaxis(curvature.broadcast_components(component, self.shape), (0, 1), (-2, -1)))
+		return tuple(parts)
+
+	def derivatives(self) -> tuple:
+		n = self.dimension
+		active = [i for i in range(n) if i not in self.independent]
+		dg = np.zeros(self.shape + (n, n, n))
+		ddg = np.zeros(self.shape + (n, n, n, n))
+		g = self.evaluate()[0] if len(active) == 0 else None
+		for k, c in enumerate(active):
+			for d in active[k:]:
+				value, e1, _, e12 = self.evaluate(c, d)
+				if g is None:
+					g = value
+				if c == d:
+					dg[..., c, :, :] = e1
+				ddg[..., c, d, :, :] = ddg[..., d, c, :, :] = e12
+		return g, dg, ddg
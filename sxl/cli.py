@@ -270,6 +270,37 @@ class SXL:
 				if "--mixed" in cmds:
 					sympy.pprint(obj.mixed(*indices))
 
+			elif cmds[1] in ("export", "x"):
+				if "-h" in cmds or "--help" in cmds:
+					print(manual.cli.HELP_MANIFOLD_EXPORT)
+					return
+
+				if len(cmds) <= 2:
+					raise IncompleteOrInvalidCommand("Incomplete command, need to specify a file. Try \"manifold export results.jsonl.gz\" or see \"manifold export --help\".")
+
+				if self.manifold is None:
+					raise IncompleteOrInvalidCommand("Cannot export anything, manifold is not created yet. Try \"manifold create <metric search terms>\" to make one.")
+
+				path = cmds[2]
+				if "-q" not in cmds and "--quiet" not in cmds: print("Exporting manifold to \"{}\" ...".format(path))
+				export.dump(self.manifold, path, code="--code" in cmds, solve="--solve" in cmds)
+				if "-q" not in cmds and "--quiet" not in cmds: print("Done.")
+
+			elif cmds[1] in ("load", "l"):
+				if "-h" in cmds or "--help" in cmds:
+					print(manual.cli.HELP_MANIFOLD_LOAD)
+					return
+
+				if len(cmds) <= 2:
+					raise IncompleteOrInvalidCommand("Incomplete command, need to specify a file. Try \"manifold load results.jsonl.gz\" or see \"manifold load --help\".")
+
+				path = cmds[2]
+				if not os.path.exists(path):
+					raise OSError("No such file exists (\"{}\")".format(path))
+				if "-q" not in cmds and "--quiet" not in cmds: print("Loading manifold from \"{}\" ...".format(path))
+				self.manifold = export.load(path)
+				if "-q" not in cmds and "--quiet" not in cmds: print("Successfully loaded manifold.")
+
 			else:
 				raise IncompleteOrInvalidCommand("Incomplete or invalid command. See \"manifold --help\" for more info.")
 
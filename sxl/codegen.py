@@ -0,0 +1,301 @@
+"""
+Code generation of standalone NumPy kernels from solved objects.
+
+Components of solved tensors (say, T^00 of the SEM tensor on a
+drive metric) are turned into plain Python modules: common
+subexpressions are pulled out with sympy.cse, everything is
+printed with the NumPy printer so the result broadcasts over
+arrays, and scalar kernels can optionally be jitted with Numba.
+
+Generated modules are cached on disk under settings.codegen_cache,
+keyed on a hash of the input expressions and options, so the same
+request always maps to the same file and the (slow) CSE pass only
+runs once. For example,
+
+	sem = mf.of(einstein.StressEnergyMomentumTensor)
+	T00 = codegen.compile_component(sem, "contra", (0, 0), args=("R", "z"), defaults={"c": 1, "V": 1})
+	T00(R, Z)
+
+A whole tensor can be compiled into one function that fills an
+array of shape (n, ..., n) + broadcast shape in a single call:
+
+	christoffel = codegen.compile_tensor(mf.of(einstein.ChristoffelSymbols), "mixed")
+	christoffel(t, r, theta, phi, G=1, M=1, c=1)
+"""
+
+import os
+import re
+import keyword
+import hashlib
+import importlib.util
+from sympy import cse
+from sympy import srepr
+from sympy import sympify
+from sympy import Symbol
+from sympy import Derivative
+from sympy import numbered_symbols
+from sympy.core.function import AppliedUndef
+from sympy.printing.numpy import NumPyPrinter
+from sxl import spacetime
+from sxl import settings
+from sxl import util
+from sxl.spacetime import dim
+
+FORMAT_VERSION = 2
+
+class CodegenError(Exception):
+	pass
+
+_modules = {}
+
+# Names the generated modules use themselves (the CSE temporaries are _x0, _x1, ...)
+_RESERVED = {"numpy", "njit", "ARGS", "_shape", "_out"}
+
+def _identifier(name: str) -> str:
+	name = "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
+	if name == "" or name[0].isdigit():
+		name = "_" + name
+	if keyword.iskeyword(name) or name in _RESERVED or re.fullmatch(r"_x\d+", name):
+		name = name + "_"
+	return name
+
+def _identifiers(symbols: list[Symbol]) -> dict:
+	names = {}
+	for x in symbols:
+		name = _identifier(x.name)
+		for y, other in names.items():
+			if other == name and y != x:
+				raise CodegenError("Symbols \"{}\" and \"{}\" would both be the kernel argument \"{}\"; rename one of them.".format(y, x, name))
+		names[x] = name
+	return names
+
+def _symbol(x, coordinates: spacetime.Coordinates=None) -> Symbol:
+	if isinstance(x, Symbol):
+		return x
+	if type(x) == int and coordinates is not None:
+		return coordinates.x(x)
+	return Symbol(x)
+
+class KernelSpec:
+
+	"""
+	Describes one function of a generated module: its name, the
+	shape of its output (() for a scalar kernel) and the nonzero
+	entries as (indices, expression) pairs.
+	"""
+
+	def __init__(self, name: str, shape: tuple, entries: list):
+		self.name = _identifier(name)
+		self.shape = tuple(shape)
+		self.entries = [(tuple(indices), sympify(expr)) for indices, expr in entries]
+		for _, expr in self.entries:
+			if expr.atoms(AppliedUndef) or expr.atoms(Derivative):
+				raise CodegenError("Cannot generate a kernel for \"{}\": it contains undefined functions or unevaluated derivatives.".format(name))
+
+	def free_symbols(self) -> set:
+		r = set()
+		for _, expr in self.entries:
+			r |= expr.free_symbols
+		return r
+
+def scalar_kernel(name: str, expr) -> KernelSpec:
+	return KernelSpec(name, (), [((), expr)])
+
+def component_kernel(name: str, obj: spacetime.Definable, variant: str=None, indices: tuple=()) -> KernelSpec:
+	if isinstance(obj, spacetime.Scalar):
+		return scalar_kernel(name, obj())
+	return scalar_kernel(name, getattr(obj, variant)(*indices))
+
+def tensor_kernel(name: str, obj: spacetime.Definable, variant: str) -> KernelSpec:
+	"""
+	Collect every component of a tensor (in one index variant) into
+	a single kernel; identically-zero components are left out since
+	the output array starts out zeroed.
+	"""
+
+	if isinstance(obj, spacetime.Scalar):
+		return scalar_kernel(name, obj())
+	n = dim(obj)
+	entries = []
+	if isinstance(obj, spacetime.MetricTensor):
+		getter = obj.co if variant == "co" else obj.contra
+		for ij in util.allind(2, n):
+			if sympify(getter(*ij)) != 0:
+				entries.append((ij, getter(*ij)))
+		return KernelSpec(name, (n, n), entries)
+	for indices in util.allind(obj.rank, n):
+		expr = getattr(obj, variant)(*indices)
+		if sympify(expr) != 0:
+			entries.append((indices, expr))
+	return KernelSpec(name, (n,) * obj.rank, entries)
+
+class ModuleBuilder:
+
+	"""
+	Turns a list of KernelSpecs into the source of a Python module.
+
+	Every function takes the positional arguments in args (coordinate
+	symbols, by default), followed by the remaining free symbols as
+	parameters, sorted by name: first the ones without defaults, then
+	the ones with. If numba is True, scalar kernels are decorated with
+	numba.njit when Numba is importable and run as plain NumPy when not.
+	"""
+
+	def __init__(self, specs: list[KernelSpec], args: list, defaults: dict=None, numba: bool=False):
+		self.specs = specs
+		self.args = [_symbol(x) for x in args]
+		self.defaults = {_symbol(k): v for k, v in (defaults or {}).items()}
+		self.numba = numba
+
+	def key(self) -> str:
+		h = hashlib.sha256()
+		h.update("sxl.codegen {}\n".format(FORMAT_VERSION).encode())
+		h.update(repr([x.name for x in self.args]).encode())
+		h.update(repr(sorted((k.name, repr(v)) for k, v in self.defaults.items())).encode())
+		h.update(repr(self.numba).encode())
+		for spec in self.specs:
+			h.update("\n{} {}\n".format(spec.name, spec.shape).encode())
+			for indices, expr in spec.entries:
+				h.update("{} {}\n".format(indices, srepr(expr)).encode())
+		return h.hexdigest()
+
+	def parameters(self, spec: KernelSpec) -> list[Symbol]:
+		free = sorted(spec.free_symbols() - set(self.args), key=lambda x: x.name)
+		return [x for x in free if x not in self.defaults] + [x for x in free if x in self.defaults]
+
+	def _function(self, spec: KernelSpec) -> list[str]:
+		params = self.parameters(spec)
+		names = {x: Symbol(name) for x, name in _identifiers(self.args + params).items()}
+		signature = [names[x].name for x in self.args]
+		signature += [names[x].name if x not in self.defaults else "{}={!r}".format(names[x].name, self.defaults[x]) for x in params]
+
+		exprs = [expr.xreplace(names) for _, expr in spec.entries]
+		replacements, reduced = cse(exprs, symbols=numbered_symbols("_x"))
+		printer = NumPyPrinter({"fully_qualified_modules": True})
+
+		lines = []
+		if self.numba and spec.shape == ():
+			lines.append("@njit(cache=True)")
+		lines.append("def {}({}):".format(spec.name, ", ".join(signature)))
+		for sym, sub in replacements:
+			lines.append("\t{} = {}".format(sym, printer.doprint(sub)))
+
+		if spec.shape == ():
+			lines.append("\treturn {}".format(printer.doprint(reduced[0]) if reduced else "0.0"))
+		else:
+			lines.append("\t_shape = numpy.broadcast({}).shape".format(", ".join(signature[:len(self.args)] + ["0.0"])))
+			lines.append("\t_out = numpy.zeros({} + _shape)".format(repr(spec.shape)))
+			for (indices, _), expr in zip(spec.entries, reduced):
+				lines.append("\t_out[{}] = {}".format(", ".join(map(str, indices)), printer.doprint(expr)))
+			lines.append("\treturn _out")
+		return lines
+
+	def source(self) -> str:
+		lines = [
+			"# Generated by sxl.codegen (format {}), key {}.".format(FORMAT_VERSION, self.key()),
+			"# Do not edit; regenerate from the source expressions instead.",
+			"",
+			"import numpy",
+			""
+		]
+		if self.numba:
+			lines += [
+				"try:",
+				"\tfrom numba import njit",
+				"except ImportError:",
+				"\tdef njit(*args, **kwargs):",
+				"\t\treturn lambda f: f",
+				""
+			]
+		lines.append("ARGS = {!r}".format(tuple(_identifier(x.name) for x in self.args)))
+		lines.append("")
+		for spec in self.specs:
+			lines.append("")
+			lines += self._function(spec)
+		return "\n".join(lines) + "\n"
+
+def _import(path: str, name: str):
+	spec = importlib.util.spec_from_file_location(name, path)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+def reference(fn) -> tuple:
+	"""
+	A picklable reference to a generated kernel (its file, module and
+	function name), so that worker processes can import the same
+	kernel instead of generating it again.
+	"""
+
+	return (fn.__code__.co_filename, fn.__module__, fn.__name__)
+
+def resolve(ref: tuple):
+	path, module_name, name = ref
+	if path not in _modules:
+		_modules[path] = _import(path, module_name)
+	return getattr(_modules[path], name)
+
+def emit(specs: list[KernelSpec], args: list, path: str, defaults: dict=None, numba: bool=False):
+	"""
+	Write a generated module to an explicit path (for example, next to
+	a plotting script that imports it) and return the imported module.
+	"""
+
+	builder = ModuleBuilder(specs, args, defaults, numba)
+	with open(path, "w") as f:
+		f.write(builder.source())
+	return _import(path, os.path.splitext(os.path.basename(path))[0])
+
+def build(specs: list[KernelSpec], args: list, defaults: dict=None, numba: bool=False, name: str="kernels"):
+	"""
+	Generate (or fetch from the cache) a module containing the given
+	kernels and return it imported.
+	"""
+
+	builder = ModuleBuilder(specs, args, defaults, numba)
+	key = builder.key()
+	if key in _modules:
+		return _modules[key]
+
+	module_name = "{}_{}".format(_identifier(name), key[:16])
+	path = os.path.join(settings.codegen_cache, module_name + ".py")
+	if not os.path.exists(path):
+		os.makedirs(settings.codegen_cache, exist_ok=True)
+		tmp = path + ".{}.tmp".format(os.getpid())
+		with open(tmp, "w") as f:
+			f.write(builder.source())
+		os.replace(tmp, path)
+
+	_modules[key] = _import(path, module_name)
+	return _modules[key]
+
+def call(fn, args: list, params: dict):
+	"""
+	Call a generated kernel with positional args, passing only the
+	parameters it actually takes (kernels for different objects of the
+	same manifold need not share parameters).
+	"""
+
+	names = fn.__code__.co_varnames[:fn.__code__.co_argcount]
+	return fn(*args, **{k: v for k, v in params.items() if k in names})
+
+def _default_args(obj) -> list:
+	return list(obj.coordinates)
+
+def compile_expression(expr, args: list, defaults: dict=None, numba: bool=False, name: str="expression"):
+	spec = scalar_kernel(name, expr)
+	return getattr(build([spec], args, defaults, numba, name), spec.name)
+
+def compile_component(obj: spacetime.Definable, variant: str=None, indices: tuple=(), args: list=None, defaults: dict=None, numba: bool=False, name: str=None):
+	if name is None:
+		name = "{}_{}_{}".format(obj.name, variant or "value", "".join(map(str, indices)))
+	spec = component_kernel(name, obj, variant, indices)
+	args = args if args is not None else _default_args(obj)
+	return getattr(build([spec], args, defaults, numba, name), spec.name)
+
+def compile_tensor(obj, variant: str="co", args: list=None, defaults: dict=None, name: str=None):
+	if name is None:
+		name = "{}_{}".format(getattr(obj, "name", None) or "metric", variant)
+	spec = tensor_kernel(name, obj, variant)
+	args = args if args is not None else _default_args(obj)
+	return getattr(build([spec], args, defaults, False, name), spec.name)
@@ -0,0 +1,103 @@
+"""
+Batched index gymnastics on numeric tensors.
+
+The Tensor classes in sxl.spacetime raise, lower and mix indices,
+take traces and norms one component at a time with nested sums,
+which is what symbolic components need. For tensors whose
+components are float arrays over a grid (from sxl.codegen kernels or
+sxl.curvature) the same operations are single np.einsum calls over
+every point at once. Arrays are laid out grid first, as in
+sxl.curvature: a rank-2 tensor on an (X, Y) grid has shape
+(X, Y, n, n).
+
+The contraction order einsum picks with optimize="optimal" is worth
+having for the longer contractions (the Kretschmann scalar has six
+operands) but costly to search for on every call, so paths are
+computed once per subscripts and operand shapes and reused. For
+example,
+
+	g = contract.array(mf.metric_tensor, "co", T, R, Z, 0, defaults={"c": 1})
+	inverse = np.linalg.inv(g)
+	riemann = contract.array(mf.of(einstein.RiemannTensor), "co", T, R, Z, 0, defaults={"c": 1})
+	contract.kretschmann(riemann, inverse)
+"""
+
+import numpy as np
+from string import ascii_letters
+from sxl import codegen
+from sxl import spacetime
+
+_paths = {}
+
+def contract(subscripts: str, *operands) -> np.ndarray:
+	"""
+	np.einsum with the optimal contraction path, searched for once per
+	subscripts and operand shapes.
+	"""
+
+	key = (subscripts,) + tuple(np.shape(x) for x in operands)
+	if key not in _paths:
+		_paths[key] = np.einsum_path(subscripts, *operands, optimize="optimal")[0]
+	return np.einsum(subscripts, *operands, optimize=_paths[key])
+
+def _transform(T: np.ndarray, metric: np.ndarray, indices) -> np.ndarray:
+	rank = T.ndim - metric.ndim + 2
+	indices = range(rank) if indices is None else indices
+	out = ascii_letters[:rank]
+	inp = list(out)
+	operands = []
+	for k, i in enumerate(indices):
+		s = ascii_letters[rank + k]
+		inp[i] = s
+		operands.append("..." + out[i] + s)
+	subscripts = ",".join(operands + ["..." + "".join(inp)]) + "->..." + out
+	return contract(subscripts, *([metric] * len(operands)), T)
+
+def raise_index(T: np.ndarray, inverse: np.ndarray, indices: list=None) -> np.ndarray:
+	"""
+	Raise the given indices (by position; all of them by default) of T
+	with the inverse metric.
+	"""
+
+	return _transform(T, inverse, indices)
+
+def lower_index(T: np.ndarray, metric: np.ndarray, indices: list=None) -> np.ndarray:
+	return _transform(T, metric, indices)
+
+def mix_index(T: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+	"""
+	The mixed variant of a covariant tensor in the sense of
+	spacetime.Tensor.mixed: the first index raised.
+	"""
+
+	return _transform(T, inverse, [0])
+
+def trace(T: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+	return contract("...ij,...ij->...", inverse, T)
+
+def norm(v: np.ndarray, metric: np.ndarray) -> np.ndarray:
+	"""
+	g_ij v^i v^j of a contravariant vector, as Rank1Tensor.norm.
+	"""
+
+	return contract("...ij,...i,...j->...", metric, v, v)
+
+def kretschmann(riemann: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+	"""
+	R_abcd R^abcd from the covariant Riemann tensor.
+	"""
+
+	return contract("...abcd,...ae,...bf,...cg,...dh,...efgh->...", riemann, inverse, inverse, inverse, inverse, riemann)
+
+def array(obj, variant: str, *x, defaults: dict=None, **params) -> np.ndarray:
+	"""
+	Evaluate a solved tensor (or the metric) at points x through a
+	generated kernel, laid out grid first.
+	"""
+
+	kernel = codegen.compile_tensor(obj, variant, defaults=defaults)
+	values = codegen.call(kernel, list(x), params)
+	rank = 2 if isinstance(obj, spacetime.MetricTensor) else obj.rank
+	shape = np.broadcast(*x, 0.0).shape
+	values = np.broadcast_to(values, values.shape[:rank] + shape)
+	return np.moveaxis(values, tuple(range(rank)), tuple(range(-rank, 0)))
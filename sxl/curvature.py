@@ -0,0 +1,363 @@
+"""
+Numeric curvature of metrics sampled on coordinate grids.
+
+The symbolic pipeline in sxl.einstein has no use for a metric built
+from a profile function with no closed form (fr, gr, Function("H") in
+test.py): it either returns unevaluated derivatives or grinds through
+simplify on enormous expressions. Here the metric is only ever a
+NumPy array over a grid of points, and everything is computed from
+it and its first and second coordinate derivatives,
+
+	g_ab,	d_c g_ab,	d_c d_d g_ab
+
+as batched einsum contractions. The Christoffel symbols, Riemann,
+Ricci and Einstein tensors and the SEM tensor use the same index
+conventions as their symbolic counterparts in sxl.einstein, so the
+two can be compared component for component. Every result is an
+array of shape grid + (n,) * rank.
+
+NumericMetric does the contractions; subclasses only say where the
+derivatives come from. FiniteDifferenceMetric takes them by central
+differences of a chosen (even) order, one-sided near the edges of
+the grid. For example,
+
+	fd = curvature.FiniteDifferenceMetric.from_manifold(mf, [0, np.linspace(-3, 3, 201), 0, np.linspace(-3, 3, 201)], functions={"H": profile}, defaults={"c": 1})
+	fd.stress_energy("contra")[..., 0, 0]
+
+gives T^00 on the (x, z) plane at t = y = 0. Coordinates given as a
+single value are held fixed there; derivatives along them are still
+taken, on a small stencil around the value, unless the metric does
+not depend on them at all.
+"""
+
+import numpy as np
+from math import factorial
+from sympy import lambdify
+from sympy import Matrix
+from sympy import Symbol
+from sympy import pi
+from sympy.core.function import AppliedUndef
+from sxl import codegen
+from sxl import contract
+from sxl import spacetime
+
+class CurvatureError(Exception):
+	pass
+
+# ===== METRIC FUNCTIONS ===== #
+
+def metric_components(manifold: spacetime.Manifold, functions: dict=None, defaults: dict=None):
+	"""
+	The covariant metric of a manifold, lambdified: f(*coords, **params)
+	returns the components as nested lists, each a scalar or whatever
+	the arithmetic and NumPy functions in it make of the arguments
+	(arrays, or the hyper-dual numbers of sxl.autodiff). Metrics built
+	from undefined functions (Function("H") and the like) need a NumPy
+	implementation of each in functions, by name.
+	"""
+
+	coordinates = list(manifold.coordinates)
+	m = Matrix(manifold.metric_tensor.co())
+	undefined = {f.func.__name__ for f in m.atoms(AppliedUndef)}
+	missing = sorted(undefined - set(functions or {}))
+	if missing:
+		raise CurvatureError("The metric uses the undefined function(s) {}; give a NumPy implementation of each in functions.".format(", ".join(missing)))
+	m = m.subs({Symbol(k) if type(k) == str else k: v for k, v in (defaults or {}).items()})
+	params = sorted(m.free_symbols - set(coordinates), key=lambda x: x.name)
+	f = lambdify(coordinates + params, m.tolist(), modules=[functions or {}, "numpy"])
+
+	def evaluate(*x, **values):
+		absent = [p.name for p in params if p.name not in values]
+		if absent:
+			raise CurvatureError("No value for the metric parameter(s) {}.".format(", ".join(absent)))
+		return f(*x, *[values[p.name] for p in params])
+	return evaluate
+
+def broadcast_components(entries, shape: tuple) -> np.ndarray:
+	"""
+	Nested (n, n) components, scalars or arrays, as one (n, n) + shape
+	array.
+	"""
+
+	n = len(entries)
+	return np.array([[np.broadcast_to(entries[a][b], shape) for b in range(n)] for a in range(n)], dtype=float)
+
+def metric_function(manifold: spacetime.Manifold, functions: dict=None, defaults: dict=None):
+	"""
+	The covariant metric of a manifold as a NumPy function f(*coords,
+	**params) returning an (n, n) + broadcast array. Metrics without
+	undefined functions go through (and are cached by) sxl.codegen;
+	the others are lambdified as in metric_components.
+	"""
+
+	metric = manifold.metric_tensor
+	if len(Matrix(metric.co()).atoms(AppliedUndef)) == 0:
+		kernel = codegen.compile_tensor(metric, "co", defaults=defaults)
+		return lambda *x, **params: codegen.call(kernel, list(x), params)
+
+	components = metric_components(manifold, functions, defaults)
+	return lambda *x, **params: broadcast_components(components(*x, **params), np.broadcast(*x, 0.0).shape)
+
+# ===== CONTRACTIONS ===== #
+
+class NumericMetric:
+
+	"""
+	Curvature from a metric on a grid. Subclasses implement
+	derivatives(), which returns (g, dg, ddg) of shapes grid + (n, n),
+	grid + (n, n, n) and grid + (n, n, n, n), with
+
+		dg[..., c, a, b] = d_c g_ab,	ddg[..., c, d, a, b] = d_c d_d g_ab.
+
+	Results are computed on first use and kept.
+	"""
+
+	def __init__(self, dimension: int, shape: tuple):
+		self.dimension = dimension
+		self.shape = tuple(shape)
+		self._cache = {}
+
+	def __dim__(self):
+		return self.dimension
+
+	def __repr__(self):
+		return "<{} of dimension {} on a {} grid>".format(type(self).__name__, self.dimension, "x".join(map(str, self.shape)) or "single-point")
+
+	def derivatives(self) -> tuple:
+		raise NotImplementedError("How did you manage to use this method?")
+
+	def _get(self, key: str, compute):
+		if key not in self._cache:
+			self._cache[key] = compute()
+		return self._cache[key]
+
+	def _derivatives(self) -> tuple:
+		return self._get("derivatives", self.derivatives)
+
+	def metric(self, variant: str="co") -> np.ndarray:
+		if variant == "co":
+			return self._derivatives()[0]
+		if variant == "contra":
+			return self._get("inverse", lambda: np.linalg.inv(self._derivatives()[0]))
+		raise ValueError("Unknown variant \"{}\" of the metric (expected co or contra).".format(variant))
+
+	def christoffel(self) -> np.ndarray:
+		"""
+		Gamma^i_jk = g^il (d_k g_lj + d_j g_lk - d_l g_jk) / 2.
+		"""
+
+		def compute():
+			_, dg, _ = self._derivatives()
+			first = (np.einsum("...jlk->...ljk", dg) + np.einsum("...klj->...ljk", dg) - dg) / 2
+			return np.einsum("...il,...ljk->...ijk", self.metric("contra"), first)
+		return self._get("christoffel", compute)
+
+	def christoffel_derivative(self) -> np.ndarray:
+		"""
+		d_m Gamma^i_jk, indexed [..., m, i, j, k].
+		"""
+
+		def compute():
+			_, dg, ddg = self._derivatives()
+			inverse = self.metric("contra")
+			first = (np.einsum("...jlk->...ljk", dg) + np.einsum("...klj->...ljk", dg) - dg) / 2
+			dfirst = (np.einsum("...mjlk->...mljk", ddg) + np.einsum("...mklj->...mljk", ddg) - ddg) / 2
+			dinverse = -contract.contract("...ia,...mab,...bl->...mil", inverse, dg, inverse)
+			return np.einsum("...mil,...ljk->...mijk", dinverse, first) + np.einsum("...il,...mljk->...mijk", inverse, dfirst)
+		return self._get("christoffel_derivative", compute)
+
+	def riemann(self, variant: str="mixed") -> np.ndarray:
+		"""
+		R^i_jkl = d_k Gamma^i_lj - d_l Gamma^i_kj + Gamma^i_km Gamma^m_lj - Gamma^i_lm Gamma^m_kj,
+		or R_ijkl with variant="co".
+		"""
+
+		def compute():
+			gamma = self.christoffel()
+			a = np.einsum("...kilj->...ijkl", self.christoffel_derivative())
+			b = np.einsum("...ikm,...mlj->...ijkl", gamma, gamma)
+			r = a + b
+			return r - np.swapaxes(r, -1, -2)
+		mixed = self._get("riemann", compute)
+		if variant == "mixed":
+			return mixed
+		if variant == "co":
+			return self._get("riemann_co", lambda: contract.lower_index(mixed, self.metric(), [0]))
+		raise ValueError("Unknown variant \"{}\" of the Riemann tensor (expected mixed or co).".format(variant))
+
+	def ricci(self, variant: str="co") -> np.ndarray:
+		"""
+		R_ij = R^k_ikj.
+		"""
+
+		return self._variant("ricci", lambda: np.einsum("...kikj->...ij", self.riemann()), variant)
+
+	def ricci_scalar(self) -> np.ndarray:
+		return self._get("ricci_scalar", lambda: contract.trace(self.ricci(), self.metric("contra")))
+
+	def einstein(self, variant: str="co") -> np.ndarray:
+		# The same combination as sxl.einstein.EinsteinTensor, so that the
+		# numeric and symbolic results agree.
+		return self._variant("einstein", lambda: self.ricci() + self.ricci_scalar()[..., None, None] * self.metric() / 2, variant)
+
+	def stress_energy(self, variant: str="co", G: float=1.0, c: float=1.0, cosmological: float=0.0) -> np.ndarray:
+		"""
+		T = (G + Lambda g) / kappa with kappa = 8 pi G / c^4, as in
+		sxl.einstein.StressEnergyMomentumTensor.
+		"""
+
+		kappa = 8 * float(pi) * G / c**4
+		key = "stress_energy {!r} {!r} {!r}".format(G, c, cosmological)
+		return self._variant(key, lambda: (self.einstein() + cosmological * self.metric()) / kappa, variant)
+
+	def kretschmann(self) -> np.ndarray:
+		return self._get("kretschmann", lambda: contract.kretschmann(self.riemann("co"), self.metric("contra")))
+
+	def _variant(self, key: str, compute, variant: str) -> np.ndarray:
+		co = self._get(key, compute)
+		if variant == "co":
+			return co
+		inverse = self.metric("contra")
+		if variant == "contra":
+			return self._get(key + " contra", lambda: contract.raise_index(co, inverse))
+		if variant == "mixed":
+			return self._get(key + " mixed", lambda: contract.mix_index(co, inverse))
+		raise ValueError("Unknown variant \"{}\" (expected co, contra or mixed).".format(variant))
+
+	def clear(self) -> None:
+		"""
+		Forget everything computed so far (to free memory).
+		"""
+
+		self._cache = {}
+
+# ===== FINITE DIFFERENCES ===== #
+
+def stencil(offsets, derivative: int) -> np.ndarray:
+	"""
+	Weights w such that sum(w[j] f(x + offsets[j] h)) / h^derivative
+	approximates the derivative of f at x, to order len(offsets) -
+	derivative.
+	"""
+
+	offsets = np.asarray(offsets, dtype=float)
+	k = np.arange(len(offsets))
+	b = np.zeros(len(offsets))
+	b[derivative] = factorial(derivative)
+	return np.linalg.solve(offsets[None, :] ** k[:, None], b)
+
+def difference(f: np.ndarray, axis: int, h: float, derivative: int=1, order: int=4) -> np.ndarray:
+	"""
+	A first or second derivative along one axis of a uniformly spaced
+	array, by central differences of the given even order in the
+	interior and one-sided differences of the same order at the edges.
+	"""
+
+	if order % 2 != 0 or order < 2:
+		raise CurvatureError("The order of finite differences must be even and at least 2, got {}.".format(order))
+	N = f.shape[axis]
+	width = order + derivative
+	if N < width:
+		raise CurvatureError("{} points along an axis are too few for order-{} differences (need {}).".format(N, order, width))
+
+	f = np.moveaxis(f, axis, 0)
+	out = np.empty(f.shape)
+	half = order // 2
+	for o, w in zip(range(-half, half + 1), stencil(np.arange(-half, half + 1), derivative)):
+		if w != 0:
+			part = w * f[half + o:N - half + o]
+			out[half:N - half] = part if o == -half else out[half:N - half] + part
+	for i in range(half):
+		out[i] = np.tensordot(stencil(np.arange(width) - i, derivative), f[:width], axes=1)
+		out[N - 1 - i] = np.tensordot(stencil(np.arange(N - width, N) - (N - 1 - i), derivative), f[N - width:], axes=1)
+	return np.moveaxis(out, 0, axis) / h**derivative
+
+class FiniteDifferenceMetric(NumericMetric):
+
+	"""
+	A metric sampled on a uniform grid: g has shape grid + (n, n) and
+	spacing gives, for each of the n coordinates, either the grid
+	spacing along it (one grid axis per such coordinate, in order) or
+	None if the metric does not depend on it.
+	"""
+
+	def __init__(self, g, spacing: list, order: int=4):
+		g = np.asarray(g, dtype=float)
+		n = g.shape[-1]
+		if len(spacing) != n or g.shape[-2] != n:
+			raise CurvatureError("A metric of dimension {} needs {} spacings, got {}.".format(n, n, len(spacing)))
+		axes = [i for i, h in enumerate(spacing) if h is not None]
+		if g.ndim != len(axes) + 2:
+			raise CurvatureError("The metric has {} grid axes but {} coordinates have a spacing.".format(g.ndim - 2, len(axes)))
+		self.g = g
+		self.spacing = list(spacing)
+		self.order = order
+		self._axes = axes
+		self._crop = (slice(None),) * len(axes)
+		NumericMetric.__init__(self, n, g.shape[:-2])
+
+	@classmethod
+	def from_function(cls, f, axes: list, order: int=4, step: float=1e-2, independent: list=(), **params) -> "FiniteDifferenceMetric":
+		"""
+		Sample f(*coords, **params) on a grid; f returns either an (n, n)
+		+ broadcast array or nested (n, n) components.
+		Each entry of axes is either a uniformly spaced 1D array of
+		values of that coordinate or a single value to hold it at; the
+		grid is made of the arrays, in order. Fixed coordinates listed
+		in independent (by index) are ones the metric does not depend
+		on, so no derivatives are taken along them.
+		"""
+
+		n = len(axes)
+		values, spacing, crop, shape = [], [], [], []
+		half = order // 2
+		for i, axis in enumerate(axes):
+			if np.ndim(axis) == 0 and i in independent:
+				values.append(np.array([float(axis)]))
+				spacing.append(None)
+			elif np.ndim(axis) == 0:
+				values.append(float(axis) + step * np.arange(-half - 1, half + 2))
+				spacing.append(step)
+				crop.append(half + 1)
+			else:
+				axis = np.asarray(axis, dtype=float)
+				h = (axis[-1] - axis[0]) / (len(axis) - 1) if len(axis) > 1 else 0.0
+				if len(axis) < 2 or not np.allclose(np.diff(axis), h, rtol=1e-6, atol=0):
+					raise CurvatureError("Coordinate {} is not sampled uniformly.".format(i))
+				values.append(axis)
+				spacing.append(h)
+				crop.append(slice(None))
+				shape.append(len(axis))
+
+		grid = np.meshgrid(*values, indexing="ij")
+		with np.errstate(all="ignore"):
+			g = f(*grid, **params)
+		g = np.broadcast_to(g, (n, n) + grid[0].shape) if isinstance(g, np.ndarray) else broadcast_components(g, grid[0].shape)
+		g = np.moveaxis(g, (0, 1), (-2, -1))
+		g = g.reshape(tuple(len(v) for i, v in enumerate(values) if spacing[i] is not None) + (n, n))
+		metric = cls(g, spacing, order)
+		metric._crop = tuple(crop)
+		metric.shape = tuple(shape)
+		return metric
+
+	@classmethod
+	def from_manifold(cls, manifold: spacetime.Manifold, axes: list, order: int=4, step: float=1e-2, functions: dict=None, defaults: dict=None, **params) -> "FiniteDifferenceMetric":
+		m = Matrix(manifold.metric_tensor.co())
+		independent = [i for i, x in enumerate(manifold.coordinates) if not m.has(x)]
+		return cls.from_function(metric_function(manifold, functions, defaults), axes, order, step, independent, **params)
+
+	def derivatives(self) -> tuple:
+		n = self.dimension
+		g = self.g
+		grid = g.shape[:-2]
+		dg = np.zeros(grid + (n, n, n))
+		ddg = np.zeros(grid + (n, n, n, n))
+		first = {}
+		for axis, c in enumerate(self._axes):
+			first[c] = difference(g, axis, self.spacing[c], 1, self.order)
+			dg[..., c, :, :] = first[c]
+		for axis, c in enumerate(self._axes):
+			ddg[..., c, c, :, :] = difference(g, axis, self.spacing[c], 2, self.order)
+			for d in self._axes[axis + 1:]:
+				ddg[..., c, d, :, :] = ddg[..., d, c, :, :] = difference(first[c], self._axes.index(d), self.spacing[d], 1, self.order)
+		return g[self._crop], dg[self._crop], ddg[self._crop]
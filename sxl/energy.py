@@ -0,0 +1,262 @@
+"""
+Numerical energy-condition scanning of solved SEM tensors.
+
+Rather than judging from contour plots of T^00 where a metric needs
+exotic matter, the scanner compiles T_{mu nu} and the metric into
+NumPy kernels (through sxl.codegen), evaluates them over a
+coordinate grid in chunks, and diagonalizes T^mu_nu = g^{mu a} T_{a nu}
+at every grid point with one batched eigenvalue solve. At points
+where T is of Hawking-Ellis type I (real eigenvalues, one timelike
+eigenvector) this gives the energy density rho and principal
+pressures p_i, from which
+
+	null		rho + p_i >= 0
+	weak		rho >= 0 and the null condition
+	strong		rho + sum(p_i) >= 0 and the null condition
+	dominant	rho >= |p_i|
+
+are checked. Each condition gets a margin (the smallest of the left
+hand sides above), so that violations can be located, ranked and
+integrated over proper volume. Coordinates named in scan() are
+either swept, given as (lo, hi, n) or an array, or held fixed; all
+other keywords are parameters of the metric. For example,
+
+	scanner = energy.EnergyConditionScanner(mf, defaults={"c": 1, "G": 1})
+	report = scanner.scan(t=0, x=(-3, 3, 400), y=(-3, 3, 400), z=0, V=1)
+	print(report)
+	report.violated("weak")
+"""
+
+import numpy as np
+from sxl import codegen
+from sxl import einstein
+from sxl import geodesics
+from sxl import spacetime
+from sxl import util
+from sxl.spacetime import dim
+
+CONDITIONS = ("null", "weak", "strong", "dominant")
+
+class EnergyConditionError(Exception):
+	pass
+
+def decompose(T: np.ndarray, g: np.ndarray, g_inv: np.ndarray, sign: int, tol: float=1e-9) -> tuple:
+	"""
+	Split a batch of stress-energy tensors T_{ab} (shape (N, n, n)) into
+	energy density and principal pressures.
+
+	sign is the sign of g(u, u) for a timelike u: +1 for (+---), -1 for
+	(-+++). Returns (rho, pressures, type_i), where pressures has shape
+	(N, n - 1) and type_i marks the points where T is diagonalizable
+	with real eigenvalues and a timelike eigenvector; rho and the
+	pressures are NaN elsewhere.
+	"""
+
+	mixed = np.einsum("...ab,...bc->...ac", g_inv, T)
+	finite = np.all(np.isfinite(mixed), axis=(1, 2))
+	mixed[~finite] = 0
+
+	w, v = np.linalg.eig(mixed)
+	scale = 1 + np.max(np.abs(w), axis=1)
+	real = np.all(np.abs(w.imag) <= tol * scale[:, None], axis=1)
+	w, v = w.real, v.real
+
+	norms = np.einsum("nai,nab,nbi->ni", v, g, v) / np.maximum(np.einsum("nai,nai->ni", v, v), 1e-300)
+	time = np.argmax(sign * norms, axis=1)
+	timelike = sign * norms[np.arange(len(w)), time] > tol
+
+	rho = sign * w[np.arange(len(w)), time]
+	others = np.ones(w.shape, dtype=bool)
+	others[np.arange(len(w)), time] = False
+	pressures = (-sign * w[others]).reshape(len(w), w.shape[1] - 1)
+
+	type_i = finite & real & timelike
+	rho[~type_i] = np.nan
+	pressures[~type_i] = np.nan
+	return rho, pressures, type_i
+
+def margins(rho: np.ndarray, pressures: np.ndarray) -> dict:
+	"""
+	The margin of every energy condition: nonnegative where the
+	condition holds, negative where it is violated.
+	"""
+
+	null = np.min(rho[..., None] + pressures, axis=-1)
+	return {
+		"null": null,
+		"weak": np.minimum(rho, null),
+		"strong": np.minimum(rho + np.sum(pressures, axis=-1), null),
+		"dominant": np.min(rho[..., None] - np.abs(pressures), axis=-1)
+	}
+
+class EnergyConditionReport:
+
+	"""
+	The result of a scan: rho, pressures and condition margins on the
+	grid (arrays of shape report.shape), plus the proper volume of
+	each grid cell over the swept coordinates. Margins above -atol
+	are not counted as violations, which keeps roundoff in vacuum
+	regions from showing up everywhere.
+	"""
+
+	def __init__(self, axes: dict, fixed: dict, rho, pressures, type_i, weights, atol: float=0.0):
+		self.axes = axes
+		self.atol = atol
+		self.fixed = fixed
+		self.shape = tuple(len(x) for x in axes.values())
+		self.rho = rho.reshape(self.shape)
+		self.pressures = pressures.reshape(self.shape + pressures.shape[-1:])
+		self.type_i = type_i.reshape(self.shape)
+		self.weights = weights.reshape(self.shape)
+		with np.errstate(invalid="ignore"):
+			self.margins = margins(self.rho, self.pressures)
+
+	def __repr__(self):
+		lines = ["Energy conditions over {} points ({} not type I):".format(self.rho.size, self.rho.size - int(np.count_nonzero(self.type_i)))]
+		for name, s in self.summary().items():
+			lines.append("\t{:<10}{:>10} violating ({:.2%}), volume {:.6g}, integrated {:.6g}, worst {:.6g}".format(
+				name, s["points"], s["fraction"], s["volume"], s["integrated"], s["worst"]))
+		return "\n".join(lines)
+
+	def violated(self, condition: str) -> np.ndarray:
+		if condition not in self.margins:
+			raise EnergyConditionError("Unknown energy condition \"{}\" (expected one of {}).".format(condition, ", ".join(CONDITIONS)))
+		with np.errstate(invalid="ignore"):
+			return self.margins[condition] < -self.atol
+
+	def summary(self) -> dict:
+		"""
+		For each condition: the number and fraction of violating points,
+		the proper volume they occupy, the integral of the (negative)
+		margin over that volume, and the most negative margin.
+		"""
+
+		r = {}
+		for name in CONDITIONS:
+			mask = self.violated(name)
+			m = self.margins[name][mask]
+			r[name] = {
+				"points": int(np.count_nonzero(mask)),
+				"fraction": float(np.count_nonzero(mask)) / self.rho.size,
+				"volume": float(np.sum(self.weights[mask])),
+				"integrated": float(np.sum(m * self.weights[mask])),
+				"worst": float(np.min(m)) if m.size > 0 else 0.0
+			}
+		return r
+
+	def regions(self, condition: str) -> tuple:
+		"""
+		Label the connected violating regions of a condition. Returns
+		(labels, boxes), where boxes maps each label to its bounding box
+		in coordinates as {name: (lo, hi)}. Needs scipy.
+		"""
+
+		try:
+			from scipy import ndimage
+		except ImportError:
+			raise EnergyConditionError("Labelling violating regions needs scipy (pip install scipy).")
+		labels, count = ndimage.label(self.violated(condition))
+		boxes = {}
+		for label, box in enumerate(ndimage.find_objects(labels), start=1):
+			boxes[label] = {name: (values[sl.start], values[sl.stop - 1]) for (name, values), sl in zip(self.axes.items(), box)}
+		return labels, boxes
+
+class EnergyConditionScanner:
+
+	"""
+	Compiles the SEM tensor of a manifold (StressEnergyMomentumTensor by
+	default; pass sem=einstein.ApproximateSEMTensor to drop the
+	cosmological constant) and the metric once, then scans grids.
+	"""
+
+	def __init__(self, manifold: spacetime.Manifold, sem: type=einstein.StressEnergyMomentumTensor, defaults: dict=None, chunk: int=262144, tol: float=1e-9, atol: float=0.0):
+		self.manifold = manifold
+		self.coordinates = [x.name for x in manifold.coordinates]
+		self.chunk = chunk
+		self.tol = tol
+		self.atol = atol
+		self.sign = None
+		metric = manifold.metric_tensor
+		self.sem = codegen.compile_tensor(manifold.of(sem), "co", defaults=defaults)
+		self.metric = codegen.compile_tensor(metric, "co", defaults=defaults, name="metric")
+		self.inverse = codegen.compile_tensor(metric, "contra", defaults=defaults, name="metric")
+
+	def _points(self, coordinates: list, params: dict) -> tuple:
+		n = dim(self.manifold)
+		shape = np.broadcast(*coordinates, 0.0).shape
+		count = int(np.prod(shape))
+
+		def batch(fn):
+			return np.moveaxis(np.broadcast_to(codegen.call(fn, coordinates, params), (n, n) + shape).reshape(n, n, count), -1, 0)
+
+		with np.errstate(all="ignore"):
+			return batch(self.sem), batch(self.metric), batch(self.inverse)
+
+	def evaluate(self, *coordinates, **params) -> tuple:
+		"""
+		rho, pressures and type-I mask at arbitrary (broadcastable)
+		coordinate arrays, flattened.
+		"""
+
+		T, g, g_inv = self._points([np.asarray(x, dtype=float) for x in coordinates], params)
+		if self.sign is None:
+			self.sign = geodesics.signature(g)
+		return decompose(T, g, g_inv, self.sign, self.tol)
+
+	def scan(self, **kwargs) -> EnergyConditionReport:
+		"""
+		Scan a grid. Every coordinate of the manifold must be given,
+		either as a fixed value, an array of values or a (lo, hi, n)
+		range; remaining keywords are passed to the kernels as
+		parameters.
+		"""
+
+		axes, fixed = {}, {}
+		for name in self.coordinates:
+			if name not in kwargs:
+				raise EnergyConditionError("No value or range given for coordinate \"{}\".".format(name))
+			value = kwargs.pop(name)
+			if type(value) == tuple:
+				axes[name] = np.linspace(*value)
+			elif np.ndim(value) > 0:
+				axes[name] = np.asarray(value, dtype=float)
+			else:
+				fixed[name] = float(value)
+		params = kwargs
+
+		grids = dict(zip(axes, np.meshgrid(*axes.values(), indexing="ij")))
+		shape = tuple(len(x) for x in axes.values())
+		count = int(np.prod(shape))
+		flat = {name: grids[name].ravel() if name in grids else fixed[name] for name in self.coordinates}
+
+		rho = np.empty(count)
+		pressures = np.empty((count, dim(self.manifold) - 1))
+		type_i = np.empty(count, dtype=bool)
+		weights = np.empty(count)
+
+		# Coordinate volume of each cell, for the swept coordinates only.
+		cell = np.ones(shape)
+		for i, values in enumerate(axes.values()):
+			spacing = np.abs(np.gradient(values)) if len(values) > 1 else np.ones(1)
+			cell = cell * spacing.reshape([-1 if j == i else 1 for j in range(len(shape))])
+		cell = cell.ravel()
+		swept = [self.coordinates.index(name) for name in axes]
+
+		chunks = range(0, count, self.chunk)
+		with util.ProgressBar("Scanning energy conditions", len(chunks)) as pb:
+			for start in chunks:
+				stop = min(start + self.chunk, count)
+				coordinates = [x[start:stop] if np.ndim(x) > 0 else x for x in flat.values()]
+				T, g, g_inv = self._points(coordinates, params)
+				if self.sign is None:
+					self.sign = geodesics.signature(g)
+				rho[start:stop], pressures[start:stop], type_i[start:stop] = decompose(T, g, g_inv, self.sign, self.tol)
+				with np.errstate(invalid="ignore"):
+					induced = np.abs(np.linalg.det(g[:, swept][:, :, swept])) if swept else np.ones(stop - start)
+					weights[start:stop] = np.sqrt(induced) * cell[start:stop]
+				pb.done()
+
+		return EnergyConditionReport(axes, fixed, rho, pressures, type_i, weights, self.atol)
+
+def scan(manifold: spacetime.Manifold, sem: type=einstein.StressEnergyMomentumTensor, defaults: dict=None, **kwargs) -> EnergyConditionReport:
+	return EnergyConditionScanner(manifold, sem, defaults).scan(**kwargs)
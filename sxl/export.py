@@ -0,0 +1,271 @@
+"""
+Streaming export and import of solved definables.
+
+Results are written one component per record, so that a rank-4
+tensor in a high-dimensional manifold never has to be held in
+memory as a pile of pretty-printed strings. Each record carries
+the definable's name, the index variant (co/contra/mixed, or
+value for scalars), the index tuple and the expression as an
+srepr string, which round-trips exactly through sympify.
+
+Two container formats are supported, both gzip-compressed:
+
+	*.jsonl.gz		one JSON object per line (default)
+	*.msgpack.gz	a stream of msgpack maps (needs msgpack)
+
+An Exporter can be attached to a Manifold so that every object
+is written out as soon as it is computed:
+
+	with export.Exporter("schwarzschild.jsonl.gz", mf):
+		mf.define(einstein.EinsteinFieldEquationsParts)
+
+and load() streams a file back into a fresh Manifold without
+recomputing anything.
+"""
+
+import gzip
+import json
+import importlib
+from sympy import srepr
+from sympy import sympify
+from sympy.printing.numpy import NumPyPrinter
+from sxl import spacetime
+from sxl import util
+from sxl.spacetime import dim
+
+FORMAT_VERSION = 1
+
+JSONL = "jsonl"
+MSGPACK = "msgpack"
+
+VARIANTS = ("co", "contra", "mixed")
+
+class ExportFormatError(Exception):
+	pass
+
+def guess_format(path: str) -> str:
+	if ".msgpack" in path or ".mpk" in path:
+		return MSGPACK
+	return JSONL
+
+def _msgpack():
+	try:
+		import msgpack
+	except ImportError:
+		raise ExportFormatError("The msgpack format needs the msgpack package (pip install msgpack).")
+	return msgpack
+
+def _qualified_name(obj) -> str:
+	return type(obj).__module__ + "." + type(obj).__qualname__
+
+def _resolve(qualified_name: str) -> type:
+	module, _, name = qualified_name.rpartition(".")
+	return getattr(importlib.import_module(module), name)
+
+class RecordWriter:
+
+	"""
+	Writes records to a compressed stream, one at a time.
+	"""
+
+	def __init__(self, path: str, fmt: str=None):
+		self.path = path
+		self.format = fmt if fmt is not None else guess_format(path)
+		self.stream = gzip.open(path, "wb")
+		if self.format == MSGPACK:
+			self.packer = _msgpack().Packer()
+		elif self.format != JSONL:
+			raise ExportFormatError("Unknown export format \"{}\".".format(self.format))
+
+	def write(self, record: dict) -> None:
+		if self.format == MSGPACK:
+			self.stream.write(self.packer.pack(record))
+		else:
+			self.stream.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+
+	def close(self) -> None:
+		self.stream.close()
+
+def read_records(path: str, fmt: str=None):
+	"""
+	Iterate over the records in an exported file without reading
+	the whole thing into memory.
+	"""
+
+	fmt = fmt if fmt is not None else guess_format(path)
+	with gzip.open(path, "rb") as stream:
+		if fmt == MSGPACK:
+			for record in _msgpack().Unpacker(stream, raw=False):
+				yield record
+		elif fmt == JSONL:
+			for line in stream:
+				if line.strip():
+					yield json.loads(line)
+		else:
+			raise ExportFormatError("Unknown export format \"{}\".".format(fmt))
+
+class Exporter:
+
+	"""
+	Streams the definables of a manifold to disk.
+
+	If code is True, each record also gets a "code" field holding
+	NumPy source for the expression, for consumers that only want
+	to evaluate it and never need the symbolic form. If solve is
+	True, every index variant of a tensor is filled in (raising and
+	lowering indices as needed) before it is written; otherwise only
+	the components that have actually been computed are exported.
+	"""
+
+	def __init__(self, path: str, manifold: spacetime.Manifold, fmt: str=None, code: bool=False, solve: bool=False):
+		self.path = path
+		self.manifold = manifold
+		self.format = fmt
+		self.code = code
+		self.solve = solve
+		self.writer = None
+		self.written = set()
+		self.printer = NumPyPrinter()
+
+	def __enter__(self):
+		self.open()
+		self.manifold.exporter = self
+		return self
+
+	def __exit__(self, _, __, ___):
+		if self.manifold.exporter is self:
+			self.manifold.exporter = None
+		self.close()
+
+	def open(self) -> None:
+		self.writer = RecordWriter(self.path, self.format)
+		self.writer.write({
+			"type": "manifold",
+			"version": FORMAT_VERSION,
+			"dimension": dim(self.manifold),
+			"coordinates": [x.name for x in self.manifold.coordinates]
+		})
+		self._write_metric(self.manifold.metric_tensor)
+
+	def close(self) -> None:
+		if self.writer is not None:
+			self.writer.close()
+			self.writer = None
+
+	def _component(self, name: str, variant: str, indices, expr) -> None:
+		record = {
+			"type": "component",
+			"name": name,
+			"variant": variant,
+			"indices": list(indices),
+			"expr": srepr(sympify(expr))
+		}
+		if self.code:
+			record["code"] = self.printer.doprint(expr)
+		self.writer.write(record)
+
+	def _write_metric(self, metric: spacetime.MetricTensor) -> None:
+		self.writer.write({"type": "metric"})
+		for mu, nu in util.allind(2, dim(metric)):
+			self._component("metric", "co", (mu, nu), metric.co(mu, nu))
+			self._component("metric", "contra", (mu, nu), metric.contra(mu, nu))
+
+	def write(self, obj: spacetime.Definable) -> None:
+		"""
+		Write out every known component of a definable.
+		"""
+
+		if self.writer is None:
+			raise ExportFormatError("Exporter is not open.")
+		if obj.name in self.written:
+			return
+
+		self.writer.write({
+			"type": "definable",
+			"name": obj.name,
+			"class": _qualified_name(obj),
+			"rank": getattr(obj, "rank", 0)
+		})
+
+		if isinstance(obj, spacetime.Scalar):
+			if obj.value is not None:
+				self._component(obj.name, "value", (), obj.value)
+		else:
+			if self.solve:
+				obj.solve()
+			for variant in VARIANTS:
+				ls = getattr(obj, "tensor_" + variant)
+				if ls is None:
+					continue
+				for indices in util.allind(obj.rank, dim(obj)):
+					r = obj._extract(ls, *indices)
+					if r is not None:
+						self._component(obj.name, variant, indices, r)
+
+		self.written.add(obj.name)
+
+	def write_all(self) -> None:
+		for name, obj in self.manifold.definitions.items():
+			if name != "metric":
+				self.write(obj)
+
+def dump(manifold: spacetime.Manifold, path: str, fmt: str=None, code: bool=False, solve: bool=False) -> None:
+	"""
+	Export everything currently defined on a manifold.
+	"""
+
+	exporter = Exporter(path, manifold, fmt, code, solve)
+	exporter.open()
+	try:
+		exporter.write_all()
+	finally:
+		exporter.close()
+
+def _assign(ls, indices, value) -> None:
+	for i in indices[:-1]:
+		ls = ls[i]
+	ls[indices[-1]] = value
+
+def load(path: str, fmt: str=None) -> spacetime.Manifold:
+	"""
+	Rebuild a Manifold (metric and all exported definables) from an
+	exported file. Nothing is recomputed; components that were not
+	exported are left as None and will be derived on demand as usual.
+	"""
+
+	coordinates = None
+	n = None
+	metric = {"co": None, "contra": None}
+	manifold = None
+	objects = {}
+
+	for record in read_records(path, fmt):
+		kind = record["type"]
+
+		if kind == "manifold":
+			if record["version"] > FORMAT_VERSION:
+				raise ExportFormatError("File was written by a newer version of sxl.export (format {}).".format(record["version"]))
+			coordinates = spacetime.Coordinates(*record["coordinates"])
+			n = record["dimension"]
+			metric = {"co": util.blank(2, n), "contra": util.blank(2, n)}
+
+		elif kind == "definable":
+			if manifold is None:
+				manifold = spacetime.Manifold(spacetime.MetricTensor(metric["co"], coordinates, metric["contra"]))
+			obj = _resolve(record["class"])(manifold.metric_tensor)
+			manifold.definitions[record["name"]] = objects[record["name"]] = obj
+
+		elif kind == "component":
+			value = sympify(record["expr"])
+			if record["name"] == "metric":
+				_assign(metric[record["variant"]], record["indices"], value)
+			elif record["variant"] == "value":
+				objects[record["name"]].value = value
+			else:
+				_assign(getattr(objects[record["name"]], "tensor_" + record["variant"]), record["indices"], value)
+
+	if coordinates is None:
+		raise ExportFormatError("No manifold header found in \"{}\".".format(path))
+	if manifold is None:
+		manifold = spacetime.Manifold(spacetime.MetricTensor(metric["co"], coordinates, metric["contra"]))
+	return manifold
@@ -1,27 +1,217 @@
-from abc import ABC 
+from abc import ABC
 from abc import abstractmethod
+import numpy as np
+from sympy import diff
+from sympy import Symbol
+from sympy import sympify
+from sxl import codegen
+from sxl import util
+from sxl.spacetime import dim
 from sxl.spacetime import Scalar
-from sxl.spacetime import Tensor
 from sxl.spacetime import Vector
 from sxl.spacetime import Tensor2
 from sxl.spacetime import Tensor3
 from sxl.spacetime import Manifold
 
+"""
+Non-gravitational forces on observer ensembles.
+
+Every field gives the force it exerts per unit coupling on an
+observer with proper velocity u, symbolically, as a vector f^mu in
+the coordinates and the components of u:
+
+	(spin 0)	f^mu = h^{mu nu} d_nu phi,		h^{mu nu} = g^{mu nu} - u^mu u^nu / g(u, u)
+	(spin 1)	f^mu = F^mu_nu u^nu
+	(spin 2)	f^mu = T^mu_nu,rho u^nu u^rho
+
+(the projection h keeps the scalar force orthogonal to u, so proper
+velocities stay normalized). A FieldTheory collects fields and
+compiles the proper acceleration
+
+	a^mu = sum over fields of (coupling / m) f^mu
+
+into a single kernel, once, whose arguments are the coordinates, the
+components of u and each observer's couplings and mass. Applying it
+to an ensemble is one call however many observers there are:
+
+	em = fieldtheory.AbelianVectorField(mf, [-Q / r, 0, 0, 0], "q")
+	theory = fieldtheory.FieldTheory(em, defaults={"Q": 1})
+	ensemble.evolve(100, 1000, forces=[theory])
+"""
+
+class FieldError(Exception):
+	pass
+
+def _velocity(n: int) -> list[Symbol]:
+	return [Symbol("u_{}".format(i)) for i in range(n)]
 
 class Field(ABC):
 
 	spin: int
 	manifold: Manifold
+	coupling: str
+
+	def __init__(self, manifold: Manifold, coupling: str):
+		self.manifold = manifold
+		self.coupling = coupling
 
 	@abstractmethod
-	def force(self, coupling, four_velocity: Vector, four_position: Vector):
+	def force(self, u: list[Symbol]) -> list:
 		raise NotImplementedError("How did you manage to use this method?")
 
 class ScalarField(Field):
 
 	spin = 0
 
-	def __init__(self, field: Scalar) -> None:
-		self.field = field
+	def __init__(self, manifold: Manifold, field, coupling: str="g") -> None:
+		Field.__init__(self, manifold, coupling)
+		self.field = field.value if isinstance(field, Scalar) else sympify(field)
+
+	def force(self, u: list[Symbol]) -> list:
+		n = dim(self.manifold)
+		metric = self.manifold.metric_tensor
+		gradient = [diff(self.field, self.manifold.coordinates.x(nu)) for nu in range(n)]
+		raised = [sum(metric.contra(mu, nu) * gradient[nu] for nu in range(n)) for mu in range(n)]
+		along = sum(u[nu] * gradient[nu] for nu in range(n))
+		norm = sum(metric.co(a, b) * u[a] * u[b] for a, b in util.allind(2, n) if sympify(metric.co(a, b)) != 0)
+		return [raised[mu] - u[mu] * along / norm for mu in range(n)]
+
+class VectorField(Field):
+
+	"""
+	A spin-1 field given by its field-strength tensor F (anything with
+	mixed(mu, nu) = F^mu_nu, such as a Rank2Tensor).
+	"""
+
+	spin = 1
+
+	def __init__(self, manifold: Manifold, tensor: Tensor2, coupling: str="q") -> None:
+		Field.__init__(self, manifold, coupling)
+		self.tensor = tensor
+
+	def strength(self, mu: int, nu: int):
+		return self.tensor.mixed(mu, nu)
+
+	def force(self, u: list[Symbol]) -> list:
+		n = dim(self.manifold)
+		f = []
+		for mu in range(n):
+			f.append(sum(self.strength(mu, nu) * u[nu] for nu in range(n) if sympify(self.strength(mu, nu)) != 0))
+		return f
+
+class AbelianVectorField(VectorField):
+
+	"""
+	A spin-1 field given by its potential A_mu (a Vector, or a list of
+	covariant components), with F_mu_nu = d_mu A_nu - d_nu A_mu, which
+	is computed and raised once.
+	"""
+
+	def __init__(self, manifold: Manifold, potential, coupling: str="q") -> None:
+		n = dim(manifold)
+		metric = manifold.metric_tensor
+		x = manifold.coordinates.x
+		A = [potential.co(mu) for mu in range(n)] if isinstance(potential, Vector) else [sympify(a) for a in potential]
+		F = [[diff(A[nu], x(mu)) - diff(A[mu], x(nu)) for nu in range(n)] for mu in range(n)]
+		self.potential = A
+		self.mixed = [[sum(metric.contra(mu, a) * F[a][nu] for a in range(n)) for nu in range(n)] for mu in range(n)]
+		VectorField.__init__(self, manifold, None, coupling)
+
+	def strength(self, mu: int, nu: int):
+		return self.mixed[mu][nu]
+
+class TensorField(Field):
+
+	"""
+	A spin-2 field acting through a rank-3 tensor with mixed(mu, nu,
+	rho) = T^mu_nu,rho, in the same way the Christoffel symbols do.
+	"""
+
+	spin = 2
+
+	def __init__(self, manifold: Manifold, tensor: Tensor3, coupling: str="k") -> None:
+		Field.__init__(self, manifold, coupling)
+		self.tensor = tensor
+
+	def force(self, u: list[Symbol]) -> list:
+		n = dim(self.manifold)
+		f = []
+		for mu in range(n):
+			fi = 0
+			for nu, rho in util.allind(2, n):
+				T = self.tensor.mixed(mu, nu, rho)
+				if sympify(T) != 0:
+					fi = fi + T * u[nu] * u[rho]
+			f.append(fi)
+		return f
+
+class FieldTheory:
+
+	"""
+	A set of fields on one manifold, compiled into a single
+	acceleration kernel. Calling it as force(x, u, ensemble) gives the
+	proper acceleration (N, n) of every observer of an ObserverEnsemble,
+	which takes the couplings named by the fields (missing ones are
+	zero) and the masses from the ensemble.
+	"""
+
+	def __init__(self, *fields: Field, defaults: dict=None):
+		if len(fields) == 0:
+			raise FieldError("A FieldTheory needs at least one field.")
+		for field in fields:
+			if not isinstance(field, Field):
+				raise TypeError("FieldTheory only accepts Field subclasses as arguments.")
+			if field.manifold is not fields[0].manifold:
+				raise FieldError("All fields of a FieldTheory must live on the same manifold.")
+		self.fields = list(fields)
+		self.manifold = fields[0].manifold
+		self.dimension = n = dim(self.manifold)
+		self.couplings = list(dict.fromkeys(field.coupling for field in fields))
+
+		u = _velocity(n)
+		mass = Symbol("m")
+		charges = {name: Symbol(name) for name in self.couplings}
+		total = [0] * n
+		for field in fields:
+			for mu, f in enumerate(field.force(u)):
+				total[mu] = total[mu] + charges[field.coupling] * f / mass
+
+		entries = [((mu,), a) for mu, a in enumerate(total) if sympify(a) != 0]
+		spec = codegen.KernelSpec("field_theory", (n,), entries)
+		args = list(self.manifold.coordinates) + u + [charges[name] for name in self.couplings] + [mass]
+		self.kernel = getattr(codegen.build([spec], args, defaults, name=spec.name), spec.name)
+
+	def __getstate__(self):
+		# As with GeodesicIntegrator: worker processes get the compiled
+		# kernel by reference, not the symbolic fields.
+		return {"dimension": self.dimension, "couplings": self.couplings, "kernel": codegen.reference(self.kernel)}
+
+	def __setstate__(self, state):
+		self.fields = []
+		self.manifold = None
+		self.dimension = state["dimension"]
+		self.couplings = state["couplings"]
+		self.kernel = codegen.resolve(state["kernel"])
+
+	def __iter__(self):
+		return iter(self.fields)
+
+	def __repr__(self):
+		return "<FieldTheory of {}>".format(", ".join("{} (spin {}, coupling {})".format(type(f).__name__, f.spin, f.coupling) for f in self))
+
+	def acceleration(self, x: np.ndarray, u: np.ndarray, couplings: dict, mass: np.ndarray, **params) -> np.ndarray:
+		N = len(x)
+		charges = [couplings.get(name, np.zeros(N)) for name in self.couplings]
+		with np.errstate(all="ignore"):
+			a = codegen.call(self.kernel, list(x.T) + list(u.T) + charges + [mass], params)
+		return np.broadcast_to(a, (self.dimension, N)).T
+
+	def __call__(self, x: np.ndarray, u: np.ndarray, ensemble) -> np.ndarray:
+		return self.acceleration(x, u, {name: ensemble.coupling(name) for name in self.couplings}, ensemble.mass, **ensemble.params)
 
-	def force(self, coupling, four_velocity: Vector)
\ No newline at end of file
+	@classmethod
+	def merge(cls, *theories: "FieldTheory", defaults: dict=None) -> "FieldTheory":
+		fields = []
+		for theory in theories:
+			fields += theory.fields
+		return cls(*fields, defaults=defaults)
@@ -1,4 +1,11 @@
+import numpy as np
+from sympy import Symbol
+from sympy import sympify
+from sxl import codegen
+from sxl import einstein
 from sxl import spacetime
+from sxl import util
+from sxl.spacetime import dim
 
 """
 Here, all forces will be treated as 4-forces produced by the 
@@ -16,4 +23,574 @@ class Observer:
 		self.manifold
 		self.position = position
 		self.velocity = spacetime.Vector(self.manifold)
-		
\ No newline at end of file
+
+# ===== GEODESIC INTEGRATION ===== #
+
+# Status of each geodesic in a batch.
+RUNNING = 0
+FINISHED = 1
+EVENT = 2
+SINGULAR = 3
+STALLED = 4
+
+STATUS_NAMES = {RUNNING: "running", FINISHED: "finished", EVENT: "event", SINGULAR: "singular", STALLED: "stalled"}
+
+class GeodesicError(Exception):
+	pass
+
+# Dormand-Prince 5(4) tableau.
+_A = [
+	[],
+	[1/5],
+	[3/40, 9/40],
+	[44/45, -56/15, 32/9],
+	[19372/6561, -25360/2187, 64448/6561, -212/729],
+	[9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+	[35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]
+]
+_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_E = _B - np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+def _stage(f, y, h, k, i):
+	dy = 0
+	for a, kj in zip(_A[i], k):
+		if a != 0:
+			dy = dy + a * kj
+	return f(y + h[:, None] * dy)
+
+class GeodesicResult:
+
+	"""
+	Final states of a batch of geodesics: affine parameter lam (N,),
+	state y (N, 2n) = (x, dx/dlam), the status of each geodesic, the
+	index of the event that stopped it (-1 if none) and step counts.
+	If the integration was recorded, history holds the (lam, y) of
+	every ray after every batch step; rays that have stopped simply
+	repeat their final state.
+	"""
+
+	def __init__(self, lam, y, status, event, steps, rejected, history=None):
+		self.lam = lam
+		self.y = y
+		self.status = status
+		self.event = event
+		self.steps = steps
+		self.rejected = rejected
+		self.history = history
+
+	def __len__(self):
+		return len(self.lam)
+
+	def __repr__(self):
+		counts = ", ".join("{} {}".format(np.count_nonzero(self.status == k), v) for k, v in STATUS_NAMES.items() if np.any(self.status == k))
+		return "<GeodesicResult of {} geodesics: {}; {} steps, {} rejected>".format(len(self), counts, int(self.steps.sum()), int(self.rejected.sum()))
+
+	@property
+	def x(self) -> np.ndarray:
+		return self.y[:, :self.y.shape[1] // 2]
+
+	@property
+	def u(self) -> np.ndarray:
+		return self.y[:, self.y.shape[1] // 2:]
+
+def integrate(f, y0: np.ndarray, lam, events: list=(), rtol: float=1e-8, atol: float=1e-10, h0=None, hmin: float=1e-12, max_steps: int=100000, event_tol: float=1e-9, record: bool=False) -> GeodesicResult:
+	"""
+	Integrate the autonomous system dy/dlam = f(y) for a batch of
+	initial states y0 (N, m) up to lam (a number or one per row, and
+	negative to integrate backwards), with an adaptive Dormand-Prince
+	5(4) step taken separately for every row.
+
+	Only the rows still running are passed to f, so f must work on
+	any number of rows. An event is a function of the states returning
+	one value per row; a row stops when an event goes from positive
+	to <= 0, with the crossing located to within event_tol by
+	shrinking the step. Rows whose derivatives are not finite stop as
+	singular, and rows whose step falls below hmin or that run out of
+	steps stop as stalled.
+	"""
+
+	y = np.array(y0, dtype=float)
+	N, m = y.shape
+	end = np.broadcast_to(np.asarray(lam, dtype=float), (N,)).copy()
+	direction = np.where(end < 0, -1.0, 1.0)
+	lam = np.zeros(N)
+	status = np.full(N, RUNNING)
+	event = np.full(N, -1)
+	steps = np.zeros(N, dtype=int)
+	rejected = np.zeros(N, dtype=int)
+	history = ([lam.copy()], [y.copy()]) if record else None
+
+	with np.errstate(all="ignore"):
+		k0 = f(y)
+		bad = ~np.all(np.isfinite(k0), axis=1)
+		status[bad] = SINGULAR
+		status[(end == 0) & ~bad] = FINISHED
+
+		if h0 is None:
+			scale = atol + rtol * np.abs(y)
+			d0 = np.sqrt(np.mean((y / scale)**2, axis=1))
+			d1 = np.sqrt(np.mean((k0 / scale)**2, axis=1))
+			h = np.where((d0 > 1e-5) & (d1 > 1e-5), 0.01 * d0 / d1, 1e-6)
+		else:
+			h = np.broadcast_to(np.abs(np.asarray(h0, dtype=float)), (N,)).copy()
+		h = direction * np.minimum(h, np.abs(end))
+		values = [np.asarray(e(y), dtype=float) for e in events]
+
+	while True:
+		active = np.flatnonzero(status == RUNNING)
+		if len(active) == 0:
+			break
+
+		ya, ha = y[active], h[active]
+		with np.errstate(all="ignore"):
+			k = [k0[active]]
+			for i in range(1, 7):
+				k.append(_stage(f, ya, ha, k, i))
+			y_new = ya + ha[:, None] * sum(b * kj for b, kj in zip(_B, k) if b != 0)
+			err = ha[:, None] * sum(e * kj for e, kj in zip(_E, k) if e != 0)
+			scale = atol + rtol * np.maximum(np.abs(ya), np.abs(y_new))
+			norm = np.sqrt(np.mean((err / scale)**2, axis=1))
+
+		finite = np.all(np.isfinite(y_new), axis=1) & np.all(np.isfinite(k[6]), axis=1)
+		accept = finite & (norm <= 1)
+		with np.errstate(divide="ignore"):
+			factor = np.where(finite, np.clip(0.9 * norm**-0.2, 0.2, 10.0), 0.25)
+
+		# Events: reject steps that overshoot a crossing, shrinking them towards it.
+		hit = np.full(len(active), -1)
+		for j, e in enumerate(events):
+			with np.errstate(all="ignore"):
+				v_old = values[j][active]
+				v_new = np.asarray(e(y_new), dtype=float)
+			crossing = accept & (hit < 0) & (v_old > 0) & (v_new <= 0)
+			located = crossing & ((np.abs(v_new) <= event_tol) | (np.abs(ha) <= hmin))
+			retry = crossing & ~located
+			hit[located] = j
+			accept[retry] = False
+			with np.errstate(all="ignore"):
+				factor[retry] = np.clip(v_old[retry] / (v_old[retry] - v_new[retry]), 0.01, 0.99)
+
+		done = active[accept]
+		y[done] = y_new[accept]
+		lam[done] += ha[accept]
+		k0[done] = k[6][accept]
+		steps[done] += 1
+		rejected[active[~accept]] += 1
+		for j, e in enumerate(events):
+			if len(done) > 0:
+				with np.errstate(all="ignore"):
+					values[j][done] = np.asarray(e(y[done]), dtype=float)
+
+		stopped = hit[accept] >= 0
+		status[done[stopped]] = EVENT
+		event[done[stopped]] = hit[accept][stopped]
+		status[done[~stopped & (np.abs(lam[done] - end[done]) <= 1e-12 * np.maximum(1, np.abs(end[done])))]] = FINISHED
+		# A step cut for non-finite derivatives that would fall below hmin
+		# ends the row as singular rather than stalled.
+		status[active[~finite & (np.abs(ha * factor) < hmin)]] = SINGULAR
+
+		h[active] = ha * factor
+		h[active] = direction[active] * np.minimum(np.abs(h[active]), np.abs(end[active] - lam[active]))
+		running = active[status[active] == RUNNING]
+		status[running[(np.abs(h[running]) < hmin) | (steps[running] >= max_steps)]] = STALLED
+
+		if record:
+			history[0].append(lam.copy())
+			history[1].append(y.copy())
+
+	if record:
+		history = (np.array(history[0]), np.array(history[1]))
+	return GeodesicResult(lam, y, status, event, steps, rejected, history)
+
+def signature(g: np.ndarray) -> int:
+	"""
+	The sign of g(u, u) for timelike u, +1 for (+---) and -1 for (-+++),
+	from the first finite metric in a batch (N, n, n).
+	"""
+
+	for point in g:
+		if np.all(np.isfinite(point)):
+			positive = np.count_nonzero(np.linalg.eigvalsh(point) > 0)
+			if positive == 1:
+				return 1
+			if positive == len(point) - 1:
+				return -1
+	raise GeodesicError("The metric is not Lorentzian at any of the given points.")
+
+def geodesic_acceleration(christoffel, u: list) -> list:
+	"""
+	The geodesic acceleration -Gamma^i_jk u^j u^k for each i, as
+	symbolic expressions in the velocity symbols u, summing only the
+	nonzero Christoffel symbols.
+	"""
+
+	n = len(u)
+	r = []
+	for i in range(n):
+		a = 0
+		for j, k in util.allind(2, n):
+			G = christoffel.mixed(i, j, k)
+			if sympify(G) != 0:
+				a = a - G * u[j] * u[k]
+		r.append(a)
+	return r
+
+# Events
+
+def crossing(index: int, value: float, above: bool=True):
+	"""
+	Stop when coordinate index reaches value, coming from above (or
+	from below if above is False).
+	"""
+
+	if above:
+		return lambda y: y[:, index] - value
+	return lambda y: value - y[:, index]
+
+def horizon(index: int, radius: float, margin: float=1e-6):
+	"""
+	Stop just outside a horizon at coordinate index = radius.
+	"""
+
+	return crossing(index, radius * (1 + margin))
+
+def escape(index: int, radius: float):
+	return crossing(index, radius, False)
+
+def coordinate_singularity(index: int, value: float, eps: float=1e-6):
+	"""
+	Stop within eps of a coordinate singularity such as theta = 0.
+	"""
+
+	return lambda y: np.abs(y[:, index] - value) - eps
+
+class GeodesicIntegrator:
+
+	"""
+	Integrates the geodesic equation
+
+		d^2 x^i / dlam^2 = -Gamma^i_jk dx^j/dlam dx^k/dlam
+
+	for many geodesics at once. The Christoffel symbols and metric of
+	a manifold are compiled once (through sxl.codegen); parameters of
+	the metric are passed as keywords to every call. For example,
+
+		geo = geodesics.GeodesicIntegrator(mf, defaults={"G": 1, "M": 1, "c": 1})
+		y0 = geo.initial(x0, v0, "null")
+		result = geo.integrate(y0, 100, events=[geodesics.horizon(1, 2)])
+	"""
+
+	def __init__(self, manifold: spacetime.Manifold, defaults: dict=None):
+		self.manifold = manifold
+		self.dimension = dim(manifold)
+		christoffel = manifold.of(einstein.ChristoffelSymbols)
+		self.christoffel = codegen.compile_tensor(christoffel, "mixed", defaults=defaults)
+		self.metric = codegen.compile_tensor(manifold.metric_tensor, "co", defaults=defaults, name="metric")
+		self.geodesic = self._compile_acceleration(christoffel, defaults)
+
+	def _compile_acceleration(self, christoffel, defaults: dict):
+		# The contraction -Gamma^i_jk u^j u^k is done symbolically, so that
+		# the kernel only touches the nonzero symbols and shares their
+		# common subexpressions; this is the hot loop of every integration.
+		n = self.dimension
+		u = [Symbol("u_{}".format(i)) for i in range(n)]
+		entries = [((i,), a) for i, a in enumerate(geodesic_acceleration(christoffel, u)) if sympify(a) != 0]
+		spec = codegen.KernelSpec("{}_acceleration".format(christoffel.name), (n,), entries)
+		return getattr(codegen.build([spec], list(self.manifold.coordinates) + u, defaults, name=spec.name), spec.name)
+
+	def __getstate__(self):
+		# Kernels are passed to worker processes by reference; the
+		# manifold itself stays behind.
+		return {
+			"dimension": self.dimension,
+			"christoffel": codegen.reference(self.christoffel),
+			"metric": codegen.reference(self.metric),
+			"geodesic": codegen.reference(self.geodesic)
+		}
+
+	def __setstate__(self, state):
+		self.manifold = None
+		self.dimension = state["dimension"]
+		self.christoffel = codegen.resolve(state["christoffel"])
+		self.metric = codegen.resolve(state["metric"])
+		self.geodesic = codegen.resolve(state["geodesic"])
+
+	def christoffel_at(self, x: np.ndarray, **params) -> np.ndarray:
+		"""
+		Gamma^i_jk at the points x (N, n), as an (N, n, n, n) array.
+		"""
+
+		n = self.dimension
+		G = codegen.call(self.christoffel, list(x.T), params)
+		return np.moveaxis(np.broadcast_to(G, (n, n, n, len(x))), -1, 0)
+
+	def metric_at(self, x: np.ndarray, **params) -> np.ndarray:
+		n = self.dimension
+		g = codegen.call(self.metric, list(x.T), params)
+		return np.moveaxis(np.broadcast_to(g, (n, n, len(x))), -1, 0)
+
+	def acceleration(self, x: np.ndarray, u: np.ndarray, **params) -> np.ndarray:
+		a = codegen.call(self.geodesic, list(x.T) + list(u.T), params)
+		return np.broadcast_to(a, (self.dimension, len(x))).T
+
+	def norm(self, y: np.ndarray, **params) -> np.ndarray:
+		"""
+		g(u, u) for states y (N, 2n); conserved along geodesics, so its
+		drift measures the integration error.
+		"""
+
+		n = self.dimension
+		return np.einsum("nij,ni,nj->n", self.metric_at(y[:, :n], **params), y[:, n:], y[:, n:])
+
+	def signature(self, x: np.ndarray, **params) -> int:
+		return signature(self.metric_at(np.atleast_2d(x), **params))
+
+	def time_component(self, x: np.ndarray, v: np.ndarray, kind: str="timelike", norm: float=1.0, **params) -> np.ndarray:
+		"""
+		The future-directed u^0 that makes u = (u^0, v) null, or timelike
+		with g(u, u) = +-norm (norm = c**2 for proper time in units
+		with c != 1), at positions x (N, n) for spatial components v
+		(N, n - 1).
+		"""
+
+		if kind == "null":
+			target = 0.0
+		elif kind == "timelike":
+			target = self.signature(x, **params) * norm
+		else:
+			raise GeodesicError("Unknown kind of geodesic \"{}\" (expected timelike or null).".format(kind))
+
+		g = self.metric_at(x, **params)
+		a = g[:, 0, 0]
+		b = np.einsum("ni,ni->n", g[:, 0, 1:], v)
+		c = np.einsum("nij,ni,nj->n", g[:, 1:, 1:], v, v) - target
+		with np.errstate(invalid="ignore", divide="ignore"):
+			root = np.sqrt(b**2 - a*c)
+			u0 = np.maximum((-b + root) / a, (-b - root) / a)
+		if not np.all(np.isfinite(u0)):
+			raise GeodesicError("No future-directed {} velocity exists for {} of the given states.".format(kind, int(np.count_nonzero(~np.isfinite(u0)))))
+		return u0
+
+	def initial(self, x: np.ndarray, v: np.ndarray, kind: str="timelike", norm: float=1.0, **params) -> np.ndarray:
+		"""
+		Initial states (N, 2n) from positions x (N, n) and spatial
+		velocity components v (N, n - 1); see time_component.
+		"""
+
+		x = np.atleast_2d(np.asarray(x, dtype=float))
+		v = np.atleast_2d(np.asarray(v, dtype=float))
+		N = max(len(x), len(v))
+		x = np.broadcast_to(x, (N, x.shape[1])).copy()
+		v = np.broadcast_to(v, (N, v.shape[1]))
+		u0 = self.time_component(x, v, kind, norm, **params)
+		return np.concatenate([x, u0[:, None], v], axis=1)
+
+	def rhs(self, **params):
+		n = self.dimension
+
+		def f(y):
+			return np.concatenate([y[:, n:], self.acceleration(y[:, :n], y[:, n:], **params)], axis=1)
+		return f
+
+	def integrate(self, y0: np.ndarray, lam, events: list=(), rtol: float=1e-8, atol: float=1e-10, h0=None, hmin: float=1e-12, max_steps: int=100000, event_tol: float=1e-9, record: bool=False, **params) -> GeodesicResult:
+		y0 = np.atleast_2d(np.asarray(y0, dtype=float))
+		if y0.shape[1] != 2 * self.dimension:
+			raise GeodesicError("Expected states of shape (N, {}), got {}.".format(2 * self.dimension, y0.shape))
+		return integrate(self.rhs(**params), y0, lam, events, rtol, atol, h0, hmin, max_steps, event_tol, record)
+
+# ===== OBSERVER ENSEMBLES ===== #
+
+class ObserverEnsemble:
+
+	"""
+	Many observers stored as arrays: positions x (N, n), proper
+	velocities u = dx/dtau (N, n), elapsed proper times (N,), masses
+	(N,) and any other couplings (charges and so on) as named (N,)
+	arrays. Every operation acts on all observers at once through the
+	compiled metric and geodesic acceleration of a GeodesicIntegrator;
+	params holds the metric parameters.
+
+	Forces are functions force(x, u, ensemble) returning the proper
+	acceleration they cause, (N, n), in addition to gravity; see
+	sxl.fieldtheory.
+	"""
+
+	def __init__(self, integrator: GeodesicIntegrator, position, velocity, proper_time=None, mass=1.0, couplings: dict=None, norm: float=1.0, params: dict=None):
+		self.integrator = integrator
+		self.position = np.array(np.atleast_2d(position), dtype=float)
+		self.velocity = np.array(np.atleast_2d(velocity), dtype=float)
+		N = len(self.position)
+		if self.velocity.shape != self.position.shape:
+			raise GeodesicError("Positions and velocities must have the same shape, got {} and {}.".format(self.position.shape, self.velocity.shape))
+		self.proper_time = np.zeros(N) if proper_time is None else np.array(np.broadcast_to(proper_time, (N,)), dtype=float)
+		self.mass = np.array(np.broadcast_to(mass, (N,)), dtype=float)
+		self.couplings = {k: np.array(np.broadcast_to(v, (N,)), dtype=float) for k, v in (couplings or {}).items()}
+		self.norm = norm
+		self.params = params or {}
+
+	def __len__(self):
+		return len(self.position)
+
+	def __repr__(self):
+		return "<ObserverEnsemble of {} observers>".format(len(self))
+
+	def __getitem__(self, index) -> "ObserverEnsemble":
+		if type(index) == int:
+			index = [index]
+		return ObserverEnsemble(self.integrator, self.position[index], self.velocity[index], self.proper_time[index], self.mass[index],
+			{k: v[index] for k, v in self.couplings.items()}, self.norm, self.params)
+
+	def coupling(self, name: str) -> np.ndarray:
+		if name in ("m", "mass"):
+			return self.mass
+		return self.couplings.get(name, np.zeros(len(self)))
+
+	# Construction
+
+	@classmethod
+	def from_spatial(cls, integrator: GeodesicIntegrator, position, spatial_velocity, norm: float=1.0, params: dict=None, **kwargs) -> "ObserverEnsemble":
+		"""
+		Observers at the given positions whose proper velocities have the
+		given spatial components, with u^0 fixed by g(u, u) = +-norm.
+		"""
+
+		y = integrator.initial(position, spatial_velocity, "timelike", norm, **(params or {}))
+		n = integrator.dimension
+		return cls(integrator, y[:, :n], y[:, n:], norm=norm, params=params, **kwargs)
+
+	@classmethod
+	def at_rest(cls, integrator: GeodesicIntegrator, position, norm: float=1.0, params: dict=None, **kwargs) -> "ObserverEnsemble":
+		position = np.atleast_2d(position)
+		return cls.from_spatial(integrator, position, np.zeros((len(position), integrator.dimension - 1)), norm, params, **kwargs)
+
+	@classmethod
+	def merge(cls, *ensembles: "ObserverEnsemble") -> "ObserverEnsemble":
+		first = ensembles[0]
+		names = set().union(*(e.couplings.keys() for e in ensembles))
+		return cls(first.integrator,
+			np.concatenate([e.position for e in ensembles]),
+			np.concatenate([e.velocity for e in ensembles]),
+			np.concatenate([e.proper_time for e in ensembles]),
+			np.concatenate([e.mass for e in ensembles]),
+			{k: np.concatenate([e.coupling(k) for e in ensembles]) for k in names},
+			first.norm, first.params)
+
+	# Kinematics
+
+	def lorentz_factors(self) -> np.ndarray:
+		"""
+		dt/dtau for every observer, with t the first coordinate.
+		"""
+
+		return self.velocity[:, 0].copy()
+
+	def coordinate_velocity(self) -> np.ndarray:
+		"""
+		dx/dt = u / u^0, (N, n) (the first column is 1).
+		"""
+
+		return self.velocity / self.velocity[:, :1]
+
+	def proper_speed(self) -> np.ndarray:
+		"""
+		The magnitude of the spatial part of u under the spatial metric.
+		"""
+
+		g = self.integrator.metric_at(self.position, **self.params)
+		return np.sqrt(np.abs(np.einsum("nij,ni,nj->n", g[:, 1:, 1:], self.velocity[:, 1:], self.velocity[:, 1:])))
+
+	def coordinate_speed(self) -> np.ndarray:
+		return np.sqrt(np.sum(self.coordinate_velocity()[:, 1:]**2, axis=1))
+
+	def constraint(self) -> np.ndarray:
+		"""
+		g(u, u) for every observer; +-norm when the velocities are
+		properly normalized.
+		"""
+
+		return self.integrator.norm(np.concatenate([self.position, self.velocity], axis=1), **self.params)
+
+	def renormalize(self) -> None:
+		"""
+		Restore g(u, u) = +-norm by recomputing u^0 from the spatial
+		components, for example after applying an impulse.
+		"""
+
+		self.velocity[:, 0] = self.integrator.time_component(self.position, self.velocity[:, 1:], "timelike", self.norm, **self.params)
+
+	def gravitational_acceleration(self) -> np.ndarray:
+		"""
+		The geodesic acceleration d^2x/dtau^2 = -Gamma^i_jk u^j u^k, (N, n).
+		"""
+
+		return self.integrator.acceleration(self.position, self.velocity, **self.params)
+
+	# Time stepping
+
+	def apply_proper_acceleration(self, a, dtau: float) -> None:
+		"""
+		du = a dtau, for a proper acceleration a of shape (n,) or (N, n).
+		"""
+
+		self.velocity += np.asarray(a, dtype=float) * dtau
+
+	def apply_coordinate_acceleration(self, a, dt: float) -> None:
+		"""
+		du = a gamma^3 dt, for a coordinate acceleration a = d^2x/dt^2.
+		"""
+
+		self.velocity += np.asarray(a, dtype=float) * (self.lorentz_factors()**3 * dt)[:, None]
+
+	def apply_proper_time(self, dtau) -> None:
+		"""
+		dx = u dtau; dtau may differ between observers.
+		"""
+
+		dtau = np.broadcast_to(np.asarray(dtau, dtype=float), (len(self),))
+		self.position += self.velocity * dtau[:, None]
+		self.proper_time += dtau
+
+	def apply_coordinate_time(self, dt: float) -> None:
+		"""
+		dx = u dt / gamma, so every observer advances by dt in coordinate time.
+		"""
+
+		self.apply_proper_time(dt / self.lorentz_factors())
+
+	def _derivative(self, forces: list):
+		def f(x, u):
+			a = self.integrator.acceleration(x, u, **self.params)
+			for force in forces:
+				a = a + force(x, u, self)
+			return u, a
+		return f
+
+	def step(self, dtau: float, forces: list=()) -> None:
+		"""
+		Advance every observer by dtau of proper time under gravity and
+		the given forces, with one classical Runge-Kutta step.
+		"""
+
+		f = self._derivative(forces)
+		x, u = self.position, self.velocity
+		k1x, k1u = f(x, u)
+		k2x, k2u = f(x + dtau/2 * k1x, u + dtau/2 * k1u)
+		k3x, k3u = f(x + dtau/2 * k2x, u + dtau/2 * k2u)
+		k4x, k4u = f(x + dtau * k3x, u + dtau * k3u)
+		self.position = x + dtau/6 * (k1x + 2*k2x + 2*k3x + k4x)
+		self.velocity = u + dtau/6 * (k1u + 2*k2u + 2*k3u + k4u)
+		self.proper_time += dtau
+
+	def evolve(self, tau: float, steps: int, forces: list=(), record: bool=False):
+		"""
+		Take steps equal steps up to a total proper time tau. With
+		record, returns the positions after every step as an array of
+		shape (steps + 1, N, n).
+		"""
+
+		history = [self.position.copy()] if record else None
+		for _ in range(steps):
+			self.step(tau / steps, forces)
+			if record:
+				history.append(self.position.copy())
+		return np.array(history) if record else None
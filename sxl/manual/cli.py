@@ -6,6 +6,9 @@ Aliases\t\tmf
 
 Subcommands\tmanifold create <metric>
 \t\tmanifold define <geometrical object>
+\t\tmanifold report <geometrical object>
+\t\tmanifold export <file>
+\t\tmanifold load <file>
 \t\tmanifold recreate <new metric>
 \t\tmanifold reload"""
 
@@ -110,4 +113,41 @@ If you pass the -a/--auto flag (AFTER indices - it must be the last word of the
 if the search reveals that the requested object does not exist on the manifold/hasn't been defined
 yet, then SXL will automatically define, compute, and print it. Otherwise, no results will be
 returned.
+"""
+
+HELP_MANIFOLD_EXPORT = """manifold export
+
+Synopsis\tSave everything defined on the manifold to a file.
+
+Aliases\t\tmf export
+\t\tmf x
+
+Syntax\t\tmanifold export <file> [--code] [--solve]
+
+Description\tStreams the metric and every defined object to a compressed file, one component at a
+\t\ttime, so that nothing has to be pretty-printed or held in memory all at once. Files ending
+\t\tin .jsonl.gz are written as gzipped JSON lines and files ending in .msgpack.gz as gzipped
+\t\tmsgpack (which needs the msgpack package). For example,
+
+\t\t\tmanifold export schwarzschild.jsonl.gz
+
+\t\tBy default only the components that have already been computed are written. Pass --solve to
+\t\tfill in every co/contra/mixed component first, and --code to also store NumPy source for each
+\t\tcomponent next to its symbolic form.
+"""
+
+HELP_MANIFOLD_LOAD = """manifold load
+
+Synopsis\tRestore a manifold saved with "manifold export".
+
+Aliases\t\tmf load
+\t\tmf l
+
+Syntax\t\tmanifold load <file>
+
+Description\tReplaces the current manifold with the one stored in the file. Everything that was exported
+\t\tis restored as-is, without recomputation, and can be reported on straight away:
+
+\t\t\tmanifold load schwarzschild.jsonl.gz
+\t\t\tmanifold report einstein -i 00 --co
 """
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Compiled evaluation of geodesic accelerations at many points.
+
+The old ObservationEngine substituted each point into the symbolic
+acceleration vectors and simplified, one point at a time, and raised
+UnderdeterminationError as soon as anything was left unevaluated.
+Here both accelerations are compiled into one kernel when the engine
+is built: for a proper velocity u = dx/dtau,
+
+	proper		a^i = d^2x^i/dtau^2 = -Gamma^i_jk u^j u^k
+	coordinate	d^2x^i/dt^2 = (a^i - a^0 u^i / u^0) / (u^0)^2
+
+so a whole batch of points and velocities is evaluated in a single
+call. Points where evaluation fails (non-finite results, velocities
+that are not timelike, missing parameters) are reported one by one
+instead of failing the batch. For example,
+
+	engine = observation.ObservationEngine(mf, defaults={"G": 1, "M": 1, "c": 1})
+	obs = engine.at(points, coordinate_velocities, velocity="coordinate")
+	obs.coordinate[obs.ok]
+	obs.errors
+"""
+
+import numpy as np
+from sympy import Symbol
+from sympy import sympify
+from sxl import codegen
+from sxl import einstein
+from sxl import error
+from sxl import geodesics
+from sxl import spacetime
+from sxl.spacetime import dim
+
+PROPER = "proper"
+COORDINATE = "coordinate"
+
+class Observations:
+
+	"""
+	Proper and coordinate accelerations (N, n) at a batch of points,
+	the proper velocities they were evaluated with, a mask of the
+	points that evaluated cleanly and, for the others, a message per
+	point index.
+	"""
+
+	def __init__(self, proper, coordinate, velocity, ok, errors: dict):
+		self.proper = proper
+		self.coordinate = coordinate
+		self.velocity = velocity
+		self.ok = ok
+		self.errors = errors
+
+	def __len__(self):
+		return len(self.ok)
+
+	def __repr__(self):
+		return "<Observations at {} points, {} failed>".format(len(self), len(self.errors))
+
+	def report(self, limit: int=10) -> str:
+		lines = ["{} of {} points failed to evaluate.".format(len(self.errors), len(self))]
+		for index, message in list(self.errors.items())[:limit]:
+			lines.append("\tpoint {}: {}".format(index, message))
+		if len(self.errors) > limit:
+			lines.append("\t... and {} more".format(len(self.errors) - limit))
+		return "\n".join(lines)
+
+	def raise_errors(self) -> None:
+		"""
+		The old behaviour: raise UnderdeterminationError if any point failed.
+		"""
+
+		if self.errors:
+			raise error.UnderdeterminationError(self.report())
+
+class ObservationEngine:
+
+	def __init__(self, manifold: spacetime.Manifold, defaults: dict=None, norm: float=1.0):
+		self.manifold = manifold
+		self.dimension = n = dim(manifold)
+		self.norm = norm
+		self.sign = None
+
+		christoffel = manifold.of(einstein.ChristoffelSymbols)
+		u = [Symbol("u_{}".format(i)) for i in range(n)]
+		proper = geodesics.geodesic_acceleration(christoffel, u)
+		coordinate = [(proper[i] - proper[0] * u[i] / u[0]) / u[0]**2 for i in range(n)]
+		entries = [((0, i), a) for i, a in enumerate(proper) if sympify(a) != 0]
+		entries += [((1, i), a) for i, a in enumerate(coordinate) if sympify(a) != 0]
+
+		spec = codegen.KernelSpec("{}_observation".format(christoffel.name), (2, n), entries)
+		self.kernel = getattr(codegen.build([spec], list(manifold.coordinates) + u, defaults, name=spec.name), spec.name)
+		self.metric = codegen.compile_tensor(manifold.metric_tensor, "co", defaults=defaults, name="metric")
+
+	def parameters(self) -> tuple[list[str], list[str]]:
+		"""
+		The names of the parameters the kernels take: (required, optional).
+		"""
+
+		required, optional = [], []
+		for fn in (self.kernel, self.metric):
+			code = fn.__code__
+			names = code.co_varnames[:code.co_argcount]
+			start = self.dimension * (2 if fn is self.kernel else 1)
+			stop = code.co_argcount - len(fn.__defaults__ or ())
+			required += [x for x in names[start:stop] if x not in required]
+			optional += [x for x in names[stop:] if x not in optional]
+		return required, optional
+
+	def _metric(self, x: np.ndarray, params: dict) -> np.ndarray:
+		n = self.dimension
+		with np.errstate(all="ignore"):
+			g = codegen.call(self.metric, list(x.T), params)
+		return np.moveaxis(np.broadcast_to(g, (n, n, len(x))), -1, 0)
+
+	def proper_velocity(self, x: np.ndarray, v: np.ndarray, **params) -> np.ndarray:
+		"""
+		u = gamma (1, v) from coordinate velocities v = dx/dt, given as
+		(N, n - 1) spatial components or (N, n) with v^0 = 1. Points
+		where v is not timelike come out as NaN.
+		"""
+
+		if v.shape[1] == self.dimension - 1:
+			v = np.concatenate([np.ones((len(v), 1)), v], axis=1)
+		g = self._metric(x, params)
+		if self.sign is None:
+			self.sign = geodesics.signature(g)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			gamma = np.sqrt(self.sign * self.norm / np.einsum("nij,ni,nj->n", g, v, v))
+		return gamma[:, None] * v
+
+	def _evaluate(self, x: np.ndarray, u: np.ndarray, params: dict) -> np.ndarray:
+		n = self.dimension
+		with np.errstate(all="ignore"):
+			r = codegen.call(self.kernel, list(x.T) + list(u.T), params)
+		return np.moveaxis(np.broadcast_to(r, (2, n, len(x))), -1, 0)
+
+	def at(self, points, velocities=None, velocity: str=PROPER, **params) -> Observations:
+		"""
+		Accelerations at points (N, n) for observers moving with the
+		given velocities: proper velocities (N, n) by default, or
+		coordinate velocities with velocity="coordinate". Without
+		velocities the observers are at rest in the coordinates.
+		"""
+
+		x = np.atleast_2d(np.asarray(points, dtype=float))
+		N, n = len(x), self.dimension
+		errors = {}
+
+		missing = [name for name in self.parameters()[0] if name not in params]
+		if missing:
+			message = "underdetermined; no value for {}".format(", ".join(missing))
+			nan = np.full((N, n), np.nan)
+			return Observations(nan, nan.copy(), nan.copy(), np.zeros(N, dtype=bool), {i: message for i in range(N)})
+
+		if velocities is None:
+			velocities, velocity = np.zeros((N, n - 1)), COORDINATE
+		w = np.atleast_2d(np.asarray(velocities, dtype=float))
+		w = np.broadcast_to(w, (N, w.shape[1]))
+		if velocity == COORDINATE:
+			u = self.proper_velocity(x, w, **params)
+		elif velocity == PROPER:
+			u = np.array(w)
+		else:
+			raise ValueError("Unknown kind of velocity \"{}\" (expected proper or coordinate).".format(velocity))
+
+		try:
+			r = self._evaluate(x, u, params)
+		except Exception:
+			# Fall back to evaluating point by point, so that one bad point
+			# does not take the rest of the batch down with it.
+			r = np.full((N, 2, n), np.nan)
+			for i in range(N):
+				try:
+					r[i] = self._evaluate(x[i:i+1], u[i:i+1], params)[0]
+				except Exception as e:
+					errors[i] = "{}: {}".format(type(e).__name__, e)
+
+		proper, coordinate = np.array(r[:, 0]), np.array(r[:, 1])
+		for i in np.flatnonzero(~np.all(np.isfinite(u), axis=1)):
+			errors.setdefault(int(i), "velocity is not timelike here")
+		for i in np.flatnonzero(~np.all(np.isfinite(r), axis=(1, 2))):
+			bad = [j for j in range(n) if not (np.isfinite(r[i, 0, j]) and np.isfinite(r[i, 1, j]))]
+			errors.setdefault(int(i), "non-finite acceleration in component(s) {}".format(", ".join(map(str, bad))))
+
+		ok = np.ones(N, dtype=bool)
+		ok[list(errors)] = False
+		return Observations(proper, coordinate, u, ok, dict(sorted(errors.items())))
+
+	def proper_acceleration_vector_at(self, points, velocities=None, velocity: str=PROPER, **params) -> np.ndarray:
+		return self.at(points, velocities, velocity, **params).proper
+
+	def coordinate_acceleration_vector_at(self, points, velocities=None, velocity: str=PROPER, **params) -> np.ndarray:
+		return self.at(points, velocities, velocity, **params).coordinate
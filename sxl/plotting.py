@@ -0,0 +1,416 @@
+"""
+Vectorized field plotting.
+
+Replaces the hand-rolled meshgrid/contourf/plot_surface blocks of
+the grapher scripts with one pipeline:
+
+	* every field is evaluated once per grid and the array is cached,
+	  keyed on (function, parameters, grid), so the contour, zero
+	  contour and surface panels all share the same evaluation;
+	* figures are drawn on an Agg canvas, so rendering works headless
+	  and never touches the pyplot state machine;
+	* a small CLI picks the functions and frames to render, and can
+	  render every drive/stat pair of a module in parallel;
+	* optionally, fields are sampled adaptively and/or evaluated in the
+	  log domain (see sxl.sampling) for profiles with huge exponents.
+
+For example, to render the six-panel layout for the quartic drive
+in grapher.py (from the repository root, or with it on PYTHONPATH;
+the grapher.py fields take R = x^2 + z^2, hence --squared, and need
+the c and V parameters),
+
+	python -m sxl.plotting grapher --drive quartic_drive --stat quartic_stat -p c=1 -p V=1 --squared -o quartic.png
+
+or every *_drive/*_stat pair in it, four at a time,
+
+	python -m sxl.plotting grapher --all -p c=1 -p V=1 --squared -o renders/ --jobs 4
+
+Singular profiles render better with --adaptive (quadtree refinement
+around the walls and the zero contour) and --log (log-domain
+evaluation of the large powers):
+
+	python -m sxl.plotting grapher --drive root_drive --stat root_stat -p c=1 -p V=1 --squared --adaptive 5 --log -o root.png
+"""
+
+import os
+import argparse
+import inspect
+import numpy as np
+from collections import OrderedDict
+from multiprocessing import Pool
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from sxl import sampling
+from sxl import util
+
+SIX_PANEL = "six"
+TWO_PANEL = "two"
+
+CMAP = "plasma"
+
+class Grid:
+
+	"""
+	A rectangular (x, z) evaluation grid.
+	"""
+
+	def __init__(self, xlim: tuple=(-3, 3), zlim: tuple=(-3, 3), nx: int=100, nz: int=None):
+		self.xlim = (float(xlim[0]), float(xlim[1]))
+		self.zlim = (float(zlim[0]), float(zlim[1]))
+		self.nx = int(nx)
+		self.nz = int(nz if nz is not None else nx)
+		self.x_values = np.linspace(*self.xlim, self.nx)
+		self.z_values = np.linspace(*self.zlim, self.nz)
+		self._mesh = None
+
+	def __repr__(self):
+		return "<Grid x={} z={} {}x{}>".format(self.xlim, self.zlim, self.nx, self.nz)
+
+	def key(self) -> tuple:
+		return (self.xlim, self.zlim, self.nx, self.nz)
+
+	def mesh(self) -> tuple[np.ndarray, np.ndarray]:
+		if self._mesh is None:
+			self._mesh = np.meshgrid(self.x_values, self.z_values)
+		return self._mesh
+
+	@classmethod
+	def square(cls, lim: float, n: int=100) -> "Grid":
+		return cls((-lim, lim), (-lim, lim), n)
+
+class Cartesian:
+
+	"""
+	Wraps a field f(R, Z, **params) given in drive coordinates as a
+	function of (x, z) on the y=0 slice.
+
+	grapher.py feeds R = x^2 + z^2 into its functions (squared=True)
+	while 00_grapher.py uses the actual radius. With log_domain, the
+	whole evaluation runs on sampling.LogArrays. Instances compare
+	equal when they wrap the same function the same way, so they make
+	stable cache keys.
+	"""
+
+	def __init__(self, fn, squared: bool=False, log_domain: bool=False):
+		self.fn = fn
+		self.squared = squared
+		self.log_domain = log_domain
+		self.__name__ = getattr(fn, "__name__", repr(fn))
+
+	def __call__(self, x, z, **params):
+		if self.log_domain:
+			x, z = sampling.LogArray.of(x), sampling.LogArray.of(z)
+		R = x**2 + z**2
+		if not self.squared:
+			R = np.sqrt(R)
+		r = self.fn(R, z, **params)
+		return r.value() if isinstance(r, sampling.LogArray) else r
+
+	def __eq__(self, other):
+		return type(other) == Cartesian and other.fn is self.fn and other.squared == self.squared and other.log_domain == self.log_domain
+
+	def __hash__(self):
+		return hash((Cartesian, self.fn, self.squared, self.log_domain))
+
+def cartesify(fn, squared: bool=False, log_domain: bool=False) -> Cartesian:
+	return Cartesian(fn, squared, log_domain)
+
+class FieldCache:
+
+	"""
+	Least-recently-used cache of evaluated fields.
+	"""
+
+	def __init__(self, maxsize: int=64):
+		self.maxsize = maxsize
+		self.arrays = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def _get(self, key, evaluate):
+		if key in self.arrays:
+			self.hits += 1
+			self.arrays.move_to_end(key)
+			return self.arrays[key]
+		self.misses += 1
+		with np.errstate(all="ignore"):
+			value = np.asarray(evaluate(), dtype=float)
+		self.arrays[key] = value
+		if len(self.arrays) > self.maxsize:
+			self.arrays.popitem(last=False)
+		return value
+
+	def evaluate(self, fn, grid: Grid, **params) -> np.ndarray:
+		key = (fn, tuple(sorted(params.items())), grid.key())
+		X, Z = grid.mesh()
+		return self._get(key, lambda: np.broadcast_to(fn(X, Z, **params), X.shape))
+
+	def sample(self, fn, grid: Grid, depth: int, **params) -> sampling.AdaptiveField:
+		"""
+		Adaptive evaluation over the grid's rectangle. The starting grid
+		is coarsened so that full refinement lands near the grid's own
+		resolution.
+		"""
+
+		key = (fn, tuple(sorted(params.items())), grid.key(), "adaptive", depth)
+		if key in self.arrays:
+			self.hits += 1
+			self.arrays.move_to_end(key)
+			return self.arrays[key]
+		self.misses += 1
+		base = max(4, (max(grid.nx, grid.nz) - 1) // 2**depth)
+		field = sampling.sample(fn, grid.xlim, grid.zlim, base, depth, **params)
+		self.arrays[key] = field
+		if len(self.arrays) > self.maxsize:
+			self.arrays.popitem(last=False)
+		return field
+
+	def line(self, fn, grid: Grid, z: float=0, from_grid: bool=True, **params) -> np.ndarray:
+		"""
+		The field along x at fixed z. Read straight out of the cached
+		grid evaluation when z is one of the grid rows.
+		"""
+
+		row = np.flatnonzero(np.isclose(grid.z_values, z))
+		if from_grid and len(row) > 0:
+			return self.evaluate(fn, grid, **params)[row[0]]
+		key = (fn, tuple(sorted(params.items())), grid.key(), "line", float(z))
+		return self._get(key, lambda: np.broadcast_to(fn(grid.x_values, z, **params), grid.x_values.shape))
+
+	def clear(self) -> None:
+		self.arrays.clear()
+
+default_cache = FieldCache()
+
+def _finite(F: np.ndarray) -> np.ndarray:
+	return np.ma.masked_invalid(F)
+
+def draw_contour(ax, grid: Grid, F, title: str="", fig=None) -> None:
+	"""
+	Filled contours plus the zero contour. F is either an array over
+	the grid or a sampling.AdaptiveField, which is drawn straight from
+	its scattered samples.
+	"""
+
+	if isinstance(F, sampling.AdaptiveField):
+		finite = np.isfinite(F.values)
+		tri = sampling.AdaptiveField(F.x[finite], F.z[finite], F.values[finite], None, F.xlim, F.zlim, F.n).triangulation()
+		Fm = np.ma.masked_invalid(F.values[finite])
+		filled = ax.tricontourf(tri, Fm, levels=50, cmap=CMAP)
+		contour = lambda: ax.tricontour(tri, Fm, levels=[0], colors="cyan", linewidths=1)
+	else:
+		X, Z = grid.mesh()
+		Fm = _finite(F)
+		filled = ax.contourf(X, Z, Fm, levels=50, cmap=CMAP)
+		contour = lambda: ax.contour(X, Z, Fm, levels=[0], colors="cyan", linewidths=1)
+	if fig is not None:
+		fig.colorbar(filled, ax=ax)
+	if Fm.count() > 0 and Fm.min() < 0 < Fm.max():
+		ax.clabel(contour(), fmt="%.2f", colors="white", fontsize=10)
+	ax.set_title(title)
+	ax.set_xlabel("x")
+	ax.set_ylabel("z")
+
+def draw_surface(ax, grid: Grid, F: np.ndarray, title: str="", zlabel: str="f(x, z)") -> None:
+	X, Z = grid.mesh()
+	ax.plot_surface(X, Z, np.where(np.isfinite(F), F, np.nan), cmap=CMAP)
+	ax.set_title(title)
+	ax.set_xlabel("x")
+	ax.set_ylabel("z")
+	ax.set_zlabel(zlabel)
+
+def draw_line(ax, x_values: np.ndarray, F: np.ndarray, z: float, title: str="", color: str=None, zero_color: str="r") -> None:
+	ax.plot(x_values, F, label="z={}".format(z), color=color)
+	ax.set_title(title)
+	ax.set_xlabel("x")
+	ax.set_ylabel("f(x, z_fixed)")
+	ax.legend()
+	ax.axhline(y=0, color=zero_color, linestyle="--", label="0")
+
+def _fields(fn, grid: Grid, params: dict, cache: FieldCache, adaptive: int):
+	"""
+	The data for the contour panel and for the surface panel: the same
+	array when evaluating on the grid, or the adaptive samples and
+	their resampling onto the grid.
+	"""
+
+	if adaptive:
+		field = cache.sample(fn, grid, adaptive, **params)
+		return field, field.resample(grid.x_values, grid.z_values)
+	F = cache.evaluate(fn, grid, **params)
+	return F, F
+
+def draw_frame(fig, row: int, fn, grid: Grid, params: dict, frame: str, cache: FieldCache=None, z_fixed: float=0, color: str=None, zero_color: str="r", adaptive: int=0) -> None:
+	"""
+	Draw one row (contour, surface, line slice) of the six-panel layout.
+	"""
+
+	cache = cache if cache is not None else default_cache
+	contour, surface = _fields(fn, grid, params, cache, adaptive)
+	draw_contour(fig.add_subplot(2, 3, 3*row + 1), grid, contour, "xz slice ({})".format(frame), fig)
+	draw_surface(fig.add_subplot(2, 3, 3*row + 2, projection="3d"), grid, surface, "xz slice ({})".format(frame))
+	draw_line(fig.add_subplot(2, 3, 3*row + 3), grid.x_values, cache.line(fn, grid, z_fixed, not adaptive, **params), z_fixed,
+		"Slice of y-surface at z={} ({})".format(z_fixed, frame), color, zero_color)
+
+def six_panel(fig, drive, stat, grid: Grid, params: dict=None, title: str=None, cache: FieldCache=None, z_fixed: float=0, adaptive: int=0):
+	"""
+	The grapher.py layout: the drive's rest frame on top, Earth's rest
+	frame underneath. If adaptive is nonzero, the contour panels are
+	drawn from sample(..., depth=adaptive).
+	"""
+
+	params = params or {}
+	if title is not None:
+		fig.suptitle(title)
+	draw_frame(fig, 0, drive, grid, params, "drive's rest frame", cache, z_fixed, adaptive=adaptive)
+	draw_frame(fig, 1, stat, grid, params, "Earth's rest frame", cache, z_fixed, color="red", zero_color="b", adaptive=adaptive)
+	fig.tight_layout()
+	return fig
+
+def two_panel(fig, fn, grid: Grid, params: dict=None, title: str=None, cache: FieldCache=None, adaptive: int=0):
+	"""
+	The 00_grapher.py layout: contour plot and surface of one field.
+	"""
+
+	params = params or {}
+	cache = cache if cache is not None else default_cache
+	contour, surface = _fields(fn, grid, params, cache, adaptive)
+	draw_contour(fig.add_subplot(1, 2, 1), grid, contour, title or "Energy density contour plot", fig)
+	ax = fig.add_subplot(1, 2, 2, projection="3d")
+	draw_surface(ax, grid, surface, "", "T⁰⁰")
+	ax.view_init(elev=20, azim=50)
+	fig.tight_layout()
+	return fig
+
+def figure(layout: str=SIX_PANEL) -> Figure:
+	"""
+	A Figure on its own Agg canvas, independent of pyplot.
+	"""
+
+	fig = Figure(figsize=(18, 9) if layout == SIX_PANEL else (12, 5))
+	FigureCanvasAgg(fig)
+	return fig
+
+def draw(fig, fns: list, grid: Grid, params: dict=None, layout: str=SIX_PANEL, title: str=None, cache: FieldCache=None, adaptive: int=0):
+	if layout == SIX_PANEL:
+		return six_panel(fig, fns[0], fns[1], grid, params, title, cache, adaptive=adaptive)
+	if layout == TWO_PANEL:
+		return two_panel(fig, fns[0], grid, params, title, cache, adaptive=adaptive)
+	raise ValueError("Unknown layout \"{}\".".format(layout))
+
+def render(path: str, fns: list, grid: Grid, params: dict=None, layout: str=SIX_PANEL, title: str=None, cache: FieldCache=None, dpi: int=100, adaptive: int=0) -> str:
+	fig = figure(layout)
+	draw(fig, fns, grid, params, layout, title, cache, adaptive)
+	fig.savefig(path, dpi=dpi)
+	return path
+
+def show(fns: list, grid: Grid, params: dict=None, layout: str=SIX_PANEL, title: str=None, cache: FieldCache=None, adaptive: int=0) -> None:
+	"""
+	Draw in an interactive pyplot window instead of to a file.
+	"""
+
+	import matplotlib.pyplot as plt
+	fig = plt.figure(figsize=(18, 9) if layout == SIX_PANEL else (12, 5))
+	draw(fig, fns, grid, params, layout, title, cache, adaptive)
+	plt.show()
+
+# ===== CLI ===== #
+
+def pairs(module) -> list[tuple[str, str, str]]:
+	"""
+	Every (profile, drive function, stat function) triple in a module,
+	going by the <profile>_drive/<profile>_stat naming convention.
+	"""
+
+	r = []
+	for name in sorted(dir(module)):
+		if name.endswith("_drive") and hasattr(module, name[:-len("_drive")] + "_stat"):
+			profile = name[:-len("_drive")]
+			r.append((profile, name, profile + "_stat"))
+	return r
+
+def _parse_params(items: list[str]) -> dict:
+	params = {}
+	for item in items or []:
+		key, _, value = item.partition("=")
+		params[key] = float(value)
+	return params
+
+def _missing_params(fn, params: dict) -> list[str]:
+	# Everything after the two coordinates must come from -p
+	required = [p.name for p in list(inspect.signature(fn).parameters.values())[2:] if p.default is inspect.Parameter.empty and p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+	return [name for name in required if name not in params]
+
+def _output(path: str, name: str) -> str:
+	if os.path.isdir(path):
+		return os.path.join(path, name + ".png")
+	return path
+
+def _render_job(job) -> str:
+	source, names, path, grid_args, params, layout, options, title = job
+	module = util.load_module(source)
+	fns = [cartesify(getattr(module, name), options["squared"], options["log"]) for name in names]
+	return render(path, fns, Grid(*grid_args), params, layout, title, adaptive=options["adaptive"])
+
+def main(argv: list[str]=None) -> list[str]:
+	parser = argparse.ArgumentParser(prog="python -m sxl.plotting", description="Render energy-density fields to image files.")
+	parser.add_argument("module", help="module name or path of a .py file defining the fields, e.g. grapher or 00_grapher.py")
+	parser.add_argument("--drive", help="field for the drive's rest frame (six-panel layout)")
+	parser.add_argument("--stat", help="field for Earth's rest frame (six-panel layout)")
+	parser.add_argument("--field", help="single field to plot (two-panel layout)")
+	parser.add_argument("--all", action="store_true", help="render every <profile>_drive/<profile>_stat pair in the module")
+	parser.add_argument("-o", "--output", default=".", help="output file, or directory with --all")
+	parser.add_argument("-p", "--param", action="append", metavar="NAME=VALUE", help="keyword parameter passed to every field (repeatable)")
+	parser.add_argument("--lim", type=float, default=3, help="half-width of the square (x, z) grid")
+	parser.add_argument("-n", "--resolution", type=int, default=100, help="grid points per axis")
+	parser.add_argument("--squared", action="store_true", help="feed R = x^2 + z^2 instead of the radius (grapher.py convention)")
+	parser.add_argument("--title", default=None)
+	parser.add_argument("-j", "--jobs", type=int, default=1, help="render this many files in parallel")
+	parser.add_argument("--show", action="store_true", help="open an interactive window instead of writing a file")
+	parser.add_argument("--adaptive", type=int, default=0, metavar="DEPTH", help="sample the contour panels adaptively, refining up to DEPTH times")
+	parser.add_argument("--log", action="store_true", help="evaluate the fields in the log domain (for very large exponents)")
+	args = parser.parse_args(argv)
+
+	params = _parse_params(args.param)
+	options = {"squared": args.squared, "log": args.log, "adaptive": args.adaptive}
+	grid_args = ((-args.lim, args.lim), (-args.lim, args.lim), args.resolution)
+	module = util.load_module(args.module)
+	source = module.__file__ if args.module.endswith(".py") else args.module
+
+	jobs = []
+	if args.all:
+		os.makedirs(args.output, exist_ok=True)
+		for profile, drive, stat in pairs(module):
+			title = args.title or "Warp drive Eulerian energy densities ({} drive function)".format(profile.replace("_", " "))
+			jobs.append((source, (drive, stat), os.path.join(args.output, profile + ".png"), grid_args, params, SIX_PANEL, options, title))
+	elif args.field is not None:
+		jobs.append((source, (args.field,), _output(args.output, args.field), grid_args, params, TWO_PANEL, options, args.title))
+	elif args.drive is not None and args.stat is not None:
+		jobs.append((source, (args.drive, args.stat), _output(args.output, args.drive), grid_args, params, SIX_PANEL, options, args.title))
+	else:
+		parser.error("need --drive and --stat, --field, or --all")
+
+	for name in sorted({name for job in jobs for name in job[1]}):
+		missing = _missing_params(getattr(module, name), params)
+		if missing:
+			parser.error("{} needs {}".format(name, " ".join("-p {}=VALUE".format(x) for x in missing)))
+
+	if args.show:
+		if len(jobs) != 1:
+			parser.error("--show only works with a single figure")
+		_, names, _, _, _, layout, _, title = jobs[0]
+		show([cartesify(getattr(module, name), args.squared, args.log) for name in names], Grid(*grid_args), params, layout, title, adaptive=args.adaptive)
+		return []
+
+	if args.jobs > 1 and len(jobs) > 1:
+		with Pool(args.jobs) as pool:
+			paths = pool.map(_render_job, jobs)
+	else:
+		paths = [_render_job(job) for job in jobs]
+
+	for path in paths:
+		print("Rendered", path)
+	return paths
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,288 @@
+"""
+Ray tracing of null geodesics through solved metrics.
+
+A camera sits at a point of the manifold with an orthonormal frame
+built from the metric there (Gram-Schmidt on the coordinate basis,
+starting from the time direction, so it is the frame of an observer
+at rest in the coordinates). Every pixel becomes a past-directed null
+geodesic leaving the camera along that pixel's direction, and all of
+them are integrated together with the batched geodesic integrator,
+in chunks, optionally across worker processes. Each ray is then
+coloured by how it ended: by the event that stopped it (falling into
+a horizon, reaching the celestial sphere) or as a miss.
+
+For example, a Schwarzschild black hole in front of a checkered sky:
+
+	mf = spacetime.Manifold(library.sph_schwarzschild())
+	renderer = raytrace.Renderer(mf, raytrace.spherical_scene(2, 60), defaults={"G": 1, "M": 1, "c": 1})
+	image = renderer.render(raytrace.Camera([0, 30, 1.4, 0], 512, 512, fov=50))
+	raytrace.save(image, "schwarzschild.png")
+
+or from the command line,
+
+	python -m sxl.raytrace sph_schwarzschild --camera 0 30 1.4 0 -W 1024 -H 1024 --horizon 2 --sky 60 -p G=1 -p M=1 -p c=1 -j 8 -o bh.png
+"""
+
+import argparse
+import numpy as np
+from multiprocessing import Pool
+from sxl import geodesics
+from sxl import spacetime
+from sxl import util
+
+class RenderError(Exception):
+	pass
+
+# ===== CAMERA ===== #
+
+def tetrad(g: np.ndarray, order: list) -> np.ndarray:
+	"""
+	An orthonormal frame (rows) for the metric g at one point, by
+	Gram-Schmidt on the coordinate basis vectors taken in the given
+	order of indices. The first one has to be timelike.
+	"""
+
+	n = len(g)
+	frame, signs = [], []
+	for index in order:
+		v = np.zeros(n)
+		v[index] = 1.0
+		for e, s in zip(frame, signs):
+			v = v - s * (e @ g @ v) * e
+		norm = v @ g @ v
+		if not np.isfinite(norm) or abs(norm) < 1e-300:
+			raise RenderError("The coordinate basis is degenerate at the camera position.")
+		frame.append(v / np.sqrt(abs(norm)))
+		signs.append(np.sign(norm))
+	return np.array(frame)
+
+class Camera:
+
+	"""
+	A pinhole camera at a coordinate position, looking along
+	look * d/dx^forward with d/dx^up pointing up the image. By default
+	it looks towards decreasing values of the first spatial coordinate
+	(the centre, in spherical coordinates) with the second one up.
+	fov is the horizontal field of view in degrees.
+	"""
+
+	def __init__(self, position, width: int, height: int, fov: float=60.0, forward: int=1, up: int=2, look: int=-1):
+		self.position = np.asarray(position, dtype=float)
+		self.width = width
+		self.height = height
+		self.fov = fov
+		self.forward = forward
+		self.up = up
+		self.look = look
+		self.right = [i for i in range(1, len(self.position)) if i not in (forward, up)]
+
+	def __len__(self):
+		return self.width * self.height
+
+	def frame(self, g: np.ndarray) -> tuple:
+		e = tetrad(g, [0, self.forward, self.up] + self.right)
+		return e[0], self.look * e[1], e[2], e[3:]
+
+	def rays(self, g: np.ndarray, start: int=0, stop: int=None) -> np.ndarray:
+		"""
+		Initial states (M, 2n) of the rays for pixels start to stop, in
+		row-major order from the top left, given the metric g at the
+		camera position.
+		"""
+
+		stop = len(self) if stop is None else stop
+		time, forward, up, right = self.frame(g)
+		pixel = np.arange(start, stop)
+		scale = np.tan(np.radians(self.fov) / 2)
+		sx = scale * (2 * (pixel % self.width + 0.5) / self.width - 1)
+		sy = scale * (1 - 2 * (pixel // self.width + 0.5) / self.height) * self.height / self.width
+
+		d = forward[None, :] + sy[:, None] * up[None, :]
+		if len(right) > 0:
+			d = d - sx[:, None] * right[0][None, :]
+		d = d / np.sqrt(1 + sx**2 + sy**2)[:, None]
+		k = d - time[None, :]
+		return np.concatenate([np.broadcast_to(self.position, k.shape), k], axis=1)
+
+# ===== SCENES ===== #
+
+def checkerboard(theta: int=2, phi: int=3, divisions: int=18, colors=((0.9, 0.9, 0.9), (0.15, 0.3, 0.6))):
+	"""
+	A checkered celestial sphere, coloured by the final values of the
+	polar and azimuthal coordinates of a ray.
+	"""
+
+	colors = np.asarray(colors, dtype=float)
+
+	def sky(y):
+		th = np.mod(y[:, theta], 2 * np.pi)
+		th = np.where(th > np.pi, 2 * np.pi - th, th)
+		i = np.floor(th / np.pi * divisions).astype(int)
+		j = np.floor(np.mod(y[:, phi], 2 * np.pi) / np.pi * divisions).astype(int)
+		return colors[(i + j) % 2]
+	return sky
+
+def cartesian_checkerboard(indices=(1, 2, 3), divisions: int=18, colors=((0.9, 0.9, 0.9), (0.15, 0.3, 0.6))):
+	"""
+	The same sky for rectangular coordinates, using the direction of
+	the final position from the origin.
+	"""
+
+	sky = checkerboard(0, 1, divisions, colors)
+
+	def cartesian(y):
+		x, yy, z = (y[:, i] for i in indices)
+		r = np.sqrt(x**2 + yy**2 + z**2)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			return sky(np.stack([np.arccos(np.clip(z / r, -1, 1)), np.arctan2(yy, x)], axis=1))
+	return cartesian
+
+def spherical_scene(horizon: float=None, sky_radius: float=50.0, sky=None, r: int=1) -> list:
+	"""
+	Events for a metric in (t, r, theta, phi): rays entering the
+	horizon (if any) are black, rays reaching sky_radius take the
+	colour of the sky there.
+	"""
+
+	scene = [(geodesics.escape(r, sky_radius), sky if sky is not None else checkerboard())]
+	if horizon is not None:
+		scene.insert(0, (geodesics.horizon(r, horizon, 1e-3), (0.0, 0.0, 0.0)))
+	return scene
+
+def cartesian_scene(sky_radius: float=50.0, sky=None, indices=(1, 2, 3)) -> list:
+	def escape(y):
+		return sky_radius - np.sqrt(sum(y[:, i]**2 for i in indices))
+	return [(escape, sky if sky is not None else cartesian_checkerboard(indices))]
+
+# ===== RENDERING ===== #
+
+_worker = None
+
+def _initialize(state):
+	global _worker
+	_worker = state
+
+def _trace(job):
+	start, stop = job
+	integrator, camera, scene, g, options, params = _worker
+	y0 = camera.rays(g, start, stop)
+	result = integrator.integrate(y0, options["lam"], [e for e, _ in scene], options["rtol"], options["atol"], max_steps=options["max_steps"], **params)
+
+	colors = np.empty((stop - start, 3))
+	colors[:] = options["miss"]
+	for j, (_, color) in enumerate(scene):
+		mask = (result.status == geodesics.EVENT) & (result.event == j)
+		if np.any(mask):
+			colors[mask] = color(result.y[mask]) if callable(color) else color
+	return start, stop, colors, result.steps.sum(), np.bincount(result.status, minlength=5)
+
+class Renderer:
+
+	"""
+	Traces camera rays through a manifold. scene is a list of (event,
+	colour) pairs: rays stopped by an event take its colour, which is
+	either an RGB triple or a function of the final states; rays that
+	end any other way (running out of affine parameter, singular or
+	stalled) are coloured miss.
+	"""
+
+	def __init__(self, manifold, scene: list, defaults: dict=None, lam: float=1000.0, rtol: float=1e-6, atol: float=1e-8, max_steps: int=20000, miss=(1.0, 0.0, 1.0), chunk: int=16384, processes: int=None):
+		if isinstance(manifold, geodesics.GeodesicIntegrator):
+			self.integrator = manifold
+		else:
+			self.integrator = geodesics.GeodesicIntegrator(manifold, defaults)
+		self.scene = scene
+		self.options = {"lam": lam, "rtol": rtol, "atol": atol, "max_steps": max_steps, "miss": np.asarray(miss, dtype=float)}
+		self.chunk = chunk
+		self.processes = processes
+		self.statistics = None
+
+	def render(self, camera: Camera, **params) -> np.ndarray:
+		"""
+		Render an image, returned as a (height, width, 3) array of RGB
+		values in [0, 1]. Statistics of the last render (steps taken and
+		how the rays ended) are kept in self.statistics.
+		"""
+
+		g = self.integrator.metric_at(camera.position[None, :], **params)[0]
+		state = (self.integrator, camera, self.scene, g, self.options, params)
+		jobs = [(start, min(start + self.chunk, len(camera))) for start in range(0, len(camera), self.chunk)]
+		image = np.empty((len(camera), 3))
+		steps, status = 0, np.zeros(5, dtype=int)
+
+		with util.ProgressBar("Tracing rays", len(jobs)) as pb:
+			if self.processes is not None and self.processes > 1:
+				with Pool(self.processes, initializer=_initialize, initargs=(state,)) as pool:
+					results = pool.imap_unordered(_trace, jobs)
+					for start, stop, colors, s, st in results:
+						image[start:stop] = colors
+						steps, status = steps + s, status + st
+						pb.done()
+			else:
+				_initialize(state)
+				for job in jobs:
+					start, stop, colors, s, st = _trace(job)
+					image[start:stop] = colors
+					steps, status = steps + s, status + st
+					pb.done()
+
+		self.statistics = {"rays": len(camera), "steps": int(steps)}
+		self.statistics.update({name: int(status[k]) for k, name in geodesics.STATUS_NAMES.items()})
+		return image.reshape(camera.height, camera.width, 3)
+
+def save(image: np.ndarray, path: str) -> None:
+	"""
+	Write an image: .npy keeps the raw floats, .ppm needs nothing but
+	NumPy, anything else goes through matplotlib.
+	"""
+
+	if path.endswith(".npy"):
+		np.save(path, image)
+	elif path.endswith(".ppm"):
+		with open(path, "wb") as f:
+			f.write("P6 {} {} 255\n".format(image.shape[1], image.shape[0]).encode())
+			f.write((np.clip(image, 0, 1) * 255).round().astype(np.uint8).tobytes())
+	else:
+		try:
+			from matplotlib import image as mpimg
+		except ImportError:
+			raise RenderError("Saving \"{}\" needs matplotlib; use a .ppm or .npy file instead.".format(path))
+		mpimg.imsave(path, np.clip(image, 0, 1))
+
+def main(argv: list[str]=None) -> np.ndarray:
+	from sxl import library
+
+	parser = argparse.ArgumentParser(prog="python -m sxl.raytrace", description="Render null geodesics through a library metric.")
+	parser.add_argument("metric", help="name of a metric function in sxl.library, e.g. sph_schwarzschild")
+	parser.add_argument("--camera", type=float, nargs="+", required=True, help="camera position in coordinates")
+	parser.add_argument("-W", "--width", type=int, default=256)
+	parser.add_argument("-H", "--height", type=int, default=256)
+	parser.add_argument("--fov", type=float, default=60.0, help="horizontal field of view in degrees")
+	parser.add_argument("--horizon", type=float, default=None, help="radius of a horizon to stop rays at")
+	parser.add_argument("--sky", type=float, default=50.0, help="radius of the celestial sphere")
+	parser.add_argument("--cartesian", action="store_true", help="the metric uses rectangular coordinates")
+	parser.add_argument("-p", "--param", action="append", metavar="NAME=VALUE", help="metric parameter (repeatable)")
+	parser.add_argument("--lam", type=float, default=1000.0, help="maximum affine parameter per ray")
+	parser.add_argument("--rtol", type=float, default=1e-6)
+	parser.add_argument("-c", "--chunk", type=int, default=16384, help="rays per batch")
+	parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+	parser.add_argument("-o", "--output", default="render.png")
+	args = parser.parse_args(argv)
+
+	params = {}
+	for item in args.param or []:
+		key, _, value = item.partition("=")
+		params[key] = float(value)
+
+	if not hasattr(library, args.metric):
+		raise RenderError("No metric \"{}\" in sxl.library.".format(args.metric))
+	manifold = spacetime.Manifold(getattr(library, args.metric)())
+	scene = cartesian_scene(args.sky) if args.cartesian else spherical_scene(args.horizon, args.sky)
+	renderer = Renderer(manifold, scene, params, args.lam, args.rtol, chunk=args.chunk, processes=args.jobs)
+	image = renderer.render(Camera(args.camera, args.width, args.height, args.fov))
+	save(image, args.output)
+	print(renderer.statistics)
+	return image
+
+if __name__ == "__main__":
+	main()
@@ -1,3 +1,4 @@
+import os
 from sympy import Symbol
 from sympy import pi
 
@@ -6,6 +7,7 @@ autocompute = True
 autosolve = True
 autodefine = True
 cosmological_constant = False
+codegen_cache = os.environ.get("SXL_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "sxl", "kernels"))
 
 class UnitSystem:
 
@@ -0,0 +1,233 @@
+"""
+Long-running worldline simulations of observer ensembles.
+
+An ensemble is split into contiguous partitions, one per worker
+process. The compiled kernels (geodesic acceleration, metric and any
+FieldTheory forces) are handed to the workers by reference to the
+codegen cache, so every worker imports the same generated modules
+instead of redoing the symbolic work. Between checkpoints each worker
+advances its partition by a fixed number of RK4 steps; the parent
+then gathers the arrays, records throughput and, every so often,
+writes a checkpoint directory
+
+	<directory>/checkpoint_00001000/
+		position.npy, velocity.npy, proper_time.npy, mass.npy,
+		coupling_<name>.npy, meta.json
+
+which is written to a temporary name first and renamed when complete,
+so an interrupted run always leaves a consistent latest checkpoint to
+resume from. For example,
+
+	sim = simulation.Simulation(ensemble, "runs/infall", dtau=0.01, forces=[theory], processes=8)
+	sim.run(100000, checkpoint_every=1000)
+
+and after an interruption,
+
+	sim = simulation.Simulation.resume("runs/infall", integrator, forces=[theory], processes=8)
+	sim.run(100000)
+"""
+
+import os
+import json
+import time
+import shutil
+import numpy as np
+from multiprocessing import Pool
+from sxl import geodesics
+from sxl import util
+
+FORMAT_VERSION = 1
+
+CHECKPOINT_PREFIX = "checkpoint_"
+
+class SimulationError(Exception):
+	pass
+
+# ===== CHECKPOINTS ===== #
+
+def checkpoints(directory: str) -> list[str]:
+	"""
+	Complete checkpoints in a directory, oldest first.
+	"""
+
+	if not os.path.isdir(directory):
+		return []
+	names = sorted(x for x in os.listdir(directory) if x.startswith(CHECKPOINT_PREFIX) and not x.endswith(".tmp"))
+	return [os.path.join(directory, x) for x in names if os.path.exists(os.path.join(directory, x, "meta.json"))]
+
+def write_checkpoint(directory: str, ensemble: geodesics.ObserverEnsemble, meta: dict) -> str:
+	path = os.path.join(directory, "{}{:08d}".format(CHECKPOINT_PREFIX, meta["step"]))
+	tmp = path + ".tmp"
+	if os.path.exists(tmp):
+		shutil.rmtree(tmp)
+	os.makedirs(tmp)
+
+	np.save(os.path.join(tmp, "position.npy"), ensemble.position)
+	np.save(os.path.join(tmp, "velocity.npy"), ensemble.velocity)
+	np.save(os.path.join(tmp, "proper_time.npy"), ensemble.proper_time)
+	np.save(os.path.join(tmp, "mass.npy"), ensemble.mass)
+	for name, values in ensemble.couplings.items():
+		np.save(os.path.join(tmp, "coupling_{}.npy".format(name)), values)
+	meta = dict(meta, version=FORMAT_VERSION, couplings=list(ensemble.couplings), norm=ensemble.norm, params=ensemble.params)
+	with open(os.path.join(tmp, "meta.json"), "w") as f:
+		json.dump(meta, f, indent=1)
+
+	if os.path.exists(path):
+		shutil.rmtree(path)
+	os.replace(tmp, path)
+	return path
+
+def read_checkpoint(path: str, integrator: geodesics.GeodesicIntegrator) -> tuple[geodesics.ObserverEnsemble, dict]:
+	"""
+	Load a checkpoint as (ensemble, meta).
+	"""
+
+	with open(os.path.join(path, "meta.json")) as f:
+		meta = json.load(f)
+	if meta["version"] > FORMAT_VERSION:
+		raise SimulationError("Checkpoint {} was written by a newer version of sxl.simulation (format {}).".format(path, meta["version"]))
+
+	load = lambda name: np.load(os.path.join(path, name))
+	ensemble = geodesics.ObserverEnsemble(integrator, load("position.npy"), load("velocity.npy"), load("proper_time.npy"), load("mass.npy"),
+		{name: load("coupling_{}.npy".format(name)) for name in meta["couplings"]}, meta["norm"], meta["params"])
+	return ensemble, meta
+
+# ===== WORKERS ===== #
+
+_worker = None
+
+def _initialize(integrator, forces):
+	global _worker
+	_worker = (integrator, forces)
+
+def _advance(job):
+	position, velocity, proper_time, mass, couplings, norm, params, steps, dtau = job
+	integrator, forces = _worker
+	ensemble = geodesics.ObserverEnsemble(integrator, position, velocity, proper_time, mass, couplings, norm, params)
+	start = time.perf_counter()
+	for _ in range(steps):
+		ensemble.step(dtau, forces)
+	return ensemble.position, ensemble.velocity, ensemble.proper_time, time.perf_counter() - start
+
+# ===== RUNNER ===== #
+
+class Simulation:
+
+	"""
+	Steps an ObserverEnsemble in proper time, in parallel, with
+	checkpoints. metrics holds one entry per batch of steps: the step
+	reached, wall time, steps per second and observer-steps per second
+	(also appended to metrics.jsonl in the directory).
+	"""
+
+	def __init__(self, ensemble: geodesics.ObserverEnsemble, directory: str, dtau: float, forces: list=(), processes: int=None, step: int=0, keep: int=3):
+		self.ensemble = ensemble
+		self.integrator = ensemble.integrator
+		self.directory = directory
+		self.dtau = dtau
+		self.forces = list(forces)
+		self.processes = processes if processes is not None else 1
+		self.step = step
+		self.keep = keep
+		self.metrics = []
+		os.makedirs(directory, exist_ok=True)
+
+	def __repr__(self):
+		return "<Simulation of {} observers at step {} (tau = {:g}) in {}>".format(len(self.ensemble), self.step, self.step * self.dtau, self.directory)
+
+	@classmethod
+	def resume(cls, directory: str, integrator: geodesics.GeodesicIntegrator, forces: list=(), processes: int=None, keep: int=3) -> "Simulation":
+		"""
+		Continue from the latest complete checkpoint in a directory.
+		"""
+
+		found = checkpoints(directory)
+		if len(found) == 0:
+			raise SimulationError("No checkpoints to resume from in \"{}\".".format(directory))
+		ensemble, meta = read_checkpoint(found[-1], integrator)
+		return cls(ensemble, directory, meta["dtau"], forces, processes, meta["step"], keep)
+
+	def partitions(self) -> list[slice]:
+		bounds = np.linspace(0, len(self.ensemble), self.processes + 1).astype(int)
+		return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+	def _jobs(self, steps: int) -> list:
+		e = self.ensemble
+		return [
+			(e.position[p], e.velocity[p], e.proper_time[p], e.mass[p], {k: v[p] for k, v in e.couplings.items()}, e.norm, e.params, steps, self.dtau)
+			for p in self.partitions()
+		]
+
+	def _gather(self, results: list) -> float:
+		busy = 0.0
+		for p, (position, velocity, proper_time, elapsed) in zip(self.partitions(), results):
+			self.ensemble.position[p] = position
+			self.ensemble.velocity[p] = velocity
+			self.ensemble.proper_time[p] = proper_time
+			busy = max(busy, elapsed)
+		return busy
+
+	def checkpoint(self) -> str:
+		path = write_checkpoint(self.directory, self.ensemble, {"step": self.step, "dtau": self.dtau, "tau": self.step * self.dtau, "written": time.time()})
+		for old in checkpoints(self.directory)[:-self.keep]:
+			shutil.rmtree(old)
+		return path
+
+	def _record(self, steps: int, wall: float, busy: float) -> None:
+		entry = {
+			"step": self.step,
+			"steps": steps,
+			"wall": wall,
+			"busy": busy,
+			"steps_per_second": steps / wall if wall > 0 else float("inf"),
+			"observer_steps_per_second": steps * len(self.ensemble) / wall if wall > 0 else float("inf")
+		}
+		self.metrics.append(entry)
+		with open(os.path.join(self.directory, "metrics.jsonl"), "a") as f:
+			f.write(json.dumps(entry) + "\n")
+
+	def run(self, until: int, checkpoint_every: int=1000, batch: int=None) -> None:
+		"""
+		Step until the step count reaches until, checkpointing every
+		checkpoint_every steps (and at the end). Work is handed to the
+		workers batch steps at a time (checkpoint_every by default).
+		"""
+
+		batch = batch if batch is not None else checkpoint_every
+		remaining = max(until - self.step, 0)
+		batches = -(-remaining // batch)
+		pool = Pool(self.processes, initializer=_initialize, initargs=(self.integrator, self.forces)) if self.processes > 1 else None
+		if pool is None:
+			_initialize(self.integrator, self.forces)
+
+		try:
+			with util.ProgressBar("Simulating worldlines", batches) as pb:
+				while self.step < until:
+					steps = min(batch, until - self.step, checkpoint_every - self.step % checkpoint_every)
+					start = time.perf_counter()
+					jobs = self._jobs(steps)
+					results = pool.map(_advance, jobs) if pool is not None else [_advance(job) for job in jobs]
+					busy = self._gather(results)
+					self.step += steps
+					self._record(steps, time.perf_counter() - start, busy)
+					if self.step % checkpoint_every == 0 or self.step == until:
+						self.checkpoint()
+					pb.done("{:.3g} observer-steps/s".format(self.metrics[-1]["observer_steps_per_second"]))
+		finally:
+			if pool is not None:
+				pool.close()
+				pool.join()
+
+	def throughput(self) -> dict:
+		"""
+		Totals over all batches run so far.
+		"""
+
+		steps = sum(m["steps"] for m in self.metrics)
+		wall = sum(m["wall"] for m in self.metrics)
+		return {
+			"steps": steps,
+			"wall": wall,
+			"steps_per_second": steps / wall if wall > 0 else 0.0,
+			"observer_steps_per_second": steps * len(self.ensemble) / wall if wall > 0 else 0.0
+		}
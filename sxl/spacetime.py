@@ -113,11 +113,14 @@ class MetricTensor(Dimensional):
 	Describes a 4D (+---) metric tensor.
 	"""
 
-	def __init__(self, m: list[list[Symbol]], coordinates: Coordinates) -> None:
+	def __init__(self, m: list[list[Symbol]], coordinates: Coordinates, inverse: list[list[Symbol]]=None) -> None:
 		print(m)
 		self.coordinates = coordinates
 		self.metric_tensor_dd = m
-		self.metric_tensor_uu = Matrix(m).inv().tolist()
+		if inverse is None:
+			self.metric_tensor_uu = Matrix(m).inv().tolist()
+		else:
+			self.metric_tensor_uu = inverse
 		self.dimension = dim(self.coordinates)
 	
 	def __dim__(self):
@@ -182,7 +185,7 @@ class Scalar(Definable):
 	def __call__(self, metric: MetricTensor=None): # TODO: clean that up!! Not sure why but something is passing a positional arg to this elsewhere...
 		return self.value
 
-	def compute(self):
+	def compute(self, st: "Spacetime"=None):
 		pass
 
 	@cache
@@ -538,6 +541,7 @@ class Manifold(Dimensional):
 	"""
 	
 	_computed = True
+	exporter = None
 
 	def __init__(self, metric: MetricTensor) -> None:
 		self.metric_tensor = metric
@@ -550,7 +554,7 @@ class Manifold(Dimensional):
 			x = obj(self.metric_tensor)
 			self.definitions[x.name] = x
 			if settings.autocompute and ac:
-				self[x.name].compute(self)
+				self._compute(self[x.name])
 			else:
 				self._computed = False
 		elif type(obj) == DefinablePackage:
@@ -565,16 +569,23 @@ class Manifold(Dimensional):
 	def consider(self, obj):
 		self._a(obj, False)
 
+	def _compute(self, obj: Definable) -> None:
+		obj.compute(self)
+		if self.exporter is not None:
+			self.exporter.write(obj)
+
 	def compute(self):
-		for obj in self.definitions.values():
-			obj.compute()
+		for name, obj in list(self.definitions.items()):
+			if name != "metric":
+				self._compute(obj)
 		self._computed = True
 
 	def solve(self):
 		if not self._computed:
 			self.compute()
-		for obj in self.definitions.values():
-			obj.solve()
+		for name, obj in self.definitions.items():
+			if name != "metric":
+				obj.solve()
 
 	def _of_by_name(self, name: str) -> Definable:
 		if name not in self.definitions.keys():
@@ -586,7 +597,7 @@ class Manifold(Dimensional):
 			if type(self.definitions[d]) == t:
 				return self.definitions[d]
 		if settings.autodefine:
-			self.define(t(self.metric_tensor))
+			self.define(t)
 			return self._of_by_type(t)
 		raise TypeError("No such object of type \"" + str(t.__name__) + "\" defined on this spacetime.")
 
@@ -4,6 +4,9 @@ import math
 import time
 import functools
 import itertools
+import os
+import importlib
+import importlib.util
 
 version = "1.0"
 
@@ -197,4 +200,25 @@ def riemann_sets(dimension: int):
 			(1, 3, 1, 3),
 			(1, 3, 2, 3),
 			(2, 3, 2, 3)
-		]
\ No newline at end of file
+		]
+
+_loaded = {}
+
+def load_module(source: str):
+	"""
+	Import a module by name, or by path for scripts like 00_grapher.py
+	whose names are not valid identifiers.
+	"""
+
+	if source in _loaded:
+		return _loaded[source]
+	if source.endswith(".py") or os.path.sep in source:
+		name = os.path.splitext(os.path.basename(source))[0]
+		spec = importlib.util.spec_from_file_location(name, source)
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[name] = module
+		spec.loader.exec_module(module)
+	else:
+		module = importlib.import_module(source)
+	_loaded[source] = module
+	return module
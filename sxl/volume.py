@@ -0,0 +1,233 @@
+"""
+Chunked evaluation of fields over 3D volumes.
+
+00_grapher.f_cartesian only ever gets evaluated on the y=0 slice,
+because a whole warp-bubble volume at useful resolution (512^3 is
+already a gigabyte of float64) does not fit comfortably in memory
+and takes a long time in one thread. Here the (x, y, z) box is cut
+into tiles that are evaluated independently, by a process pool or by
+threads (NumPy releases the GIL inside its array loops), and written
+straight into a memory-mapped .npy file. Integrated quantities are
+accumulated tile by tile as results come in:
+
+	* the total negative and positive energy, int min(f, 0) dV and
+	  int max(f, 0) dV, and the volume where f < 0;
+	* the area of the zero surface f = 0, estimated as the volume of
+	  the slab |f| / |grad f| < h/2 divided by its thickness h.
+
+For example,
+
+	stats = volume.evaluate(grapher00.f_cartesian, (-2.5, 2.5), (-2.5, 2.5), (-2.5, 2.5), 512, path="bubble.npy", processes=8)
+
+or from the command line,
+
+	python -m sxl.volume 00_grapher.py f_cartesian -n 512 --lim 2.5 -o bubble.npy -j 8
+"""
+
+import argparse
+import numpy as np
+from itertools import product
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from sxl import util
+
+class VolumeStats:
+
+	"""
+	Running totals for the integrated quantities of a volume.
+	"""
+
+	def __init__(self):
+		self.negative = 0.0
+		self.positive = 0.0
+		self.negative_volume = 0.0
+		self.zero_area = 0.0
+		self.minimum = np.inf
+		self.maximum = -np.inf
+		self.points = 0
+		self.nonfinite = 0
+
+	def __repr__(self):
+		return "<VolumeStats negative={:.6g} positive={:.6g} negative volume={:.6g} zero area={:.6g} range=[{:.6g}, {:.6g}] non-finite={}/{}>".format(
+			self.negative, self.positive, self.negative_volume, self.zero_area, self.minimum, self.maximum, self.nonfinite, self.points)
+
+	def merge(self, other: "VolumeStats") -> "VolumeStats":
+		self.negative += other.negative
+		self.positive += other.positive
+		self.negative_volume += other.negative_volume
+		self.zero_area += other.zero_area
+		self.minimum = min(self.minimum, other.minimum)
+		self.maximum = max(self.maximum, other.maximum)
+		self.points += other.points
+		self.nonfinite += other.nonfinite
+		return self
+
+	def as_dict(self) -> dict:
+		return dict(vars(self))
+
+class Volume:
+
+	"""
+	A regular (x, y, z) grid over a box, in "ij" index order.
+	"""
+
+	def __init__(self, xlim: tuple, ylim: tuple, zlim: tuple, shape):
+		self.limits = (tuple(map(float, xlim)), tuple(map(float, ylim)), tuple(map(float, zlim)))
+		self.shape = (shape,) * 3 if type(shape) == int else tuple(shape)
+		self.axes = [np.linspace(lo, hi, n) for (lo, hi), n in zip(self.limits, self.shape)]
+		self.spacing = tuple((hi - lo) / (n - 1) for (lo, hi), n in zip(self.limits, self.shape))
+		self.cell_volume = float(np.prod(self.spacing))
+
+	def tiles(self, chunk) -> list[tuple[slice, slice, slice]]:
+		chunk = (chunk,) * 3 if type(chunk) == int else tuple(chunk)
+		starts = [range(0, n, c) for n, c in zip(self.shape, chunk)]
+		return [
+			tuple(slice(s, min(s + c, n)) for s, c, n in zip(start, chunk, self.shape))
+			for start in product(*starts)
+		]
+
+	def coordinates(self, tile: tuple, halo: int=0) -> tuple:
+		"""
+		The coordinate arrays of a tile, grown by halo points on every
+		side that the grid allows.
+		"""
+
+		ranges = []
+		for axis, sl in zip(self.axes, tile):
+			ranges.append(axis[max(sl.start - halo, 0):min(sl.stop + halo, len(axis))])
+		return np.meshgrid(*ranges, indexing="ij")
+
+def _interior(tile: tuple, halo: int) -> tuple:
+	return tuple(slice(sl.start - max(sl.start - halo, 0), sl.start - max(sl.start - halo, 0) + sl.stop - sl.start) for sl in tile)
+
+def tile_stats(F: np.ndarray, interior: tuple, volume: Volume) -> VolumeStats:
+	"""
+	Integrated quantities for one tile. F includes the halo, which is
+	only used for the gradient in the zero-surface estimate.
+	"""
+
+	stats = VolumeStats()
+	core = F[interior]
+	finite = np.isfinite(core)
+	values = core[finite]
+	dV = volume.cell_volume
+
+	stats.points = core.size
+	stats.nonfinite = int(core.size - values.size)
+	if values.size > 0:
+		stats.negative = float(np.sum(values[values < 0])) * dV
+		stats.positive = float(np.sum(values[values > 0])) * dV
+		stats.negative_volume = float(np.count_nonzero(values < 0)) * dV
+		stats.minimum = float(values.min())
+		stats.maximum = float(values.max())
+
+	if min(F.shape) > 1:
+		h = dV ** (1/3)
+		with np.errstate(all="ignore"):
+			gradient = np.gradient(F, *volume.spacing)
+			norm = np.sqrt(sum(g**2 for g in gradient))[interior]
+			slab = finite & np.isfinite(norm) & (np.abs(core) < 0.5 * h * norm)
+		stats.zero_area = float(np.count_nonzero(slab)) * dV / h
+	return stats
+
+def _evaluate_tile(job) -> VolumeStats:
+	fn, volume, tile, path, dtype, params = job
+	x, y, z = volume.coordinates(tile, 1)
+	with np.errstate(all="ignore"):
+		F = np.broadcast_to(np.asarray(fn(x, y, z, **params), dtype=float), x.shape)
+	interior = _interior(tile, 1)
+	if path is not None:
+		out = np.load(path, mmap_mode="r+") if type(path) == str else path
+		out[tile] = F[interior].astype(dtype)
+		if type(path) == str:
+			out.flush()
+	return tile_stats(F, interior, volume)
+
+def evaluate(fn, xlim: tuple, ylim: tuple, zlim: tuple, shape=128, path: str=None, chunk=64, processes: int=None, threads: bool=False, dtype=np.float32, **params) -> VolumeStats:
+	"""
+	Evaluate fn(x, y, z, **params) over a box and return the
+	integrated quantities.
+
+	If path is given, the values are also written to a memory-mapped
+	.npy file there (as dtype). With processes > 1 tiles go to a
+	process pool, which needs fn to be picklable (a module-level
+	function); with threads=True a thread pool is used instead.
+	"""
+
+	volume = Volume(xlim, ylim, zlim, shape)
+	tiles = volume.tiles(chunk)
+
+	target = None
+	if path is not None:
+		out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=volume.shape)
+		del out
+		target = path
+		if threads or not processes or processes <= 1:
+			target = np.load(path, mmap_mode="r+")
+
+	jobs = [(fn, volume, tile, target, dtype, params) for tile in tiles]
+	stats = VolumeStats()
+
+	with util.ProgressBar("Evaluating volume", len(tiles)) as pb:
+		if processes is not None and processes > 1 and not threads:
+			with Pool(processes) as pool:
+				for result in pool.imap_unordered(_evaluate_tile, jobs):
+					stats.merge(result)
+					pb.done()
+		elif threads:
+			with ThreadPoolExecutor(processes) as pool:
+				for result in pool.map(_evaluate_tile, jobs):
+					stats.merge(result)
+					pb.done()
+		else:
+			for job in jobs:
+				stats.merge(_evaluate_tile(job))
+				pb.done()
+
+	if target is not None and type(target) != str:
+		target.flush()
+	return stats
+
+def stream_stats(path: str, xlim: tuple, ylim: tuple, zlim: tuple, chunk=64) -> VolumeStats:
+	"""
+	Recompute the integrated quantities of a volume already on disk,
+	one tile at a time.
+	"""
+
+	F = np.load(path, mmap_mode="r")
+	volume = Volume(xlim, ylim, zlim, F.shape)
+	stats = VolumeStats()
+	for tile in volume.tiles(chunk):
+		grown = tuple(slice(max(sl.start - 1, 0), min(sl.stop + 1, n)) for sl, n in zip(tile, F.shape))
+		stats.merge(tile_stats(np.asarray(F[grown], dtype=float), _interior(tile, 1), volume))
+	return stats
+
+def main(argv: list[str]=None) -> VolumeStats:
+	parser = argparse.ArgumentParser(prog="python -m sxl.volume", description="Evaluate a field f(x, y, z) over a 3D box.")
+	parser.add_argument("module", help="module name or path of a .py file defining the field")
+	parser.add_argument("field", help="name of the field function, called as f(x, y, z, **params)")
+	parser.add_argument("-n", "--resolution", type=int, default=128, help="grid points per axis")
+	parser.add_argument("--lim", type=float, default=2.5, help="half-width of the cubic box")
+	parser.add_argument("-o", "--output", default=None, help=".npy file to write the values to")
+	parser.add_argument("-p", "--param", action="append", metavar="NAME=VALUE", help="keyword parameter passed to the field (repeatable)")
+	parser.add_argument("-c", "--chunk", type=int, default=64, help="tile edge length")
+	parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (or threads with --threads)")
+	parser.add_argument("--threads", action="store_true", help="use threads instead of processes")
+	parser.add_argument("--float64", action="store_true", help="store float64 instead of float32")
+	args = parser.parse_args(argv)
+
+	params = {}
+	for item in args.param or []:
+		key, _, value = item.partition("=")
+		params[key] = float(value)
+
+	fn = getattr(util.load_module(args.module), args.field)
+	lim = (-args.lim, args.lim)
+	stats = evaluate(fn, lim, lim, lim, args.resolution, args.output, args.chunk, args.jobs, args.threads,
+		np.float64 if args.float64 else np.float32, **params)
+	for key, value in stats.as_dict().items():
+		print("{:<16}{}".format(key, value))
+	return stats
+
+if __name__ == "__main__":
+	main()